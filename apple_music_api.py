@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Mood query API
+Read-only index over the daemon's current classification: the moods of any
+track by persistent ID, and pages of tracks per mood, answered in batches
+"""
+
+from typing import List, Dict, Sequence
+
+# Tracks returned by a tracks query without a limit
+DEFAULT_PAGE_SIZE = 50
+QUERY_OPS = ('moods', 'tracks', 'summary')
+
+
+class MoodIndex:
+    """Moods by persistent ID and tracks by mood for one classification
+
+    Built once per sync and swapped in whole, so queries on other threads always
+    see a consistent classification.
+    """
+
+    def __init__(self, tracks: List[Dict], track_moods: List[List[str]],
+                 duplicates: List[List[Dict]] = (), moods: Sequence[str] = ()):
+        self.moods_by_id: Dict[str, List[str]] = {}
+        # Every mood of the strategy, so one without tracks answers with an empty page
+        self.tracks_by_mood: Dict[str, List[Dict]] = {mood: [] for mood in moods}
+        for track, moods in zip(tracks, track_moods):
+            entry = {'persistent_id': track.get('persistent_id', ''), 'name': track['name'],
+                     'artist': track.get('artist', ''), 'genre': track.get('genre', '')}
+            self.moods_by_id[entry['persistent_id']] = moods
+            for mood in moods:
+                self.tracks_by_mood.setdefault(mood, []).append(entry)
+        # Copies collapsed before classification share their representative's moods
+        for members in duplicates:
+            moods = self.moods_by_id.get(members[0].get('persistent_id'), [])
+            for copy in members[1:]:
+                self.moods_by_id[copy.get('persistent_id', '')] = moods
+
+    @classmethod
+    def from_organizer(cls, organizer) -> 'MoodIndex':
+        return cls(organizer.tracks, organizer.track_moods, organizer.duplicates, organizer.moods())
+
+    def moods(self, ids: List[str]) -> Dict:
+        """Moods of each track; unknown IDs map to None"""
+        lookup = self.moods_by_id.get
+        return {'moods': {pid: lookup(pid) for pid in ids}}
+
+    def tracks(self, mood: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> Dict:
+        """One page of a mood's tracks in library order"""
+        if mood not in self.tracks_by_mood:
+            return {'error': f"unknown mood {mood!r}"}
+        tracks = self.tracks_by_mood[mood]
+        return {'mood': mood, 'total': len(tracks), 'tracks': tracks[offset:offset + limit]}
+
+    def summary(self) -> Dict:
+        return {'tracks': len(self.moods_by_id),
+                'moods': {mood: len(tracks) for mood, tracks in self.tracks_by_mood.items()}}
+
+    def answer(self, request: Dict) -> Dict:
+        """Answer one query: {"op": "moods", "ids": [...]},
+        {"op": "tracks", "mood": ..., "limit": n, "offset": n} or {"op": "summary"}"""
+        op = request.get('op')
+        try:
+            if op == 'moods':
+                return self.moods(list(request['ids']))
+            if op == 'tracks':
+                return self.tracks(request['mood'], int(request.get('limit', DEFAULT_PAGE_SIZE)),
+                                   int(request.get('offset', 0)))
+            if op == 'summary':
+                return self.summary()
+        except (KeyError, TypeError, ValueError) as e:
+            return {'error': f"bad {op} query: {e!r}"}
+        return {'error': f"unknown op {op!r}"}
@@ -0,0 +1,878 @@
+#!/usr/bin/env python3
+"""
+Music.app automation shared by every organizer
+Runs AppleScript, reads the library in bulk and writes playlists
+"""
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Tuple, Dict, Optional, Sequence
+
+# Control characters cannot appear in track metadata, so unlike ", " they
+# split the fetch output safely even when titles contain commas or quotes
+FIELD_SEPARATOR = '\x1e'
+VALUE_SEPARATOR = '\x1f'
+
+FETCH_PROPERTIES = ['persistent ID', 'name', 'artist', 'genre', 'duration']
+
+# Tracks `duplicate` cannot add to a playlist, by reason: shared-library and
+# streaming (URL) tracks, and cloud tracks that are gone from the store
+UNADDABLE_TRACKS = [
+    ('shared', 'every shared track of library playlist 1'),
+    ('stream', 'every URL track of library playlist 1'),
+    ('unavailable', '(every track of library playlist 1 whose cloud status is no longer available)'),
+    ('removed', '(every track of library playlist 1 whose cloud status is removed)'),
+]
+
+FETCH_BATCH_SIZE = 500
+# Floor for the timeout of a bisected fetch range; each split halves the timeout
+MIN_FETCH_TIMEOUT = 5.0
+# Track names reach add scripts through a data file, so only osascript's timeout
+# bounds a batch
+ADD_BATCH_SIZE = 200
+
+# Waiting for Music.app: give up after LAUNCH_TIMEOUT seconds; probes back off
+# from PROBE_FIRST_DELAY, doubling up to PROBE_MAX_DELAY between tries
+LAUNCH_TIMEOUT = 60.0
+PROBE_TIMEOUT = 5.0
+PROBE_FIRST_DELAY = 0.1
+PROBE_MAX_DELAY = 2.0
+
+# Answers "ready" once Music.app responds to Apple Events, without launching it
+PROBE_SCRIPT = '''
+if application "Music" is running then
+    tell application "Music" to get name of library playlist 1
+    return "ready"
+end if
+return "stopped"
+'''
+
+# Compiled copies of parameterized scripts, keyed by a hash of their source
+SCRIPT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'apple_music_scripts')
+
+
+class AppleScriptRunner:
+    """Executes AppleScript through osascript"""
+
+    def __init__(self, timeout: int = 60, instrumentation=None):
+        self.timeout = timeout
+        self.instrumentation = instrumentation
+
+    def run(self, script: str, kind: str = 'script', timeout: Optional[float] = None) -> str:
+        """Execute AppleScript safely; kind labels the call in instrumentation
+
+        The source goes to osascript on stdin, so its size is not limited by argv.
+        """
+        return self.execute(['osascript', '-'], script, kind, len(script.encode('utf-8')), timeout)
+
+    def run_cached(self, script: str, args: Sequence[str] = (), lines: Optional[List[str]] = None,
+                   kind: str = 'script', timeout: Optional[float] = None) -> str:
+        """Run a parameterized script (an `on run argv` handler) compiled once and cached
+
+        Only the arguments travel with each call; lines, if given, are written to a
+        temporary UTF-8 file whose path is passed as the last argument, so values
+        need no escaping however many there are.
+        """
+        command = ['osascript', self.compiled(script), *args]
+        data_path = None
+        sent = sum(len(arg.encode('utf-8')) for arg in args)
+        if lines is not None:
+            payload = '\n'.join(line.replace('\n', ' ').replace('\r', ' ') for line in lines)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.txt', delete=False) as f:
+                f.write(payload)
+                data_path = f.name
+            command.append(data_path)
+            sent += len(payload.encode('utf-8'))
+        try:
+            return self.execute(command, None, kind, sent, timeout)
+        finally:
+            if data_path:
+                os.unlink(data_path)
+
+    def compiled(self, script: str) -> str:
+        """Path of a compiled copy of script, built on first use"""
+        key = hashlib.blake2b(script.encode('utf-8'), digest_size=10).hexdigest()
+        compiled_path = os.path.join(SCRIPT_CACHE_DIR, f'{key}.scpt')
+        if os.path.exists(compiled_path):
+            return compiled_path
+        os.makedirs(SCRIPT_CACHE_DIR, exist_ok=True)
+        source_path = os.path.join(SCRIPT_CACHE_DIR, f'{key}.applescript')
+        with open(source_path, 'w', encoding='utf-8') as f:
+            f.write(script)
+        tmp_path = f'{compiled_path}.{os.getpid()}.tmp'
+        try:
+            subprocess.run(['osacompile', '-o', tmp_path, source_path],
+                           capture_output=True, check=True, timeout=self.timeout)
+            os.replace(tmp_path, compiled_path)
+            return compiled_path
+        except (OSError, subprocess.SubprocessError):
+            # Without osacompile, osascript still runs the source text
+            return source_path
+
+    def execute(self, command: List[str], stdin: Optional[str], kind: str, sent_bytes: int,
+                timeout: Optional[float] = None) -> str:
+        """Run one osascript process and record it in instrumentation"""
+        start = time.perf_counter()
+        stdout = ""
+        timed_out = failed = False
+        try:
+            proc = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            stdout, stderr = proc.communicate(input=stdin, timeout=timeout or self.timeout)
+            failed = proc.returncode != 0
+            stdout = stdout.strip()
+            if stderr.strip():
+                print(f"Warning: {stderr.strip()}")
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            timed_out = True
+        except Exception as e:
+            print(f"Warning: could not run {command[0]}: {e}")
+            failed = True
+
+        if self.instrumentation is not None:
+            self.instrumentation.record_call(kind, start, time.perf_counter() - start,
+                                             sent_bytes, len(stdout.encode('utf-8')),
+                                             timed_out, failed)
+        return stdout
+
+
+# Sets `epoch` to 2001-01-01 00:00 local time; date - epoch gives locale-independent seconds
+EPOCH_SCRIPT = '''
+        set epoch to current date
+        set day of epoch to 1
+        set month of epoch to January
+        set year of epoch to 2001
+        set time of epoch to 0
+'''
+
+
+def fetch_script(start_idx: int, end_idx: int) -> str:
+    """AppleScript reading one range of tracks with a single Apple Event per property"""
+    return tracks_fetch_script(f"tracks {start_idx} thru {end_idx} of library playlist 1")
+
+
+def tracks_fetch_script(tracks_ref: str, setup: str = '') -> str:
+    """AppleScript reading FETCH_PROPERTIES of every track in tracks_ref, one Apple Event
+    per property; setup runs first and may define variables tracks_ref uses"""
+    fetches = '\n'.join(
+        f'            set end of columns to my joinList({prop} of {tracks_ref})'
+        for prop in FETCH_PROPERTIES
+    )
+    return f'''
+        on joinList(theList)
+            set AppleScript's text item delimiters to (character id 31)
+            try
+                set joined to theList as text
+            on error
+                -- missing values cannot be coerced in bulk, fall back to one by one
+                set parts to {{}}
+                repeat with anItem in theList
+                    try
+                        set end of parts to (contents of anItem) as text
+                    on error
+                        set end of parts to ""
+                    end try
+                end repeat
+                set joined to parts as text
+            end try
+            set AppleScript's text item delimiters to ""
+            return joined
+        end joinList
+{setup}
+        set columns to {{}}
+        tell application "Music"
+{fetches}
+        end tell
+        set AppleScript's text item delimiters to (character id 30)
+        set output to columns as text
+        set AppleScript's text item delimiters to ""
+        return output
+        '''
+
+
+def parse_fetch_result(result: str) -> List[Tuple[str, str, str, str, float]]:
+    """Split fetch output into (persistent ID, name, artist, genre, duration) rows"""
+    fields = result.split(FIELD_SEPARATOR) if result else []
+    if len(fields) != len(FETCH_PROPERTIES):
+        return []
+    columns = [field.split(VALUE_SEPARATOR) for field in fields]
+    if len({len(column) for column in columns}) != 1 or columns[0] == ['']:
+        return []
+
+    rows = []
+    for pid, name, artist, genre, duration in zip(*columns):
+        try:
+            seconds = float(duration.replace(',', '.'))
+        except ValueError:
+            seconds = 0.0
+        rows.append((pid.strip(), name.strip(), artist.strip(), genre.strip(), seconds))
+    return rows
+
+
+class MusicLaunch:
+    """Waits for Music.app on a background thread so local work can run meanwhile"""
+
+    def __init__(self, music: 'MusicApp', timeout: float = LAUNCH_TIMEOUT):
+        self.music = music
+        self.timeout = timeout
+        self.ready = False
+        self.launched = False
+        self.announced = False
+        self.seconds = 0.0
+        self.thread = threading.Thread(target=self.probe, daemon=True)
+
+    def start(self) -> 'MusicLaunch':
+        self.thread.start()
+        return self
+
+    def probe(self):
+        start = time.perf_counter()
+        self.ready, self.launched = self.music.wait_until_ready(self.timeout)
+        self.seconds = time.perf_counter() - start
+
+    def wait(self) -> bool:
+        """Block until Music.app answered or the timeout passed"""
+        self.thread.join()
+        if self.launched and not self.announced:
+            print(f"\nOpened Music.app (ready after {self.seconds:.1f}s)")
+            self.announced = True
+        return self.ready
+
+
+class FetchStats:
+    """Recovery counters for one library read"""
+
+    def __init__(self):
+        # Ranges fetched again after a failure
+        self.retried = 0
+        # Failed ranges split in two
+        self.bisected = 0
+        # Single tracks that still failed on retry, by library index
+        self.skipped = 0
+        self.skipped_tracks: List[int] = []
+
+
+class MusicApp:
+    """Music.app operations on top of an AppleScriptRunner, journaling playlist
+    writes when given a PlaylistJournal"""
+
+    def __init__(self, runner: AppleScriptRunner, journal=None):
+        self.runner = runner
+        self.journal = journal
+
+    def wait_until_ready(self, timeout: float = LAUNCH_TIMEOUT) -> Tuple[bool, bool]:
+        """Probe Music.app with exponential backoff, opening it if it is not running;
+        returns (ready, launched)"""
+        deadline = time.monotonic() + timeout
+        delay = PROBE_FIRST_DELAY
+        launched = False
+        while True:
+            status = self.runner.run(PROBE_SCRIPT, 'probe', PROBE_TIMEOUT)
+            if status == 'ready':
+                return True, launched
+            if status == 'stopped' and not launched:
+                subprocess.run(['open', '-a', 'Music'])
+                launched = True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, launched
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, PROBE_MAX_DELAY)
+
+    def prepare_writes(self):
+        """Compile the playlist scripts ahead of the first write"""
+        for script in WRITE_SCRIPTS:
+            self.runner.compiled(script)
+
+    def track_count(self) -> int:
+        """Get total number of tracks"""
+        script = 'tell application "Music" to return count of tracks of library playlist 1'
+        result = self.runner.run(script, 'count')
+        try:
+            return int(result) if result else 0
+        except ValueError:
+            return 0
+
+    def fetch_tracks(self, start_idx: int, end_idx: int,
+                     timeout: Optional[float] = None) -> List[Tuple[str, str, str, str, float]]:
+        """Get one range of tracks"""
+        return parse_fetch_result(self.runner.run(fetch_script(start_idx, end_idx), 'fetch', timeout))
+
+    def fetch_range(self, start_idx: int, end_idx: int, stats: FetchStats,
+                    timeout: Optional[float] = None) -> List[Tuple[str, str, str, str, float]]:
+        """Get one range of tracks, splitting it in half whenever a fetch times out or
+        comes back short, until the tracks that cannot be read are isolated and skipped
+
+        Each split halves the timeout (down to MIN_FETCH_TIMEOUT), so isolating a
+        track that hangs Music.app costs a few seconds per level instead of a full timeout.
+        """
+        rows = self.fetch_tracks(start_idx, end_idx, timeout)
+        if len(rows) == end_idx - start_idx + 1:
+            return rows
+
+        sub_timeout = max(MIN_FETCH_TIMEOUT, (timeout or self.runner.timeout) / 2)
+        if start_idx == end_idx:
+            # One more try in case the failure was transient
+            stats.retried += 1
+            rows = self.fetch_tracks(start_idx, end_idx, sub_timeout)
+            if len(rows) == 1:
+                return rows
+            stats.skipped += 1
+            stats.skipped_tracks.append(start_idx)
+            return []
+
+        stats.bisected += 1
+        stats.retried += 2
+        middle = (start_idx + end_idx) // 2
+        return (self.fetch_range(start_idx, middle, stats, sub_timeout) +
+                self.fetch_range(middle + 1, end_idx, stats, sub_timeout))
+
+    def library_signature(self) -> Tuple[int, int]:
+        """Track count and latest modification date (seconds since 2001) in one call;
+        cheap enough to poll, and changes whenever a track is added, edited or removed"""
+        script = EPOCH_SCRIPT + '''
+        tell application "Music"
+            set trackCount to count of tracks of library playlist 1
+            if trackCount is 0 then return "0" & (character id 31) & "0"
+            set dates to modification date of every track of library playlist 1
+        end tell
+        set latest to epoch
+        repeat with aDate in dates
+            try
+                if (contents of aDate) > latest then set latest to contents of aDate
+            end try
+        end repeat
+        return (trackCount as text) & (character id 31) & ((latest - epoch) as integer as text)
+        '''
+        result = self.runner.run(script, 'poll')
+        try:
+            count, latest = result.split(VALUE_SEPARATOR)
+            return int(count), int(latest)
+        except ValueError:
+            return 0, 0
+
+    def unaddable_tracks(self) -> Dict[str, str]:
+        """Reason each track that cannot be added to a playlist is excluded, by persistent
+        ID; one whose-query per reason covers the whole library"""
+        queries = '\n'.join(f'''
+            try
+                set end of groups to "{reason}" & (character id 31) & my joinList(persistent ID of {tracks_ref})
+            on error
+                set end of groups to "{reason}"
+            end try''' for reason, tracks_ref in UNADDABLE_TRACKS)
+        script = f'''
+        on joinList(theList)
+            set AppleScript's text item delimiters to (character id 31)
+            set joined to theList as text
+            set AppleScript's text item delimiters to ""
+            return joined
+        end joinList
+
+        set groups to {{}}
+        tell application "Music"{queries}
+        end tell
+        set AppleScript's text item delimiters to (character id 30)
+        set output to groups as text
+        set AppleScript's text item delimiters to ""
+        return output
+        '''
+        result = self.runner.run(script, 'status')
+        unaddable = {}
+        for group in result.split(FIELD_SEPARATOR) if result else []:
+            reason, *ids = group.split(VALUE_SEPARATOR)
+            for pid in ids:
+                if pid.strip():
+                    unaddable[pid.strip()] = reason
+        return unaddable
+
+    def fetch_modified_since(self, seconds: int) -> List[Tuple[str, str, str, str, float]]:
+        """Tracks added or edited since a library_signature() timestamp (to the second,
+        so a few tracks edited in that second come back again)"""
+        setup = EPOCH_SCRIPT + f"        set cutoff to epoch + {int(seconds)}\n"
+        tracks_ref = "(every track of library playlist 1 whose modification date >= cutoff)"
+        return parse_fetch_result(self.runner.run(tracks_fetch_script(tracks_ref, setup), 'fetch'))
+
+    def persistent_ids(self) -> List[str]:
+        """Persistent ID of every track, to spot removed tracks"""
+        script = '''
+        tell application "Music" to set ids to persistent ID of every track of library playlist 1
+        set AppleScript's text item delimiters to (character id 31)
+        set output to ids as text
+        set AppleScript's text item delimiters to ""
+        return output
+        '''
+        result = self.runner.run(script, 'ids')
+        return [pid.strip() for pid in result.split(VALUE_SEPARATOR)] if result else []
+
+    def create_playlist(self, playlist_name: str, track_names: List[str],
+                        batch_size: int = ADD_BATCH_SIZE) -> bool:
+        """Create playlist by adding tracks
+
+        With a journal the playlist's previous track IDs are recorded first and the
+        result is verified by its track count; a failed write restores the old tracks.
+        If the previous tracks cannot be read, the playlist is left alone.
+        """
+        if not track_names:
+            return False
+
+        journal = self.journal
+        if journal is None:
+            added_ids = self.fill_playlist(playlist_name, track_names, 'name', batch_size)
+            return bool(added_ids)
+
+        read, old_ids = self.playlist_track_ids(playlist_name)
+        if not read:
+            return False
+        entry = journal.begin(playlist_name, old_ids)
+        added_ids = self.fill_playlist(playlist_name, track_names, 'name', batch_size, entry)
+        # An empty result replaced the old tracks with nothing; that is a failure too
+        if added_ids and self.playlist_count(playlist_name) == len(added_ids):
+            journal.commit(entry)
+            return True
+
+        self.restore_playlist(playlist_name, old_ids)
+        journal.rollback(entry)
+        return False
+
+    def fill_playlist(self, playlist_name: str, values: List[str], match: str,
+                      batch_size: int = ADD_BATCH_SIZE, entry: Optional[int] = None) -> Optional[List[str]]:
+        """Replace the playlist with the tracks whose name (match='name') or persistent ID
+        (match='persistent ID') is in values; returns the persistent IDs added, or None
+        if a step failed"""
+        # Create playlist first
+        result = self.runner.run_cached(CREATE_PLAYLIST_SCRIPT, [playlist_name], kind='create')
+        if result != "created":
+            return None
+        return self.append_tracks(playlist_name, values, match, batch_size, entry)
+
+    def append_tracks(self, playlist_name: str, values: List[str], match: str,
+                      batch_size: int = ADD_BATCH_SIZE, entry: Optional[int] = None) -> Optional[List[str]]:
+        """Add tracks by name or persistent ID to an existing playlist in batches"""
+        added_ids = []
+        for i in range(0, len(values), batch_size):
+            batch = values[i:i + batch_size]
+            ids = parse_id_result(self.runner.run_cached(ADD_TRACKS_SCRIPT, [playlist_name, match],
+                                                         batch, kind='add'))
+            if ids is None:
+                return None
+            added_ids.extend(ids)
+            if entry is not None:
+                self.journal.added(entry, ids)
+
+        if entry is not None:
+            self.journal.complete(entry)
+        return added_ids
+
+    def import_playlist(self, playlist_name: str, playlist_file: str, expected: int,
+                        extra_names: Sequence[str] = ()) -> bool:
+        """Replace a playlist with the tracks listed in an M3U8/XSPF file using a single
+        `add` command, then add extra_names (tracks the file could not list) by name
+
+        With a journal the import and the additions are one entry: the old tracks
+        come back if either step fails or the final count is off.
+        """
+        journal = self.journal
+        entry = None
+        if journal is not None:
+            read, old_ids = self.playlist_track_ids(playlist_name)
+            if not read:
+                return False
+            entry = journal.begin(playlist_name, old_ids)
+        imported = (self.runner.run_cached(CREATE_PLAYLIST_SCRIPT, [playlist_name], kind='create') == "created" and
+                    self.runner.run_cached(IMPORT_PLAYLIST_SCRIPT, [playlist_name, playlist_file],
+                                           kind='import') == "ok" and
+                    self.playlist_count(playlist_name) == expected)
+        if imported and extra_names:
+            # Not journaled as added IDs: the import's own tracks are not in the entry,
+            # so a crash here must roll back rather than forward
+            added_ids = self.append_tracks(playlist_name, list(extra_names), 'name')
+            imported = (added_ids is not None and
+                        self.playlist_count(playlist_name) == expected + len(added_ids))
+        if journal is None:
+            return imported
+        if imported:
+            journal.commit(entry)
+            return True
+        self.restore_playlist(playlist_name, old_ids)
+        journal.rollback(entry)
+        return False
+
+    def write_plan(self, plan) -> Dict[str, bool]:
+        """Create and fill every playlist of a WritePlan, one script per chunk
+
+        With a journal, every playlist's previous tracks are read in one script
+        first; each playlist is journaled before the chunk that replaces it and
+        checked against the count the script reports once its last step ran. A
+        playlist whose chunk fails gets its old tracks back and is dropped from
+        later chunks.
+        """
+        journal = self.journal
+        names = [name for name, _ in plan.playlists]
+        old_ids = self.all_playlist_track_ids(names) if journal is not None else {}
+        if old_ids is None:
+            return {name: False for name in names}
+        last_chunk = {name: index for index, chunk in enumerate(plan.chunks) for name, _, _ in chunk}
+        entries: Dict[str, int] = {}
+        added: Dict[str, List[str]] = {name: [] for name in names}
+        results: Dict[str, bool] = {}
+
+        for index, chunk in enumerate(plan.chunks):
+            chunk = [step for step in chunk if step[0] not in results]
+            if not chunk:
+                continue
+            if journal is not None:
+                for name, replace, _ in chunk:
+                    if replace:
+                        entries[name] = journal.begin(name, old_ids.get(name))
+            batches = -(-sum(len(tracks) for _, _, tracks in chunk) // ADD_BATCH_SIZE)
+            outcome = parse_write_result(self.runner.run_cached(
+                WRITE_PLAYLISTS_SCRIPT, lines=plan.lines(chunk), kind='write',
+                timeout=self.runner.timeout * max(1, batches)))
+
+            for name in dict.fromkeys(name for name, _, _ in chunk):
+                if outcome is None or name not in outcome:
+                    results[name] = False
+                    continue
+                count, ids = outcome[name]
+                added[name].extend(ids)
+                if journal is not None:
+                    journal.added(entries[name], ids)
+                if last_chunk[name] == index:
+                    results[name] = count == len(added[name]) and bool(added[name])
+
+        for name in names:
+            if journal is None or name not in entries:
+                continue
+            if results.get(name):
+                journal.complete(entries[name])
+                journal.commit(entries[name])
+            else:
+                self.restore_playlist(name, old_ids.get(name))
+                journal.rollback(entries[name])
+        return {name: results.get(name, False) for name in names}
+
+    def all_playlist_track_ids(self, playlist_names: List[str]) -> Optional[Dict[str, Optional[List[str]]]]:
+        """Previous track IDs of many playlists in one script (None for those missing);
+        None overall if any playlist could not be read"""
+        result = self.runner.run_cached(ALL_PLAYLIST_IDS_SCRIPT, lines=playlist_names, kind='ids')
+        status, _, rest = result.partition(FIELD_SEPARATOR)
+        entries = rest.split(FIELD_SEPARATOR) if rest else []
+        if status != "ok" or len(entries) != len(playlist_names):
+            return None
+        old_ids = {}
+        for name, entry in zip(playlist_names, entries):
+            values = entry.split(VALUE_SEPARATOR)
+            if values[0] == "missing":
+                old_ids[name] = None
+            elif values[0] == "ok":
+                old_ids[name] = [pid.strip() for pid in values[1:] if pid]
+            else:
+                return None
+        return old_ids
+
+    def track_locations(self) -> Dict[str, str]:
+        """POSIX path of every track with a local file, by persistent ID"""
+        script = '''
+        script L
+            property ids : {}
+            property locs : {}
+            property pairs : {}
+        end script
+        tell application "Music"
+            set L's ids to persistent ID of every file track of library playlist 1
+            set L's locs to location of every file track of library playlist 1
+        end tell
+        repeat with i from 1 to count of L's ids
+            try
+                set end of L's pairs to (item i of L's ids) & (character id 31) & (POSIX path of (item i of L's locs))
+            end try
+        end repeat
+        set AppleScript's text item delimiters to (character id 30)
+        set output to L's pairs as text
+        set AppleScript's text item delimiters to ""
+        return output
+        '''
+        result = self.runner.run(script, 'locations')
+        locations = {}
+        for pair in result.split(FIELD_SEPARATOR) if result else []:
+            pid, _, path = pair.partition(VALUE_SEPARATOR)
+            if path:
+                locations[pid.strip()] = path
+        return locations
+
+    def playlist_track_ids(self, playlist_name: str) -> Tuple[bool, Optional[List[str]]]:
+        """(read, IDs): the persistent IDs of a playlist's tracks in order, or None if
+        there is no such playlist; read is False if they could not be read at all"""
+        result = self.runner.run_cached(PLAYLIST_IDS_SCRIPT, [playlist_name], kind='ids')
+        if result == "missing":
+            return True, None
+        ids = parse_id_result(result)
+        return ids is not None, ids
+
+    def playlist_count(self, playlist_name: str) -> int:
+        result = self.runner.run_cached(PLAYLIST_COUNT_SCRIPT, [playlist_name], kind='verify')
+        return int(result) if result.isdigit() else -1
+
+    def restore_playlist(self, playlist_name: str, old_ids: Optional[List[str]]) -> bool:
+        """Put back a playlist's previous tracks, or remove it if it did not exist"""
+        if old_ids is None:
+            return self.runner.run_cached(DELETE_PLAYLIST_SCRIPT, [playlist_name], kind='delete') == "deleted"
+        restored = self.fill_playlist(playlist_name, old_ids, 'persistent ID')
+        return restored is not None and self.playlist_count(playlist_name) == len(restored)
+
+    def recover(self) -> List[str]:
+        """Finish or undo journaled writes a crash interrupted: a write whose every
+        batch ran is rebuilt from the IDs it added, any other gets its old tracks back"""
+        journal = self.journal
+        outcomes = []
+        for entry in journal.pending():
+            name = entry['playlist']
+            if entry['complete']:
+                rebuilt = self.fill_playlist(name, entry['ids'], 'persistent ID')
+                if rebuilt is not None and self.playlist_count(name) == len(rebuilt):
+                    journal.commit(entry['id'])
+                    outcomes.append(f"rolled '{name}' forward ({len(entry['ids'])} tracks)")
+                    continue
+            if self.restore_playlist(name, entry['old_ids']):
+                journal.rollback(entry['id'])
+                restored = len(entry['old_ids']) if entry['old_ids'] is not None else 0
+                outcomes.append(f"rolled '{name}' back ({restored} tracks)")
+            else:
+                outcomes.append(f"could not restore '{name}'; will retry next run")
+        return outcomes
+
+
+def parse_write_result(result: str) -> Optional[Dict[str, Tuple[int, List[str]]]]:
+    """Track count and added IDs per playlist from WRITE_PLAYLISTS_SCRIPT; None if it failed"""
+    status, _, rest = result.partition(FIELD_SEPARATOR)
+    if status != "ok":
+        return None
+    outcome = {}
+    for step in rest.split(FIELD_SEPARATOR) if rest else []:
+        name, count, *ids = step.split(VALUE_SEPARATOR)
+        if not count.isdigit():
+            return None
+        previous = outcome.get(name, (0, []))[1]
+        outcome[name] = (int(count), previous + [pid.strip() for pid in ids if pid])
+    return outcome
+
+
+def parse_id_result(result: str) -> Optional[List[str]]:
+    """IDs from an "ok"-prefixed script result; None if the script failed or timed out"""
+    status, _, ids = result.partition(FIELD_SEPARATOR)
+    if status != "ok":
+        return None
+    return [pid.strip() for pid in ids.split(VALUE_SEPARATOR)] if ids else []
+
+
+# Parameterized scripts run through AppleScriptRunner.run_cached: the playlist
+# name is an argument and tracks arrive one per line in a data file
+CREATE_PLAYLIST_SCRIPT = '''
+on run argv
+    set playlistName to item 1 of argv
+    tell application "Music"
+        try
+            -- Delete existing playlist if it exists
+            try
+                set existingPlaylist to playlist playlistName
+                delete existingPlaylist
+            end try
+
+            -- Create new playlist
+            set newPlaylist to make new playlist with properties {name:playlistName}
+            return "created"
+        on error errMsg
+            return "error: " & errMsg
+        end try
+    end tell
+end run
+'''
+
+# Returns "ok", a record separator and the persistent IDs actually added
+ADD_TRACKS_SCRIPT = '''
+on run argv
+    set playlistName to item 1 of argv
+    set matchBy to item 2 of argv
+    set trackKeys to paragraphs of (read (POSIX file (item 3 of argv)) as «class utf8»)
+    set addedIds to {}
+    tell application "Music"
+        set targetPlaylist to playlist playlistName
+        repeat with trackKey in trackKeys
+            try
+                if matchBy is "name" then
+                    set foundTracks to (every track of library playlist 1 whose name is (contents of trackKey))
+                else
+                    set foundTracks to (every track of library playlist 1 whose persistent ID is (contents of trackKey))
+                end if
+                if (count of foundTracks) > 0 then
+                    set trackToAdd to item 1 of foundTracks
+                    -- Shared/streaming tracks cannot be duplicated
+                    try
+                        duplicate trackToAdd to targetPlaylist
+                        set end of addedIds to persistent ID of trackToAdd
+                    end try
+                end if
+            end try
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (character id 31)
+    set output to "ok" & (character id 30) & (addedIds as text)
+    set AppleScript's text item delimiters to ""
+    return output
+end run
+'''
+
+# Adds every track an M3U8/XSPF file lists to the playlist in one command;
+# files already in the library resolve to their existing tracks
+IMPORT_PLAYLIST_SCRIPT = '''
+on run argv
+    tell application "Music"
+        try
+            add (POSIX file (item 2 of argv)) to playlist (item 1 of argv)
+            return "ok"
+        on error errMsg
+            return "error: " & errMsg
+        end try
+    end tell
+end run
+'''
+
+# Creates and fills several playlists from one data file. A line starting with
+# character id 30 opens a step: "N" + name replaces the playlist, "A" + name
+# adds to it; the track names follow one per line. Returns "ok", then per step
+# the name, the playlist's track count and the persistent IDs added
+WRITE_PLAYLISTS_SCRIPT = '''
+on stepResult(playlistName, targetPlaylist, addedIds)
+    tell application "Music" to set trackCount to count of tracks of targetPlaylist
+    set AppleScript's text item delimiters to (character id 31)
+    set output to ({playlistName, trackCount as text} & addedIds) as text
+    set AppleScript's text item delimiters to ""
+    return output
+end stepResult
+
+on run argv
+    set dataLines to paragraphs of (read (POSIX file (item 1 of argv)) as «class utf8»)
+    set stepMark to character id 30
+    set results to {"ok"}
+    set targetPlaylist to missing value
+    tell application "Music"
+        try
+            repeat with lineRef in dataLines
+                set lineText to contents of lineRef
+                if lineText starts with stepMark then
+                    if targetPlaylist is not missing value then
+                        set end of results to my stepResult(playlistName, targetPlaylist, addedIds)
+                    end if
+                    set playlistName to text 3 thru -1 of lineText
+                    if character 2 of lineText is "N" then
+                        try
+                            delete playlist playlistName
+                        end try
+                        set targetPlaylist to make new playlist with properties {name:playlistName}
+                    else
+                        set targetPlaylist to playlist playlistName
+                    end if
+                    set addedIds to {}
+                else if lineText is not "" then
+                    try
+                        set foundTracks to (every track of library playlist 1 whose name is lineText)
+                        if (count of foundTracks) > 0 then
+                            set trackToAdd to item 1 of foundTracks
+                            -- Shared/streaming tracks cannot be duplicated
+                            try
+                                duplicate trackToAdd to targetPlaylist
+                                set end of addedIds to persistent ID of trackToAdd
+                            end try
+                        end if
+                    end try
+                end if
+            end repeat
+            if targetPlaylist is not missing value then
+                set end of results to my stepResult(playlistName, targetPlaylist, addedIds)
+            end if
+        on error errMsg
+            return "error: " & errMsg
+        end try
+    end tell
+    set AppleScript's text item delimiters to (character id 30)
+    set output to results as text
+    set AppleScript's text item delimiters to ""
+    return output
+end run
+'''
+
+# Returns "ok", then per playlist named in the data file "missing" if it does not
+# exist, "error" if its tracks could not be read, or "ok" and its persistent IDs
+ALL_PLAYLIST_IDS_SCRIPT = '''
+on run argv
+    set playlistNames to paragraphs of (read (POSIX file (item 1 of argv)) as «class utf8»)
+    set results to {"ok"}
+    set AppleScript's text item delimiters to (character id 31)
+    tell application "Music"
+        repeat with playlistName in playlistNames
+            if not (exists playlist (contents of playlistName)) then
+                set end of results to "missing"
+            else
+                try
+                    set ids to persistent ID of every track of playlist (contents of playlistName)
+                    set end of results to ({"ok"} & ids) as text
+                on error
+                    set end of results to "error"
+                end try
+            end if
+        end repeat
+    end tell
+    set AppleScript's text item delimiters to (character id 30)
+    set output to results as text
+    set AppleScript's text item delimiters to ""
+    return output
+end run
+'''
+
+PLAYLIST_IDS_SCRIPT = '''
+on run argv
+    tell application "Music"
+        if not (exists playlist (item 1 of argv)) then return "missing"
+        try
+            set ids to persistent ID of every track of playlist (item 1 of argv)
+        on error errMsg
+            return "error: " & errMsg
+        end try
+    end tell
+    set AppleScript's text item delimiters to (character id 31)
+    set output to "ok" & (character id 30) & (ids as text)
+    set AppleScript's text item delimiters to ""
+    return output
+end run
+'''
+
+PLAYLIST_COUNT_SCRIPT = '''
+on run argv
+    tell application "Music" to return count of tracks of playlist (item 1 of argv)
+end run
+'''
+
+DELETE_PLAYLIST_SCRIPT = '''
+on run argv
+    tell application "Music"
+        try
+            delete playlist (item 1 of argv)
+        end try
+    end tell
+    return "deleted"
+end run
+'''
+
+WRITE_SCRIPTS = [CREATE_PLAYLIST_SCRIPT, ADD_TRACKS_SCRIPT, IMPORT_PLAYLIST_SCRIPT, WRITE_PLAYLISTS_SCRIPT,
+                 ALL_PLAYLIST_IDS_SCRIPT, PLAYLIST_IDS_SCRIPT, PLAYLIST_COUNT_SCRIPT, DELETE_PLAYLIST_SCRIPT]
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Apple Music Organizer Benchmarks
+Times every strategy on a synthetic library without touching Music.app
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import platform
+import random
+import time
+from itertools import accumulate
+from typing import List, Dict, Optional
+
+from apple_music_automation import (AppleScriptRunner, CREATE_PLAYLIST_SCRIPT, ADD_TRACKS_SCRIPT,
+                                    WRITE_PLAYLISTS_SCRIPT, FIELD_SEPARATOR, VALUE_SEPARATOR)
+from apple_music_engine import load_strategies
+from apple_music_library import TrackTable
+from apple_music_parallel import ClassifierSpec, classify_tracks
+from apple_music_profile import Profiler, print_report, profile_rules
+
+SPECS = {name: ClassifierSpec(cls, 'classify', 'score')
+         for name, cls in load_strategies().items()}
+
+GENRES = ['Pop', 'Rock', 'Hip Hop/Rap', 'Alternative', 'R&B/Soul', 'Country', 'Dance',
+          'Electronic', 'Classical', 'Jazz', 'Soundtrack', 'Metal', 'Punk', 'Ambient',
+          'Singer/Songwriter', 'Indie Rock', 'Pop Ballad', 'Lo-Fi', 'New Age', 'Blues']
+WORDS = ['love', 'heart', 'go', 'run', 'fire', 'calm', 'peace', 'kill', 'hate', 'lonely',
+         'tears', 'goodbye', 'piano', 'study', 'night', 'dance', 'baby', 'forever', 'rain',
+         'ocean', 'war', 'broken', 'power', 'sweet', 'quiet', 'beat', 'summer', 'city']
+
+# Real libraries are dominated by a few genres and artists
+ZIPF_EXPONENT = 1.1
+# Share of an artist's tracks filed under their main genre
+HOME_GENRE_SHARE = 0.8
+# Share of titles carrying characters that have broken AppleScript quoting or parsing
+ADVERSARIAL_SHARE = 0.15
+
+ADVERSARIAL_TITLES = [
+    'Don\'t Stop, Believe', 'Say "Hello", Goodbye', 'Café del Mar', 'Naïve Love',
+    '東京 Night', 'Señorita', 'Back\\Slash', 'A ||| B', 'Heart, Soul, Fire',
+    '"Quoted" Rain', 'Ça Plane Pour Moi', 'Björk\'s Dance', 'Fire 🔥', 'Mañana',
+    'Dreams — Remastered 2011', 'Love (feat. Someone, Else)', 'Über Calm', 'Ocean\tTab',
+    # Keywords hidden inside longer words
+    'Sweet Home Chicago', 'Audience', 'Gospel Train', 'Lovely Day', 'Hip-Hop Hooray'
+]
+# Each mode is timed this many times and the fastest kept
+MATCH_REPEATS = 3
+# Differently classified tracks and changed keywords listed per strategy
+DIFF_ROWS = 8
+
+ADVERSARIAL_ARTISTS = ['Earth, Wind & Fire', 'Guns N\' Roses', 'Beyoncé', 'Sigur Rós',
+                       '"Weird Al" Yankovic', 'AC/DC', 'Motörhead', '坂本龍一']
+
+
+def zipf_weights(count: int) -> List[float]:
+    """Cumulative Zipf weights for rng.choices over count ranked items"""
+    return list(accumulate(1.0 / (rank ** ZIPF_EXPONENT) for rank in range(1, count + 1)))
+
+
+def synthetic_title(rng: random.Random) -> str:
+    if rng.random() < ADVERSARIAL_SHARE:
+        title = rng.choice(ADVERSARIAL_TITLES)
+        if rng.random() < 0.5:
+            title = f"{title} {rng.choice(WORDS).title()}"
+        return title
+    return ' '.join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 4)))
+
+
+def synthetic_library(size: int, seed: int = 0) -> List[Dict]:
+    """Seeded synthetic library of track dicts with Zipf-distributed genres and artists"""
+    rng = random.Random(seed)
+    genre_weights = zipf_weights(len(GENRES))
+    artists = ADVERSARIAL_ARTISTS + [f"Artist {i}" for i in range(max(10, size // 20))]
+    rng.shuffle(artists)
+    home_genres = rng.choices(GENRES, cum_weights=genre_weights, k=len(artists))
+    artist_ranks = range(len(artists))
+    artist_weights = zipf_weights(len(artists))
+
+    table = TrackTable()
+    for i in range(size):
+        artist_idx = rng.choices(artist_ranks, cum_weights=artist_weights)[0]
+        if rng.random() < HOME_GENRE_SHARE:
+            genre = home_genres[artist_idx]
+        else:
+            genre = rng.choices(GENRES, cum_weights=genre_weights)[0]
+        table.append(synthetic_title(rng), artists[artist_idx], genre,
+                     float(rng.randint(90, 480)), f"{seed:04X}{i:012X}")
+    return table.rows()
+
+
+class SimulatedRunner(AppleScriptRunner):
+    """Runner that records the scripts a write would send instead of running osascript"""
+
+    def __init__(self):
+        super().__init__()
+        self.scripts = 0
+        self.script_bytes = 0
+
+    def run(self, script: str, kind: str = 'script', timeout: Optional[float] = None) -> str:
+        self.scripts += 1
+        self.script_bytes += len(script.encode('utf-8'))
+        return ""
+
+    def run_cached(self, script: str, args=(), lines=None, kind: str = 'script', timeout=None) -> str:
+        # Only the arguments and data lines are sent; the compiled script is reused
+        self.scripts += 1
+        self.script_bytes += sum(len(value.encode('utf-8')) + 1 for value in [*args, *(lines or [])])
+        # Answer like Music.app so the writer carries on through every batch
+        if script == CREATE_PLAYLIST_SCRIPT:
+            return "created"
+        if script == ADD_TRACKS_SCRIPT:
+            return "ok" + FIELD_SEPARATOR
+        if script == WRITE_PLAYLISTS_SCRIPT:
+            return self.write_result(lines)
+        return ""
+
+    @staticmethod
+    def write_result(lines: List[str]) -> str:
+        """Every track of every step added, one placeholder ID each"""
+        steps = []
+        for line in lines:
+            if line.startswith(FIELD_SEPARATOR):
+                steps.append([line[2:], 0])
+            else:
+                steps[-1][1] += 1
+        return FIELD_SEPARATOR.join(["ok"] + [VALUE_SEPARATOR.join([name, str(count)] + ['0'] * count)
+                                               for name, count in steps])
+
+
+def output_digest(final_playlists: Dict[str, List[str]]) -> str:
+    """Short stable hash of a strategy's playlists, so output changes show up next to timings"""
+    payload = json.dumps(final_playlists, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def bench_strategy(name: str, tracks: List[Dict]) -> Dict:
+    """Time the classify, expand and simulated write phases of one strategy"""
+    organizer = load_strategies()[name]()
+    runner = SimulatedRunner()
+    organizer.runner = runner
+
+    # Strategies report progress while expanding and writing; keep it out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        mood_tracks, unclassified = organizer.classify_all(tracks)
+        classified = time.perf_counter()
+        final_playlists = organizer.expand_playlists(mood_tracks, tracks)
+        expanded = time.perf_counter()
+        organizer.write_playlists(final_playlists)
+        written = time.perf_counter()
+        # The same writes coalesced into as few scripts as the payload allows
+        coalesced = SimulatedRunner()
+        organizer.runner = coalesced
+        organizer.coalesce_writes = True
+        organizer.write_playlists(final_playlists)
+
+    return {
+        'strategy': name,
+        'tracks': len(tracks),
+        'classify_seconds': round(classified - start, 4),
+        'expand_seconds': round(expanded - classified, 4),
+        'write_seconds': round(written - expanded, 4),
+        'unclassified': len(unclassified),
+        'playlist_tracks': {mood: len(names) for mood, names in final_playlists.items()},
+        'write_scripts': runner.scripts,
+        'write_script_bytes': runner.script_bytes,
+        'coalesced_write_scripts': coalesced.scripts,
+        'coalesced_write_script_bytes': coalesced.script_bytes,
+        'output_digest': output_digest(final_playlists)
+    }
+
+
+def bench_phases(strategies: List[str], sizes: List[int], seed: int) -> List[Dict]:
+    """Run every strategy over the same library at each size"""
+    results = []
+    for size in sizes:
+        tracks = synthetic_library(size, seed)
+        for name in strategies:
+            results.append(bench_strategy(name, tracks))
+    return results
+
+
+def profile_strategies(strategies: List[str], sizes: List[int], seed: int) -> List[Dict]:
+    """Profile the classify and expand phases of each strategy and rank its rules"""
+    results = []
+    for size in sizes:
+        tracks = synthetic_library(size, seed)
+        for name in strategies:
+            organizer = load_strategies()[name]()
+            profiler = Profiler()
+            with contextlib.redirect_stdout(io.StringIO()):
+                with profiler.phase('classify'):
+                    mood_tracks, _ = organizer.classify_all(tracks)
+                with profiler.phase('expand'):
+                    organizer.expand_playlists(mood_tracks, tracks)
+            report = profiler.build_report(organizer, tracks, mood_tracks)
+            print(f"\n{name} ({size} tracks)")
+            print_report(report)
+            results.append(dict(report, strategy=name, tracks=size))
+    return results
+
+
+def bench_scaling(specs: List[str], sizes: List[int], worker_counts: List[int], seed: int) -> List[Dict]:
+    """Time each classifier at each worker count and check results match the serial path"""
+    results = []
+    for size in sizes:
+        tracks = synthetic_library(size, seed)
+        for name in specs:
+            spec = SPECS[name]
+            baseline = None
+            for workers in worker_counts:
+                start = time.perf_counter()
+                result = classify_tracks(spec, tracks, workers)
+                elapsed = time.perf_counter() - start
+                if baseline is None:
+                    baseline = result
+                    baseline_time = elapsed
+                results.append({
+                    'strategy': name,
+                    'tracks': size,
+                    'workers': workers,
+                    'seconds': round(elapsed, 4),
+                    'speedup': round(baseline_time / elapsed, 2) if elapsed else None,
+                    'identical': result == baseline
+                })
+    return results
+
+
+def time_classify(organizer, name: str, tracks: List[Dict]):
+    """Fastest of MATCH_REPEATS serial classifications, and the result; classify
+    alone, without the score() pass the scaling suite also compares"""
+    spec = ClassifierSpec(SPECS[name].organizer_cls, 'classify')
+    best = None
+    for _ in range(MATCH_REPEATS):
+        start = time.perf_counter()
+        result = classify_tracks(spec, tracks, organizer=organizer)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_matching(strategies: List[str], sizes: List[int], seed: int) -> List[Dict]:
+    """Time substring and word matching for each strategy and diff what they classify"""
+    results = []
+    for size in sizes:
+        tracks = synthetic_library(size, seed)
+        for name in strategies:
+            substring = load_strategies()[name]()
+            substring.word_matching = False
+            words = load_strategies()[name]()
+            substring_seconds, substring_result = time_classify(substring, name, tracks)
+            word_seconds, word_result = time_classify(words, name, tracks)
+
+            changed = []
+            for track, before, after in zip(tracks, substring_result.moods, word_result.moods):
+                if before != after:
+                    changed.append({'name': track['name'], 'artist': track['artist'],
+                                    'genre': track['genre'], 'substring': before, 'word': after})
+
+            keywords = []
+            for old, new in zip(profile_rules(substring, tracks), profile_rules(words, tracks)):
+                if old['hits'] != new['hits']:
+                    keywords.append({'mood': old['mood'], 'group': old['group'], 'keyword': old['keyword'],
+                                     'substring_hits': old['hits'], 'word_hits': new['hits']})
+            keywords.sort(key=lambda row: abs(row['substring_hits'] - row['word_hits']), reverse=True)
+
+            results.append({
+                'strategy': name,
+                'tracks': size,
+                'substring_seconds': round(substring_seconds, 4),
+                'word_seconds': round(word_seconds, 4),
+                'speedup': round(substring_seconds / word_seconds, 2) if word_seconds else None,
+                'changed_tracks': len(changed),
+                'changed_keywords': keywords,
+                'examples': changed[:DIFF_ROWS]
+            })
+    return results
+
+
+def print_matching(results: List[Dict]):
+    print("=" * 70)
+    print("Substring vs Word Matching")
+    print("=" * 70)
+    print(f"  {'strategy':22} {'tracks':>7} {'substring':>10} {'word':>8} {'speedup':>8} {'changed':>8}")
+    for row in results:
+        print(f"  {row['strategy']:22} {row['tracks']:7} {row['substring_seconds']:9.3f}s "
+              f"{row['word_seconds']:7.3f}s {'x' + str(row['speedup']):>8} {row['changed_tracks']:8}")
+
+    for row in results:
+        if not row['changed_tracks']:
+            continue
+        print(f"\n  {row['strategy']} ({row['tracks']} tracks):")
+        for kw in row['changed_keywords'][:DIFF_ROWS]:
+            print(f"    {kw['keyword']!r:20} {kw['substring_hits']:6} -> {kw['word_hits']:<6} "
+                  f"{kw['mood']} / {kw['group']}")
+        for track in row['examples']:
+            print(f"    {track['name'][:30]!r:32} {', '.join(track['substring']) or '-'} -> "
+                  f"{', '.join(track['word']) or '-'}")
+    print("=" * 70)
+
+
+def print_phases(results: List[Dict]):
+    print("=" * 70)
+    print("Strategy Phase Timings")
+    print("=" * 70)
+    print(f"  {'strategy':22} {'tracks':>7} {'classify':>9} {'expand':>8} {'write':>8} {'scripts':>8} "
+          f"{'coalesced':>9}")
+    for row in results:
+        print(f"  {row['strategy']:22} {row['tracks']:7} {row['classify_seconds']:8.3f}s "
+              f"{row['expand_seconds']:7.3f}s {row['write_seconds']:7.3f}s {row['write_scripts']:8} "
+              f"{row['coalesced_write_scripts']:9}")
+    print("=" * 70)
+
+
+def print_scaling(results: List[Dict]):
+    print("=" * 70)
+    print("Parallel Classification Scaling")
+    print("=" * 70)
+    for row in results:
+        status = "✓" if row['identical'] else "✗ differs from serial"
+        print(f"  {row['strategy']:22} {row['tracks']:7} tracks {row['workers']:2} workers "
+              f"{row['seconds']:8.3f}s  x{row['speedup']:<5} {status}")
+    print("=" * 70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', choices=['phases', 'scaling', 'profile', 'matching'], default='phases',
+                        help='per-phase timings of every strategy, worker scaling, a profile '
+                             'of each strategy\'s rules, or substring vs word matching (default: phases)')
+    parser.add_argument('--strategy', action='append', choices=sorted(SPECS),
+                        help='strategy to benchmark (repeatable, default: all)')
+    parser.add_argument('--size', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='synthetic library sizes (default: 1000 10000 50000)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='worker counts to time in the scaling suite (default: 1 2 4 8)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    strategies = args.strategy or sorted(SPECS)
+    if args.suite == 'scaling':
+        results = bench_scaling(strategies, args.size, args.workers, args.seed)
+        print_scaling(results)
+    elif args.suite == 'profile':
+        results = profile_strategies(strategies, args.size, args.seed)
+    elif args.suite == 'matching':
+        results = bench_matching(strategies, args.size, args.seed)
+        print_matching(results)
+    else:
+        results = bench_phases(strategies, args.size, args.seed)
+        print_phases(results)
+
+    if args.json:
+        report = {
+            'suite': args.suite,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'results': results
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
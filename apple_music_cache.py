@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Persistent classification cache
+Remembers each track's moods keyed by persistent ID, a hash of the track's
+metadata and a hash of the strategy's rules, so later runs only classify new
+or edited tracks, or everything after a rule change
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from typing import List, Dict, Optional
+
+CACHE_VERSION = 1
+# Shared modules whose code decides what a strategy classifies: scoring hooks,
+# field normalization, tokenizing and word matching
+CLASSIFIER_MODULES = ['apple_music_engine', 'apple_music_library', 'apple_music_normalize',
+                      'apple_music_matcher']
+
+
+def metadata_hash(track: Dict) -> str:
+    """Hash of the fields classifiers read; changes when the track is edited"""
+    text = '\x1f'.join([track.get('name', ''), track.get('artist', ''), track.get('genre', ''),
+                        repr(float(track.get('duration') or 0.0))])
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def rule_set_hash(organizer) -> str:
+    """Hash of a strategy's mood rules, matching mode and classifier source,
+    including the shared modules it classifies through"""
+    categories = organizer.mood_rules()
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(json.dumps(categories, ensure_ascii=False).encode('utf-8'))
+    digest.update(repr(organizer.word_matching).encode('utf-8'))
+    # Scoring logic lives in code too; editing the strategy or a shared module
+    # invalidates its entries
+    sources = [inspect.getsourcefile(type(organizer))]
+    sources += [inspect.getsourcefile(importlib.import_module(name)) for name in CLASSIFIER_MODULES]
+    for source in sources:
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """Moods per track for one strategy and rule set, backed by a JSON file
+
+    The file holds every strategy's section; a section whose rule hash no longer
+    matches is discarded on load. Without a path the cache lives in memory only,
+    as in daemon mode.
+    """
+
+    def __init__(self, path: Optional[str], strategy: str, rules: str):
+        self.path = path
+        self.strategy = strategy
+        self.rules = rules
+        self.hits = 0
+        self.misses = 0
+        self.sections: Dict[str, Dict] = {}
+        self.entries: Dict[str, List] = {}
+        self.seen: Dict[str, List] = {}
+
+        if path and os.path.exists(path):
+            self.sections = self.read_sections(path)
+        section = self.sections.get(strategy)
+        if isinstance(section, dict) and section.get('rules') == rules:
+            self.entries = section.get('entries', {})
+
+    @staticmethod
+    def read_sections(path: str) -> Dict[str, Dict]:
+        """Every strategy's section of a cache file; an unreadable file counts as empty"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable classification cache {path}: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            return {}
+        sections = data.get('strategies')
+        return sections if isinstance(sections, dict) else {}
+
+    @classmethod
+    def for_organizer(cls, path: Optional[str], organizer) -> 'ClassificationCache':
+        return cls(path, organizer.strategy_name, rule_set_hash(organizer))
+
+    def lookup(self, track: Dict) -> Optional[List[str]]:
+        """Cached moods of a track, or None if it is new, edited or has no persistent ID"""
+        persistent_id = track.get('persistent_id')
+        entry = (self.seen.get(persistent_id) or self.entries.get(persistent_id)) if persistent_id else None
+        if entry is not None and entry[0] == metadata_hash(track):
+            self.hits += 1
+            self.seen[persistent_id] = entry
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def store(self, track: Dict, moods: List[str]):
+        persistent_id = track.get('persistent_id')
+        if persistent_id:
+            self.seen[persistent_id] = [metadata_hash(track), list(moods)]
+
+    def forget(self, persistent_ids):
+        """Drop tracks removed from the library"""
+        for persistent_id in persistent_ids:
+            self.seen.pop(persistent_id, None)
+            self.entries.pop(persistent_id, None)
+
+    def save(self):
+        """Write this run's entries; tracks no longer in the library drop out"""
+        if not self.path:
+            return
+        self.sections[self.strategy] = {'rules': self.rules, 'entries': self.seen}
+        data = {'version': CACHE_VERSION, 'strategies': self.sections}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Resumable run checkpoints
+Appends each finished ingest batch, the classification and each written
+playlist to a JSON-lines state file, so an interrupted run can pick up where
+it stopped with --resume
+"""
+
+import hashlib
+import json
+import os
+from typing import List, Dict, Optional, Tuple
+
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT = os.path.expanduser('~/.apple_music_checkpoint.jsonl')
+
+
+def playlist_digest(track_names: List[str]) -> str:
+    """Hash of a playlist's contents; a resumed run only skips identical writes"""
+    return hashlib.blake2b('\x1f'.join(track_names).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class Checkpoint:
+    """Progress of one organize() run, one JSON record per line
+
+    The first line describes the run (strategy, rules, library source); a
+    checkpoint written for anything else is ignored on resume. A record is
+    flushed to disk as soon as its step finishes, and a torn last line from a
+    crash is skipped when reading.
+    """
+
+    def __init__(self, path: str, header: Dict, resume: bool = False):
+        self.path = path
+        self.header = dict(header, version=CHECKPOINT_VERSION)
+        self.track_count: Optional[int] = None
+        self.unaddable: Optional[Dict[str, str]] = None
+        self.batches: Dict[Tuple[int, int], List[Tuple]] = {}
+        self.moods: Optional[List[List[str]]] = None
+        self.written: Dict[str, str] = {}
+        self.resumed = resume and self.load()
+        if not self.resumed:
+            self.reset()
+
+    def load(self) -> bool:
+        """Read a previous checkpoint for the same run; False if there is none"""
+        if not os.path.exists(self.path):
+            print(f"\nNo checkpoint at {self.path}; starting from the beginning.")
+            return False
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+        if not records or records[0] != dict(self.header, type='header'):
+            print(f"\nCheckpoint {self.path} is from a different strategy, rules or library; "
+                  f"starting from the beginning.")
+            return False
+
+        for record in records[1:]:
+            kind = record.get('type')
+            if kind == 'library':
+                self.track_count = record['tracks']
+            elif kind == 'unaddable':
+                self.unaddable = record['tracks']
+            elif kind == 'batch':
+                self.batches[(record['start'], record['end'])] = [tuple(row) for row in record['rows']]
+            elif kind == 'classified':
+                self.moods = record['moods']
+            elif kind == 'written':
+                self.written[record['playlist']] = record['digest']
+        print(f"\nResuming from {self.path}: {len(self.batches)} ingest batches, "
+              f"{'classification, ' if self.moods is not None else ''}{len(self.written)} playlists done")
+        return True
+
+    def reset(self):
+        """Start an empty checkpoint"""
+        self.track_count = None
+        self.unaddable = None
+        self.batches = {}
+        self.moods = None
+        self.written = {}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(dict(self.header, type='header'), ensure_ascii=False) + '\n')
+
+    def append(self, record: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Ingest -------------------------------------------------------------
+
+    def check_library(self, track_count: int):
+        """Batches are by library position; they only carry over if the count still matches"""
+        if self.track_count is not None and self.track_count != track_count:
+            print(f"  Library changed since the checkpoint ({self.track_count} -> {track_count} tracks); "
+                  f"reading it again.")
+            self.reset()
+        if self.track_count is None:
+            self.track_count = track_count
+            self.append({'type': 'library', 'tracks': track_count})
+
+    def record_unaddable(self, unaddable: Dict[str, str]):
+        self.unaddable = unaddable
+        self.append({'type': 'unaddable', 'tracks': unaddable})
+
+    def batch(self, start_idx: int, end_idx: int) -> Optional[List[Tuple]]:
+        return self.batches.get((start_idx, end_idx))
+
+    def record_batch(self, start_idx: int, end_idx: int, rows: List[Tuple]):
+        self.batches[(start_idx, end_idx)] = rows
+        self.append({'type': 'batch', 'start': start_idx, 'end': end_idx, 'rows': rows})
+
+    # Classification -----------------------------------------------------
+
+    def classified(self, track_count: int) -> Optional[List[List[str]]]:
+        """Saved moods, if they were computed for this many tracks"""
+        if self.moods is not None and len(self.moods) == track_count:
+            return self.moods
+        return None
+
+    def record_classified(self, moods: List[List[str]]):
+        self.moods = moods
+        self.append({'type': 'classified', 'moods': moods})
+
+    # Playlist writes ----------------------------------------------------
+
+    def is_written(self, playlist_name: str, track_names: List[str]) -> bool:
+        return self.written.get(playlist_name) == playlist_digest(track_names)
+
+    def record_written(self, playlist_name: str, track_names: List[str]):
+        digest = playlist_digest(track_names)
+        self.written[playlist_name] = digest
+        self.append({'type': 'written', 'playlist': playlist_name, 'digest': digest})
+
+    def finish(self):
+        """The run completed; nothing is left to resume"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Apple Music organizer daemon
+Keeps the library, its classifications and the written playlists in memory,
+polls Music.app cheaply for changes and applies them incrementally; a local
+socket accepts sync, status and stop commands and batched mood queries
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Dict, Tuple, Optional, Union
+
+from apple_music_api import MoodIndex, QUERY_OPS, DEFAULT_PAGE_SIZE
+from apple_music_cache import ClassificationCache
+from apple_music_dedup import collapse_duplicates
+from apple_music_library import load_snapshot, addable_tracks
+from apple_music_rules import file_hash
+
+DEFAULT_SOCKET = os.path.expanduser('~/.apple_music_organizer.sock')
+# Seconds between library polls; a sync command polls at once
+POLL_SECONDS = 30.0
+COMMANDS = ('sync', 'status', 'stop')
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """A connection carries any number of requests, one per line, each answered
+    with one JSON line: a bare command ("status"), a JSON request object, or a
+    JSON array of them answered with an array"""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line) if line[:1] in (b'{', b'[') else {'op': line.decode('utf-8')}
+            except ValueError as e:
+                reply = {'error': f"bad request: {e}"}
+            else:
+                reply = self.server.library_daemon.handle_request(request)
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+class LibraryDaemon:
+    """Runs one organizer continuously, updating only what the library changes touch"""
+
+    def __init__(self, organizer, options, workers: int = 1, socket_path: str = DEFAULT_SOCKET,
+                 poll_seconds: float = POLL_SECONDS):
+        self.organizer = organizer
+        self.options = options
+        self.workers = workers
+        self.socket_path = socket_path
+        self.poll_seconds = poll_seconds
+        # Every loaded track by persistent ID, in library order
+        self.rows: Dict[str, Dict] = {}
+        # Library signature at the last sync, and at the one before
+        self.signature = None
+        self.previous = None
+        self.syncs = 0
+        self.last_sync: Optional[Dict] = None
+        # Index the query API reads; replaced whole after every change
+        self.index: Optional[MoodIndex] = None
+        # Syncs come from the poll loop and from sync commands; one at a time
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    # Library changes ----------------------------------------------------
+
+    def read_signature(self) -> Tuple:
+        """Cheap fingerprint that changes whenever the library does"""
+        if self.options.snapshot:
+            stat = os.stat(self.options.snapshot)
+            return stat.st_mtime_ns, stat.st_size
+        return self.organizer.music.library_signature()
+
+    def read_changes(self) -> Tuple[List[Dict], List[str]]:
+        """Tracks added or edited since the last sync, and persistent IDs removed"""
+        if self.options.snapshot:
+            return self.read_snapshot_changes()
+
+        music = self.organizer.music
+        count, _ = self.signature
+        self.organizer.library.unaddable = music.unaddable_tracks()
+        # Edited tracks replace their rows, so the table holds each track once
+        changed = self.organizer.library.update(music.fetch_modified_since(self.previous[1]))
+        added = sum(1 for row in changed if row['persistent_id'] not in self.rows)
+        removed = []
+        if len(self.rows) + added != count:
+            current = set(music.persistent_ids())
+            removed = [pid for pid in self.rows if pid not in current]
+            self.organizer.library.remove(removed)
+        return changed, removed
+
+    def read_snapshot_changes(self) -> Tuple[List[Dict], List[str]]:
+        """Diff a rewritten snapshot against the tracks in memory"""
+        self.organizer.library = load_snapshot(self.options.snapshot)
+        fields = ('name', 'artist', 'genre', 'duration', 'status')
+        changed = []
+        current = set()
+        for row in self.organizer.library.rows():
+            current.add(row['persistent_id'])
+            known = self.rows.get(row['persistent_id'])
+            if known is None or any(known[f] != row[f] for f in fields):
+                changed.append(row)
+        removed = [pid for pid in self.rows if pid not in current]
+        return changed, removed
+
+    def sync(self) -> Dict:
+        """Poll the library and apply any changes: reclassify changed tracks and
+        rewrite only the playlists whose tracks changed"""
+        with self.lock:
+            summary = self.apply_changes()
+            if self.options.watch_rules and self.organizer.check_rules(self.options, self.workers):
+                self.index = MoodIndex.from_organizer(self.organizer)
+        return summary
+
+    def apply_changes(self) -> Dict:
+        organizer = self.organizer
+        start = time.perf_counter()
+        with organizer.instrumentation.phase('poll'):
+            signature = self.read_signature()
+        if signature == self.signature:
+            return {'changed': False, 'seconds': round(time.perf_counter() - start, 4)}
+
+        self.previous, self.signature = self.signature, signature
+        with organizer.instrumentation.phase('ingest'):
+            changed, removed = self.read_changes()
+        for row in changed:
+            self.rows[row['persistent_id']] = row
+        for pid in removed:
+            del self.rows[pid]
+        organizer.cache.forget(removed)
+        summary = {'changed': bool(changed or removed), 'updated': len(changed), 'removed': len(removed)}
+        if not summary['changed']:
+            summary['seconds'] = round(time.perf_counter() - start, 4)
+            return summary
+
+        tracks, _ = addable_tracks(self.rows.values())
+        organizer.duplicates = []
+        if not self.options.keep_duplicates:
+            with organizer.instrumentation.phase('dedup'):
+                tracks, organizer.duplicates = collapse_duplicates(tracks)
+        cache = organizer.cache
+        cache.hits = cache.misses = 0
+        with organizer.instrumentation.phase('classify'):
+            organizer.track_moods = organizer.classify_moods(tracks, self.workers, cache)
+        organizer.tracks = tracks
+        cache.save()
+        print(f"\n🔄 Library changed: {len(changed)} tracks added or edited, {len(removed)} removed; "
+              f"reclassified {cache.misses}")
+        organizer.publish(self.options)
+        self.index = MoodIndex.from_organizer(organizer)
+
+        self.syncs += 1
+        summary['reclassified'] = cache.misses
+        summary['seconds'] = round(time.perf_counter() - start, 4)
+        self.last_sync = summary
+        return summary
+
+    # Commands -----------------------------------------------------------
+
+    def status(self) -> Dict:
+        organizer = self.organizer
+        playlists = organizer.final_playlists or {}
+        return {
+            'strategy': organizer.strategy_name,
+            'tracks': len(self.rows),
+            'classified': len(organizer.tracks),
+            'syncs': self.syncs,
+            'last_sync': self.last_sync,
+            'playlists': {name: len(tracks) for name, tracks in playlists.items()}
+        }
+
+    def handle_request(self, request: Union[Dict, List]) -> Union[Dict, List]:
+        """Answer a command or query, or a batch of them"""
+        if isinstance(request, list):
+            return [self.handle_request(item) for item in request]
+        if not isinstance(request, dict):
+            return {'error': 'a request is a JSON object or an array of them'}
+        op = request.get('op')
+        if op in QUERY_OPS:
+            return self.index.answer(request)
+        if op == 'sync':
+            return self.sync()
+        if op == 'status':
+            return self.status()
+        if op == 'stop':
+            self.stopped.set()
+            return {'stopping': True}
+        return {'error': f"unknown op {op!r}; expected one of {', '.join(COMMANDS + QUERY_OPS)}"}
+
+    # Main loop ----------------------------------------------------------
+
+    def start(self) -> bool:
+        """Full first run; later syncs only touch what changed"""
+        organizer = self.organizer
+        if organizer.cache is None and not self.options.cache:
+            organizer.cache = ClassificationCache.for_organizer(None, organizer)
+        # Read before loading so edits made during the load are picked up by the first sync
+        if not self.options.snapshot and not organizer.wait_for_music():
+            return False
+        signature = self.read_signature()
+        organizer.organize(workers=self.workers, options=self.options)
+        if organizer.final_playlists is None:
+            return False
+        self.rows = {row['persistent_id']: row for row in organizer.library.rows()}
+        self.signature = signature
+        self.index = MoodIndex.from_organizer(organizer)
+        if self.options.rules:
+            organizer.rules_hash = organizer.rules_hash or file_hash(self.options.rules)
+        return True
+
+    def run(self):
+        if not self.start():
+            return
+        if os.path.exists(self.socket_path):
+            try:
+                send_command('status', self.socket_path)
+                print(f"❌ Another daemon is already listening on {self.socket_path}")
+                return
+            except OSError:
+                os.unlink(self.socket_path)
+
+        # Each connection gets a thread so queries never wait behind a poll
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, RequestHandler)
+        server.daemon_threads = True
+        server.library_daemon = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"\n👀 Watching the library every {self.poll_seconds:g}s; "
+              f"requests on {self.socket_path} (Ctrl-C to stop)...")
+        try:
+            while not self.stopped.wait(self.poll_seconds):
+                self.sync()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        print("\nStopped daemon.")
+
+
+class DaemonClient:
+    """Connection to a running daemon, reused across requests"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.replies = self.socket.makefile('rb')
+
+    def request(self, request: Union[Dict, List]) -> Union[Dict, List]:
+        """Send a command, query or batch of them and wait for the reply"""
+        self.socket.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        line = self.replies.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.replies.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_command(command: str, socket_path: str = DEFAULT_SOCKET) -> Dict:
+    """Send one command to a running daemon and return its reply"""
+    with DaemonClient(socket_path) as client:
+        return client.request({'op': command})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=COMMANDS + QUERY_OPS,
+                        help='daemon command, or query: moods ID..., tracks MOOD, summary')
+    parser.add_argument('values', nargs='*', metavar='VALUE',
+                        help='persistent IDs for moods, a mood name for tracks')
+    parser.add_argument('--limit', type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f'tracks per page (default: {DEFAULT_PAGE_SIZE})')
+    parser.add_argument('--offset', type=int, default=0, help='first track of the page')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, metavar='PATH',
+                        help=f'daemon command socket (default: {DEFAULT_SOCKET})')
+    args = parser.parse_args()
+
+    request = {'op': args.command}
+    if args.command == 'moods':
+        request['ids'] = args.values
+    elif args.command == 'tracks':
+        if len(args.values) != 1:
+            parser.error('tracks needs one mood name')
+        request.update(mood=args.values[0], limit=args.limit, offset=args.offset)
+    try:
+        with DaemonClient(args.socket) as client:
+            reply = client.request(request)
+    except OSError as e:
+        parser.exit(1, f"No daemon on {args.socket}: {e}\n")
+    print(json.dumps(reply, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
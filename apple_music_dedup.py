@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Duplicate track detection
+Clusters copies of the same song (re-imports, remasters, compilation copies)
+by normalized title, artist and duration so each song is classified once
+"""
+
+from typing import List, Dict, Tuple
+
+from apple_music_library import title_tokens
+from apple_music_normalize import normalize_text, tokenize
+
+# Copies whose durations differ by at most this many seconds are the same recording
+DURATION_TOLERANCE = 2.0
+
+
+def block_key(track: Dict) -> Tuple[str, str]:
+    """Tracks can only be duplicates if they share this key: canonical title and
+    artist words, ignoring punctuation"""
+    artist = track.get('artist_lower')
+    if artist is None:
+        artist = normalize_text(track.get('artist', ''))
+    return ' '.join(title_tokens(track)), ' '.join(tokenize(artist))
+
+
+def cluster_duplicates(tracks: List[Dict]) -> List[List[Dict]]:
+    """Group tracks into clusters of copies, each in library order, ordered by first copy
+
+    Tracks are bucketed by block_key in one hashing pass; only tracks in the same
+    bucket have their durations compared, chaining copies within DURATION_TOLERANCE.
+    A track with no duration joins the first cluster of its bucket.
+    """
+    blocks: Dict[Tuple[str, str], List[int]] = {}
+    for idx, track in enumerate(tracks):
+        blocks.setdefault(block_key(track), []).append(idx)
+
+    clusters: List[List[int]] = []
+    for indices in blocks.values():
+        if len(indices) == 1:
+            clusters.append(indices)
+            continue
+
+        timed = sorted((i for i in indices if tracks[i].get('duration')),
+                       key=lambda i: tracks[i]['duration'])
+        untimed = [i for i in indices if not tracks[i].get('duration')]
+        block_clusters = []
+        previous = None
+        for i in timed:
+            duration = tracks[i]['duration']
+            if previous is None or duration - previous > DURATION_TOLERANCE:
+                block_clusters.append([])
+            block_clusters[-1].append(i)
+            previous = duration
+        if untimed:
+            if not block_clusters:
+                block_clusters.append([])
+            block_clusters[0].extend(untimed)
+
+        for members in block_clusters:
+            members.sort()
+            clusters.append(members)
+
+    clusters.sort(key=lambda members: members[0])
+    return [[tracks[i] for i in members] for members in clusters]
+
+
+def collapse_duplicates(tracks: List[Dict]) -> Tuple[List[Dict], List[List[Dict]]]:
+    """One representative (the first copy in library order) per cluster, plus the
+    clusters that had more than one copy"""
+    clusters = cluster_duplicates(tracks)
+    representatives = [members[0] for members in clusters]
+    duplicates = [members for members in clusters if len(members) > 1]
+    return representatives, duplicates
@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+"""
+Apple Music Mood Organizer Engine
+One ingestion, classification and playlist-writing pipeline shared by every
+classifier strategy; the apple_music_*.py organizers plug in as strategies
+"""
+
+import argparse
+import importlib
+import os
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import List, Dict, Tuple
+
+from apple_music_automation import (AppleScriptRunner, MusicApp, MusicLaunch, FetchStats,
+                                    FETCH_BATCH_SIZE, LAUNCH_TIMEOUT)
+from apple_music_cache import ClassificationCache, rule_set_hash
+from apple_music_checkpoint import Checkpoint, DEFAULT_CHECKPOINT
+from apple_music_daemon import LibraryDaemon, DEFAULT_SOCKET, POLL_SECONDS
+from apple_music_dedup import collapse_duplicates
+from apple_music_export import PlaylistExporter, EXPORT_FORMATS
+from apple_music_instrumentation import Instrumentation, TRACE_FORMATS
+from apple_music_journal import PlaylistJournal, DEFAULT_JOURNAL
+from apple_music_library import (TrackTable, load_snapshot, save_snapshot, lowered_fields, title_tokens,
+                                 addable_tracks)
+from apple_music_matcher import title_terms, field_terms, text_terms
+from apple_music_parallel import ClassifierSpec, classify_tracks
+from apple_music_plan import PLAN_FORMATS, build_plan, write_plan
+from apple_music_profile import Profiler, print_report, write_report
+from apple_music_progress import Progress, PROGRESS_INTERVAL_MS
+from apple_music_rules import load_rules, dump_rules, file_hash, changed_keywords
+from apple_music_smart import smart_playlists, write_smart_playlists, describe
+from apple_music_writeplan import WritePlan
+
+# Modules whose organizers register themselves as strategies on import
+BUILTIN_STRATEGY_MODULES = [
+    'apple_music_advanced',
+    'apple_music_custom_playlists',
+    'apple_music_expanded_playlists',
+    'apple_music_fixed',
+    'apple_music_mood_organizer',
+    'apple_music_properly_researched',
+    'apple_music_research_based',
+    'apple_music_researched_playlists',
+    'apple_music_smart_research',
+    'apple_music_web_research',
+    'apple_music_web_research_final',
+    'apple_music_web_researched',
+]
+
+DEFAULT_STRATEGY = 'advanced'
+
+# Seconds between checks of a watched rules file
+RULE_POLL_SECONDS = 1.0
+
+STRATEGIES: Dict[str, type] = {}
+
+
+def register_strategy(name: str):
+    """Class decorator adding an organizer to the strategy registry"""
+    def decorator(cls):
+        cls.strategy_name = name
+        STRATEGIES[name] = cls
+        return cls
+    return decorator
+
+
+def load_strategies() -> Dict[str, type]:
+    """Import the built-in strategy modules and return the registry"""
+    for module in BUILTIN_STRATEGY_MODULES:
+        importlib.import_module(module)
+    return STRATEGIES
+
+
+class RunOptions:
+    """Optional behaviour of one organize() run"""
+
+    def __init__(self, profiler: Profiler = None, snapshot: str = None, save_snapshot: str = None,
+                 plan: str = None, plan_format: str = None, keep_duplicates: bool = False,
+                 cache: str = None, rules: str = None, watch_rules: bool = False,
+                 checkpoint: str = None, resume: bool = False, journal: str = None,
+                 export: str = None, export_format: str = 'm3u8', export_only: bool = False,
+                 coalesce_writes: bool = False, smart_playlists: str = None):
+        # Profile the classify and expand phases
+        self.profiler = profiler
+        # Read the library from this snapshot instead of Music.app
+        self.snapshot = snapshot
+        # Write the loaded library to this snapshot
+        self.save_snapshot = save_snapshot
+        # Write the intended playlists here instead of creating them
+        self.plan = plan
+        self.plan_format = plan_format
+        # Classify every copy of a song instead of one per duplicate cluster
+        self.keep_duplicates = keep_duplicates
+        # Reuse classifications stored in this file and update it
+        self.cache = cache
+        # Mood rules file replacing the strategy's built-in rules
+        self.rules = rules
+        # Keep running and rescore whenever the rules file changes
+        self.watch_rules = watch_rules
+        # Record progress in this file, and continue from it instead of starting over
+        self.checkpoint = checkpoint
+        self.resume = resume
+        # Journal playlist writes here so a failed or interrupted one can be undone
+        self.journal = journal
+        # Write playlists as files in this directory and import each in one command,
+        # or only write the files
+        self.export = export
+        self.export_format = export_format
+        self.export_only = export_only
+        # Write every playlist of the run in as few scripts as the payload allows
+        self.coalesce_writes = coalesce_writes
+        # Describe moods that reduce to genre criteria as smart playlists in this
+        # file and skip writing them
+        self.smart_playlists = smart_playlists
+
+
+class MoodOrganizer:
+    """Base organizer: subclasses supply mood rules, a classifier and an expansion policy"""
+
+    strategy_name = ''
+    title = 'Apple Music Mood Organizer'
+
+    # Cap each playlist at this many tracks (None keeps every match)
+    playlist_size = None
+    # Split playlists larger than this into numbered parts (None never splits)
+    split_size = None
+    part_name = "{mood} Part {part}"
+    # Ask before touching Music.app
+    confirm_before_write = False
+    # Match keywords against whole words and phrases of the canonical fields;
+    # False restores raw substring matching
+    word_matching = True
+
+    def __init__(self):
+        self.instrumentation = Instrumentation()
+        self.runner = AppleScriptRunner(instrumentation=self.instrumentation)
+        self.library = TrackTable()
+        self.profile_report = None
+        # Rules set with set_rules(), passed on to worker processes
+        self.loaded_rules = None
+        # Classification state kept for rescoring after a rule change
+        self.tracks: List[Dict] = []
+        self.track_moods: List[List[str]] = []
+        # Duplicate clusters collapsed before classification, representative first
+        self.duplicates: List[List[Dict]] = []
+        self.cache = None
+        self.final_playlists = None
+        # Moods with a playlist (or part) the last write_playlists() failed to write
+        self.failed_moods = set()
+        # Hash of the rules file as last loaded, for check_rules()
+        self.rules_hash = None
+        # Progress of the current organize() run, when checkpointing
+        self.checkpoint = None
+        # Write-ahead journal of playlist writes
+        self.journal = None
+        # Music.app readiness probe running in the background
+        self.launch = None
+        # Throttled status line (or log lines off a terminal) for long phases
+        self.progress = Progress()
+        # Writes playlists through M3U8/XSPF files when exporting
+        self.exporter = None
+        # Plan all playlist writes into a few scripts instead of one playlist at a time
+        self.coalesce_writes = False
+
+    # Music.app access ---------------------------------------------------
+
+    @property
+    def music(self) -> MusicApp:
+        return MusicApp(self.runner, self.journal)
+
+    def get_all_tracks(self) -> List[Dict]:
+        """Get all tracks with full information"""
+        music = self.music
+        track_count = music.track_count()
+        self.library = TrackTable()
+        all_tracks = []
+        stats = FetchStats()
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            checkpoint.check_library(track_count)
+
+        # Mark tracks playlists cannot take before their rows are built
+        unaddable = checkpoint.unaddable if checkpoint is not None else None
+        if unaddable is None:
+            unaddable = music.unaddable_tracks()
+            if checkpoint is not None:
+                checkpoint.record_unaddable(unaddable)
+        self.library.unaddable = unaddable
+
+        with self.progress.phase('ingest', track_count) as progress:
+            for i in range(1, track_count + 1, FETCH_BATCH_SIZE):
+                end_idx = min(i + FETCH_BATCH_SIZE - 1, track_count)
+                retried, skipped = stats.retried, stats.skipped
+                rows = checkpoint.batch(i, end_idx) if checkpoint is not None else None
+                resumed = rows is not None
+                if rows is None:
+                    rows = music.fetch_range(i, end_idx, stats)
+                    if checkpoint is not None:
+                        checkpoint.record_batch(i, end_idx, rows)
+                all_tracks.extend(self.library.extend(rows))
+                progress.update(end_idx - i + 1, resumed=len(rows) if resumed else 0,
+                                retried=stats.retried - retried, skipped=stats.skipped - skipped)
+
+        self.instrumentation.count('fetch_retried', stats.retried)
+        self.instrumentation.count('fetch_bisected', stats.bisected)
+        self.instrumentation.count('fetch_skipped', stats.skipped)
+        if stats.retried:
+            print(f"  Retried {stats.retried} ranges after failed fetches ({stats.bisected} split in two)")
+        if stats.skipped:
+            shown = ', '.join(f"#{idx}" for idx in stats.skipped_tracks[:10])
+            more = f" and {stats.skipped - 10} more" if stats.skipped > 10 else ""
+            print(f"  ✗ Skipped {stats.skipped} tracks Music.app could not read: {shown}{more}")
+        return all_tracks
+
+    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
+        """Create playlist by adding tracks, or through a playlist file when exporting"""
+        if self.exporter is not None:
+            return self.exporter.write(self.music, playlist_name, track_names)
+        return self.music.create_playlist(playlist_name, track_names)
+
+    # Strategy hooks -----------------------------------------------------
+
+    def mood_rules(self) -> Dict:
+        """The strategy's mood dictionary (mood_categories or mood_keywords)"""
+        return getattr(self, 'mood_categories', None) or self.mood_keywords
+
+    def set_rules(self, categories: Dict):
+        """Replace the mood dictionary and drop memo tables built from the old one"""
+        if getattr(self, 'mood_categories', None):
+            self.mood_categories = categories
+        else:
+            self.mood_keywords = categories
+        self.loaded_rules = categories
+        for name, value in vars(self).items():
+            if hasattr(value, 'cache_clear'):
+                value.cache_clear()
+            elif name.endswith('_cache') and isinstance(value, dict):
+                value.clear()
+
+    def moods(self) -> List[str]:
+        """Playlist moods in display and creation order"""
+        return list(self.mood_rules())
+
+    def rules(self) -> List[Tuple[str, str, str]]:
+        """Mood rules flattened into (mood, group, keyword) triples"""
+        rules = []
+        for mood, criteria in self.mood_rules().items():
+            if isinstance(criteria, dict):
+                groups = [(group, values) for group, values in criteria.items() if isinstance(values, list)]
+            else:
+                groups = [('keywords', criteria)]
+            for group, keywords in groups:
+                for keyword in keywords:
+                    rules.append((mood, group, keyword))
+        return rules
+
+    def match_fields(self, track: Dict) -> Tuple:
+        """(name, artist, genre) in the form `keyword in field` checks run against:
+        word and phrase sets, or lowercased strings without word_matching"""
+        name, artist, genre = lowered_fields(track)
+        if not self.word_matching:
+            return name, artist, genre
+        return title_terms(track), field_terms(artist), field_terms(genre)
+
+    def match_text(self, text: str):
+        """Free text (research notes, lyrics) in the form match_fields() returns"""
+        if not self.word_matching:
+            return text.lower()
+        return text_terms(text)
+
+    def has_any(self, field, keywords: List[str]) -> bool:
+        """Whether any keyword occurs in a match_fields() value"""
+        if not self.word_matching:
+            return any(keyword in field for keyword in keywords)
+        return not field.isdisjoint(keywords)
+
+    def title_words(self, track: Dict) -> Tuple[str, ...]:
+        """Words of the title in order, for per-word scoring"""
+        if not self.word_matching:
+            return tuple(lowered_fields(track)[0].split())
+        return title_tokens(track)
+
+    def combine(self, *fields):
+        """Join match_fields() values into one text keywords can be checked against"""
+        if not self.word_matching:
+            return ' '.join(fields)
+        return frozenset().union(*fields)
+
+    def classify(self, track: Dict) -> List[str]:
+        """Moods a track belongs to"""
+        raise NotImplementedError
+
+    def score(self, track: Dict) -> Dict[str, float]:
+        """Per-mood scores behind classify(), for strategies that compute them"""
+        return {}
+
+    def expand_playlists(self, mood_tracks: Dict[str, List[Dict]],
+                         all_tracks: List[Dict]) -> Dict[str, List[str]]:
+        """Turn classified tracks into the final track names per playlist"""
+        final_playlists = {}
+        for mood in self.moods():
+            track_names = [t['name'] for t in mood_tracks.get(mood, [])]
+            if self.playlist_size is not None:
+                track_names = track_names[:self.playlist_size]
+            final_playlists[mood] = track_names
+        return final_playlists
+
+    # Pipeline -----------------------------------------------------------
+
+    def classify_moods(self, tracks: List[Dict], workers: int = 1,
+                       cache: ClassificationCache = None) -> List[List[str]]:
+        """Moods of each track, in order
+
+        With a cache, only tracks it has no current entry for are classified.
+        """
+        spec = ClassifierSpec(type(self), 'classify', rules=self.loaded_rules)
+        if cache is None:
+            return classify_tracks(spec, tracks, workers, organizer=self, progress=self.progress).moods
+
+        all_moods = [cache.lookup(track) for track in tracks]
+        stale = [idx for idx, moods in enumerate(all_moods) if moods is None]
+        if stale:
+            fresh = classify_tracks(spec, [tracks[idx] for idx in stale], workers, organizer=self,
+                                    progress=self.progress)
+            for idx, moods in zip(stale, fresh.moods):
+                all_moods[idx] = moods
+                cache.store(tracks[idx], moods)
+        return all_moods
+
+    def group_by_mood(self, all_tracks: List[Dict],
+                      all_moods: List[List[str]]) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+        """Tracks per mood and the unclassified ones"""
+        mood_tracks = defaultdict(list)
+        unclassified = []
+        for track, moods in zip(all_tracks, all_moods):
+            if moods:
+                for mood in moods:
+                    mood_tracks[mood].append(track)
+            else:
+                unclassified.append(track)
+        return mood_tracks, unclassified
+
+    def classify_all(self, all_tracks: List[Dict], workers: int = 1,
+                     cache: ClassificationCache = None) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+        """Classify every track, returning tracks per mood and the unclassified ones"""
+        return self.group_by_mood(all_tracks, self.classify_moods(all_tracks, workers, cache))
+
+    def playlist_parts(self, mood: str, track_names: List[str]) -> List[Tuple[str, List[str]]]:
+        """Split one playlist into (name, tracks) parts according to split_size"""
+        if self.split_size is None or len(track_names) <= self.split_size:
+            return [(mood, track_names)]
+        parts = []
+        for part, i in enumerate(range(0, len(track_names), self.split_size), 1):
+            name = mood if part == 1 else self.part_name.format(mood=mood, part=part)
+            parts.append((name, track_names[i:i + self.split_size]))
+        return parts
+
+    def write_playlists(self, final_playlists: Dict[str, List[str]], moods: List[str] = None) -> int:
+        """Create every playlist (or those of the given moods) in Music.app and return
+        how many succeeded; moods with a failed playlist are left in failed_moods"""
+        created = 0
+        planned = []
+        self.failed_moods = set()
+        for mood in moods if moods is not None else self.moods():
+            track_list = final_playlists.get(mood, [])
+            if not track_list:
+                print(f"  '{mood}' playlist (0 tracks)... (skipped)")
+                continue
+            for name, part_tracks in self.playlist_parts(mood, track_list):
+                if self.checkpoint is not None and self.checkpoint.is_written(name, part_tracks):
+                    print(f"  Creating '{name}' playlist ({len(part_tracks)} tracks)... ✓ (already written)")
+                    created += 1
+                elif self.coalesce_writes and self.exporter is None:
+                    planned.append((mood, name, part_tracks))
+                else:
+                    print(f"  Creating '{name}' playlist ({len(part_tracks)} tracks)...", end=' ')
+                    if self.create_playlist(name, part_tracks):
+                        print("✓")
+                        created += 1
+                        self.record_written(name, part_tracks)
+                    else:
+                        print("✗")
+                        self.failed_moods.add(mood)
+        if planned:
+            created += self.write_planned(planned)
+        return created
+
+    def write_planned(self, planned: List[Tuple[str, str, List[str]]]) -> int:
+        """Write (mood, playlist, tracks) entries through a coalesced WritePlan and
+        return how many succeeded"""
+        playlists = [(name, part_tracks) for _, name, part_tracks in planned]
+        plan = WritePlan(playlists)
+        journaled = self.journal is not None
+        trips, baseline = plan.round_trips(journaled), plan.baseline_round_trips(journaled)
+        print(f"  Writing {len(playlists)} playlists in {trips} scripts "
+              f"(one playlist at a time: {baseline})...")
+        self.instrumentation.count('write_round_trips', trips)
+        self.instrumentation.count('write_round_trips_saved', baseline - trips)
+        results = self.music.write_plan(plan)
+        created = 0
+        for mood, name, part_tracks in planned:
+            if results[name]:
+                print(f"  '{name}' playlist ({len(part_tracks)} tracks)... ✓")
+                created += 1
+                self.record_written(name, part_tracks)
+            else:
+                print(f"  '{name}' playlist ({len(part_tracks)} tracks)... ✗")
+                self.failed_moods.add(mood)
+        return created
+
+    def record_written(self, name: str, track_names: List[str]):
+        if self.checkpoint is not None:
+            self.checkpoint.record_written(name, track_names)
+
+    def print_summary(self, heading: str, counts: Dict[str, int], extra: Dict[str, int] = None):
+        print("\n" + "=" * 70)
+        print(heading)
+        print("=" * 70)
+        for mood in self.moods():
+            print(f"  {mood:25} {counts.get(mood, 0):5} tracks")
+        for label, count in (extra or {}).items():
+            print(f"  {label:25} {count:5} tracks")
+        print("=" * 70)
+
+    def load_tracks(self, options: RunOptions) -> List[Dict]:
+        """Read the library from a snapshot or from Music.app"""
+        if options.snapshot:
+            print(f"\nLoading library snapshot {options.snapshot}...")
+            self.library = load_snapshot(options.snapshot)
+            all_tracks = self.library.rows()
+        else:
+            print("\nLoading your entire library...")
+            all_tracks = self.get_all_tracks()
+
+        if options.save_snapshot:
+            save_snapshot(self.library, options.save_snapshot)
+            print(f"\nSaved library snapshot to {options.save_snapshot}")
+        return all_tracks
+
+    def organize(self, workers: int = 1, options: RunOptions = None):
+        """Main organization function"""
+        options = options or RunOptions()
+        profiler = options.profiler
+        if profiler is not None and workers > 1:
+            # cProfile only sees this process
+            print("Profiling classifies serially; ignoring --workers.")
+            workers = 1
+        profiled = profiler.phase if profiler is not None else lambda name: nullcontext()
+
+        print("=" * 70)
+        print(self.title)
+        print("=" * 70)
+        print("\nPlaylists to create:")
+        for mood in self.moods():
+            print(f"  • {mood}")
+        print("=" * 70)
+
+        # Bring up Music.app in the background; local setup runs while it starts
+        if self.launch is None and not (options.snapshot and options.plan):
+            self.launch = MusicLaunch(self.music).start()
+        if not options.plan:
+            self.music.prepare_writes()
+        if options.journal and not options.plan:
+            self.journal = PlaylistJournal(options.journal)
+        if options.checkpoint:
+            self.checkpoint = Checkpoint(options.checkpoint, self.checkpoint_header(options), options.resume)
+        if options.cache:
+            self.cache = ClassificationCache.for_organizer(options.cache, self)
+
+        if self.journal is not None and self.journal.pending():
+            if not self.wait_for_music():
+                return
+            self.recover_playlists()
+
+        # Get all tracks
+        if not options.snapshot and not self.wait_for_music():
+            return
+        with self.instrumentation.phase('ingest'):
+            all_tracks = self.load_tracks(options)
+
+        if not all_tracks:
+            print("❌ No tracks found in your library.")
+            return
+
+        print(f"\nLoaded {len(all_tracks)} tracks")
+
+        # Shared, streaming and vanished cloud tracks would only fail to be added
+        all_tracks, skipped = addable_tracks(all_tracks)
+        if skipped:
+            reasons = ', '.join(f"{count} {reason}" for reason, count in skipped.items())
+            print(f"  Leaving out {sum(skipped.values())} tracks that cannot be added to playlists "
+                  f"({reasons})")
+
+        # Collapse copies of the same song; playlists are filled by name, so
+        # every copy would resolve to the same track anyway
+        if not options.keep_duplicates:
+            with self.instrumentation.phase('dedup'):
+                all_tracks, duplicates = collapse_duplicates(all_tracks)
+            self.duplicates = duplicates
+            if duplicates:
+                copies = sum(len(members) - 1 for members in duplicates)
+                print(f"  Collapsed {copies} duplicate copies of {len(duplicates)} songs; "
+                      f"classifying {len(all_tracks)} tracks")
+
+        # Classify each track
+        print("\nClassifying each song...")
+        if workers > 1:
+            print(f"  (across {workers} worker processes)")
+        cache = self.cache
+        resumed = self.checkpoint.classified(len(all_tracks)) if self.checkpoint is not None else None
+        if resumed is not None:
+            self.track_moods = resumed
+        else:
+            with self.instrumentation.phase('classify'), profiled('classify'):
+                self.track_moods = self.classify_moods(all_tracks, workers, cache)
+            if self.checkpoint is not None:
+                self.checkpoint.record_classified(self.track_moods)
+        self.tracks = all_tracks
+        if resumed is not None:
+            print(f"  Resumed {len(all_tracks)} classifications from the checkpoint")
+        elif cache is not None:
+            cache.save()
+            print(f"  Reused {cache.hits} cached classifications, classified {cache.misses} "
+                  f"new or changed tracks")
+        else:
+            print(f"  Classified {len(all_tracks)} tracks")
+
+        self.publish(options, profiled, confirm=self.confirm_before_write)
+        if self.checkpoint is not None and self.final_playlists is not None and not self.failed_moods:
+            self.checkpoint.finish()
+        self.checkpoint = None
+
+    def wait_for_music(self) -> bool:
+        """Wait for Music.app to answer, starting the probe if organize() has not
+
+        Each probe answers one wait: Music.app may quit between a run's reads and
+        writes or between daemon syncs, so the next wait probes again.
+        """
+        if self.launch is None:
+            self.launch = MusicLaunch(self.music).start()
+        with self.instrumentation.phase('launch'):
+            ready = self.launch.wait()
+        self.launch = None
+        if not ready:
+            print(f"❌ Music.app did not respond within {LAUNCH_TIMEOUT:g}s.")
+        return ready
+
+    def recover_playlists(self):
+        """Settle playlist writes a previous run left half done"""
+        print(f"\nRecovering {len(self.journal.pending())} interrupted playlist writes...")
+        for outcome in self.music.recover():
+            print(f"  {outcome}")
+
+    def checkpoint_header(self, options: RunOptions) -> Dict:
+        """What a checkpoint must match to be resumed"""
+        if options.snapshot:
+            stat = os.stat(options.snapshot)
+            source = [os.path.abspath(options.snapshot), stat.st_mtime_ns, stat.st_size]
+        else:
+            source = 'Music.app'
+        return {'strategy': self.strategy_name, 'rules': rule_set_hash(self), 'source': source,
+                'keep_duplicates': options.keep_duplicates, 'export_only': options.export_only}
+
+    def publish(self, options: RunOptions, profiled=None, confirm: bool = False):
+        """Expand the current classifications into playlists and write them (or the plan);
+        after the first write only playlists whose tracks changed are rewritten"""
+        profiled = profiled or (lambda name: nullcontext())
+        all_tracks = self.tracks
+        mood_tracks, unclassified = self.group_by_mood(all_tracks, self.track_moods)
+        counts = {mood: len(tracks) for mood, tracks in mood_tracks.items()}
+        self.print_summary("Classification Results:", counts, {
+            'Unclassified': len(unclassified),
+            'Total Classified': sum(counts.values())
+        })
+
+        # Build the final playlists
+        print("\nPreparing playlists...")
+        with self.instrumentation.phase('expand'), profiled('expand'):
+            final_playlists = self.expand_playlists(mood_tracks, all_tracks)
+        self.print_summary("Final Playlist Summary:",
+                           {mood: len(names) for mood, names in final_playlists.items()})
+
+        profiler = options.profiler
+        if profiler is not None and self.profile_report is None:
+            self.profile_report = profiler.build_report(self, all_tracks, mood_tracks)
+            print_report(self.profile_report)
+
+        smart = {}
+        if options.smart_playlists:
+            smart = smart_playlists(self, all_tracks, self.track_moods, final_playlists)
+            write_smart_playlists(smart, options.smart_playlists, self.strategy_name)
+            saved = sum(definition['tracks'] for definition in smart.values())
+            self.instrumentation.count('smart_playlist_tracks', saved)
+            print(f"\n🧠 {len(smart)} moods reduce to genre criteria ({saved} track writes saved); "
+                  f"smart playlist definitions written to {options.smart_playlists}")
+            for mood, definition in smart.items():
+                print(f"  {mood:20} {describe(definition)}")
+
+        if options.plan:
+            plan = build_plan(self, mood_tracks, all_tracks, final_playlists)
+            write_plan(plan, options.plan, options.plan_format, self.strategy_name)
+            self.final_playlists = final_playlists
+            print(f"\n📝 Plan with {len(plan)} entries written to {options.plan}")
+            print("   Dry run: nothing was changed in Music.app.")
+            return
+
+        if confirm:
+            response = input("\nCreate playlists based on these classifications? (y/n): ")
+            if response.lower() != 'y':
+                print("Cancelled.")
+                return
+
+        moods = None
+        if self.final_playlists is not None:
+            moods = [mood for mood in self.moods()
+                     if final_playlists.get(mood) != self.final_playlists.get(mood)]
+            if not moods:
+                print("\nNo playlist changed.")
+                return
+        if smart:
+            moods = [mood for mood in (moods if moods is not None else self.moods()) if mood not in smart]
+            if not moods:
+                self.final_playlists = final_playlists
+                print("\nEvery playlist to write is a smart playlist; nothing to send to Music.app.")
+                return
+
+        if not self.wait_for_music():
+            return
+
+        self.coalesce_writes = options.coalesce_writes
+        if options.export:
+            self.exporter = PlaylistExporter(options.export, options.export_format, not options.export_only)
+            with self.instrumentation.phase('locate'):
+                self.exporter.locate(self.library.rows(), self.music.track_locations())
+
+        # Create playlists
+        print("\nCreating playlists in Music.app...")
+        with self.instrumentation.phase('write'):
+            created = self.write_playlists(final_playlists, moods)
+        # A failed mood stays unrecorded, so the next sync or rules change sees it as
+        # changed and writes it again
+        self.final_playlists = {mood: tracks for mood, tracks in final_playlists.items()
+                                if mood not in self.failed_moods}
+
+        print("\n" + "=" * 70)
+        print(f"✅ Complete! Created {created} playlists.")
+        if self.failed_moods:
+            print(f"   ✗ Could not write {', '.join(sorted(self.failed_moods))}; "
+                  f"they will be written again on the next run or sync.")
+        if self.exporter is not None and self.exporter.summary():
+            print(f"   {self.exporter.summary()}")
+        print("   Check your Music.app to see the new mood-based playlists!")
+        print(f"   Time: {self.instrumentation.report()}")
+        print("=" * 70)
+
+    def reload_rules(self, categories: Dict, workers: int = 1) -> int:
+        """Switch to new rules and rescore only the tracks an edit can affect; returns
+        how many were rescored"""
+        changed = changed_keywords(self.mood_rules(), categories)
+        self.set_rules(categories)
+        if changed is None:
+            affected = list(range(len(self.tracks)))
+        else:
+            affected = [idx for idx, track in enumerate(self.tracks)
+                        if self.has_any(self.combine(*self.match_fields(track)), changed)]
+
+        if affected:
+            with self.instrumentation.phase('rescore'):
+                fresh = self.classify_moods([self.tracks[idx] for idx in affected], workers)
+            for idx, moods in zip(affected, fresh):
+                self.track_moods[idx] = moods
+        if self.cache is not None:
+            # Unaffected tracks keep their moods under the new rules too
+            self.cache.rules = rule_set_hash(self)
+            for idx in affected:
+                self.cache.store(self.tracks[idx], self.track_moods[idx])
+            self.cache.save()
+        return len(affected)
+
+    def check_rules(self, options: RunOptions, workers: int = 1) -> bool:
+        """Rescore and republish if the rules file changed since the last check"""
+        path = options.rules
+        try:
+            current_hash = file_hash(path)
+            if current_hash == self.rules_hash:
+                return False
+            self.rules_hash = current_hash
+            categories = load_rules(path, self.mood_rules())
+        except (OSError, ValueError) as e:
+            print(f"  ✗ {path}: {e}")
+            return False
+
+        start = time.perf_counter()
+        rescored = self.reload_rules(categories, workers)
+        print(f"\n🔄 {path} changed: rescored {rescored} of {len(self.tracks)} tracks "
+              f"in {time.perf_counter() - start:.2f}s")
+        self.publish(options)
+        return True
+
+    def watch_rules(self, options: RunOptions, workers: int = 1):
+        """Reload the rules file whenever it changes, without re-reading the library"""
+        print(f"\n👀 Watching {options.rules} for rule changes (Ctrl-C to stop)...")
+        self.rules_hash = file_hash(options.rules)
+        try:
+            while True:
+                time.sleep(RULE_POLL_SECONDS)
+                self.check_rules(options, workers)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
+
+def main():
+    strategies = load_strategies()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--strategy', choices=sorted(strategies), default=DEFAULT_STRATEGY,
+                        help=f'classifier strategy to run (default: {DEFAULT_STRATEGY})')
+    parser.add_argument('--list', action='store_true', help='list the available strategies and exit')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='classify across this many worker processes (default: 1)')
+    parser.add_argument('--trace', help='write phase timings and osascript calls to this file')
+    parser.add_argument('--trace-format', choices=TRACE_FORMATS, default='json',
+                        help='JSON summary or Chrome trace (default: json)')
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help='profile the classify and expand phases and rank the costliest rules; '
+                             'optionally also write the report as JSON')
+    parser.add_argument('--snapshot', metavar='FILE',
+                        help='read the library from a snapshot instead of Music.app')
+    parser.add_argument('--save-snapshot', metavar='FILE',
+                        help='save the loaded library as a snapshot for later --snapshot runs')
+    parser.add_argument('--plan', metavar='FILE',
+                        help='dry run: write the intended playlists (IDs, names, scores, reasons) '
+                             'to FILE instead of creating them')
+    parser.add_argument('--plan-format', choices=PLAN_FORMATS,
+                        help='plan file format (default: from the file extension, else json)')
+    parser.add_argument('--cache', metavar='FILE',
+                        help='keep classifications in FILE and only classify new or edited tracks, '
+                             'or every track after the strategy\'s rules change')
+    parser.add_argument('--rules', metavar='FILE',
+                        help='load the strategy\'s mood rules from a TOML or JSON file')
+    parser.add_argument('--watch-rules', action='store_true',
+                        help='with --rules, keep running and rescore the tracks a rules edit affects')
+    parser.add_argument('--dump-rules', metavar='FILE',
+                        help='write the strategy\'s built-in rules as JSON and exit')
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help='classify every copy of a song instead of one per duplicate cluster')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, metavar='FILE',
+                        help=f'record progress in FILE while running (default: {DEFAULT_CHECKPOINT})')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run from its checkpoint')
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL, metavar='FILE',
+                        help=f'journal playlist writes in FILE so failed ones can be undone '
+                             f'(default: {DEFAULT_JOURNAL})')
+    parser.add_argument('--export', metavar='DIR',
+                        help='write each playlist as a file of track locations in DIR and import it '
+                             'into Music.app in one step')
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS, default='m3u8',
+                        help='playlist file format for --export (default: m3u8)')
+    parser.add_argument('--export-only', action='store_true',
+                        help='with --export, only write the files and leave Music.app\'s playlists alone')
+    parser.add_argument('--coalesce-writes', action='store_true',
+                        help='create and fill all playlists in a few large scripts instead of '
+                             'several calls per playlist')
+    parser.add_argument('--smart-playlists', metavar='FILE',
+                        help='write smart playlist criteria to FILE for moods that reduce to genres, '
+                             'and only create static playlists for the rest')
+    parser.add_argument('--progress-ms', type=float, default=PROGRESS_INTERVAL_MS, metavar='MS',
+                        help=f'redraw the progress line at most every MS milliseconds '
+                             f'(default: {PROGRESS_INTERVAL_MS}); off a terminal, progress is logged '
+                             f'as key=value lines instead')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep running: poll the library and update playlists incrementally')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, metavar='PATH',
+                        help=f'daemon command socket (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--poll-seconds', type=float, default=POLL_SECONDS,
+                        help=f'seconds between daemon library polls (default: {POLL_SECONDS:g})')
+    args = parser.parse_args()
+
+    if args.list:
+        for name in sorted(strategies):
+            print(f"  {name:22} {strategies[name].title}")
+        return
+
+    if args.watch_rules and not args.rules:
+        parser.error('--watch-rules needs --rules')
+    if args.export_only and not args.export:
+        parser.error('--export-only needs --export')
+
+    organizer = strategies[args.strategy]()
+    organizer.progress = Progress(args.progress_ms)
+    if args.dump_rules:
+        dump_rules(organizer.mood_rules(), args.dump_rules)
+        print(f"Wrote {args.strategy} rules to {args.dump_rules}")
+        return
+    if args.rules:
+        try:
+            organizer.set_rules(load_rules(args.rules, organizer.mood_rules()))
+        except (OSError, ValueError) as e:
+            parser.error(f'{args.rules}: {e}')
+    options = RunOptions(
+        profiler=Profiler() if args.profile is not None else None,
+        snapshot=args.snapshot,
+        save_snapshot=args.save_snapshot,
+        plan=args.plan,
+        plan_format=args.plan_format,
+        keep_duplicates=args.keep_duplicates,
+        cache=args.cache,
+        rules=args.rules,
+        watch_rules=args.watch_rules,
+        checkpoint=args.checkpoint,
+        resume=args.resume,
+        journal=args.journal,
+        export=args.export,
+        export_format=args.export_format,
+        export_only=args.export_only,
+        coalesce_writes=args.coalesce_writes,
+        smart_playlists=args.smart_playlists
+    )
+    try:
+        if args.daemon:
+            LibraryDaemon(organizer, options, args.workers, args.socket, args.poll_seconds).run()
+            return
+        organizer.organize(workers=args.workers, options=options)
+        if args.watch_rules and organizer.final_playlists is not None:
+            organizer.watch_rules(options, args.workers)
+    except KeyboardInterrupt:
+        if organizer.checkpoint is None:
+            raise
+        print(f"\n\nInterrupted. Run again with --resume to continue from {options.checkpoint}.")
+    finally:
+        if args.trace:
+            organizer.instrumentation.write(args.trace, args.trace_format)
+        if args.profile and organizer.profile_report:
+            write_report(organizer.profile_report, args.profile)
+
+
+if __name__ == "__main__":
+    # Strategies register with the importable module, not with __main__
+    from apple_music_engine import main
+    main()
@@ -4,14 +4,18 @@ Expanded Custom Apple Music Playlist Organizer
 Creates playlists with at least 40 tracks each, using taste-based recommendations
 """
 
-import subprocess
-import time
 from typing import List, Dict, Set
-from collections import defaultdict, Counter
-import random
+from collections import Counter
+from apple_music_engine import MoodOrganizer, register_strategy
+from apple_music_library import lowered_fields
+
+@register_strategy('expanded_playlists')
+class ExpandedPlaylistOrganizer(MoodOrganizer):
+    title = "Expanded Custom Apple Music Playlist Organizer"
+    playlist_size = 40
 
-class ExpandedPlaylistOrganizer:
     def __init__(self):
+        super().__init__()
         # Custom mood categories - expanded keywords
         self.mood_keywords = {
             'Angry/Mad': [
@@ -47,103 +51,23 @@ class ExpandedPlaylistOrganizer:
                 'cinematic', 'soundtrack', 'minimal'
             ]
         }
-        
-        self.all_tracks = []  # Store all tracks with full info
-    
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_track_count(self) -> int:
-        """Get total number of tracks"""
-        script = 'tell application "Music" to return count of tracks of library playlist 1'
-        result = self.run_applescript(script)
-        try:
-            return int(result) if result else 0
-        except:
-            return 0
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks with full information"""
-        track_count = self.get_track_count()
-        all_tracks = []
-        batch_size = 100
-        
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
     
     def classify_track(self, track: Dict) -> List[str]:
         """Classify track into custom mood categories"""
         moods = []
-        genre = track.get('genre', '').lower()
-        name = track.get('name', '').lower()
-        artist = track.get('artist', '').lower()
-        combined = f"{genre} {name} {artist}"
+        name, artist, genre = self.match_fields(track)
+        combined = self.combine(genre, name, artist)
         
         # Check each mood category
         for mood, keywords in self.mood_keywords.items():
-            for keyword in keywords:
-                if keyword in combined:
-                    if mood not in moods:
-                        moods.append(mood)
-                    break
+            if self.has_any(combined, keywords):
+                if mood not in moods:
+                    moods.append(mood)
         
         return moods
-    
+
+    classify = classify_track
+
     def find_similar_tracks(self, seed_tracks: List[Dict], all_tracks: List[Dict], 
                            exclude_names: Set[str], target_count: int) -> List[str]:
         """Find similar tracks based on artists and genres from seed tracks"""
@@ -151,8 +75,8 @@ class ExpandedPlaylistOrganizer:
             return []
         
         # Analyze patterns from seed tracks
-        seed_artists = Counter([t['artist'].lower() for t in seed_tracks if t['artist']])
-        seed_genres = Counter([t['genre'].lower() for t in seed_tracks if t['genre']])
+        seed_artists = Counter([lowered_fields(t)[1] for t in seed_tracks if t['artist']])
+        seed_genres = Counter([lowered_fields(t)[2] for t in seed_tracks if t['genre']])
         
         # Get top artists and genres
         top_artists = {artist for artist, count in seed_artists.most_common(10)}
@@ -164,8 +88,7 @@ class ExpandedPlaylistOrganizer:
             if track['name'] in exclude_names:
                 continue
             
-            track_artist = track['artist'].lower() if track['artist'] else ''
-            track_genre = track['genre'].lower() if track['genre'] else ''
+            _, track_artist, track_genre = lowered_fields(track)
             
             # Score based on artist/genre match
             score = 0
@@ -193,16 +116,12 @@ class ExpandedPlaylistOrganizer:
             if track['name'] in exclude_names:
                 continue
             
-            genre = track.get('genre', '').lower()
-            name = track.get('name', '').lower()
-            artist = track.get('artist', '').lower()
-            combined = f"{genre} {name} {artist}"
+            name, artist, genre = self.match_fields(track)
+            combined = self.combine(genre, name, artist)
             
             # Check if track matches any keyword
-            for keyword in keywords:
-                if keyword in combined:
-                    correlated.append(track['name'])
-                    break
+            if self.has_any(combined, keywords):
+                correlated.append(track['name'])
             
             if len(correlated) >= count:
                 break
@@ -213,7 +132,7 @@ class ExpandedPlaylistOrganizer:
                        all_tracks: List[Dict], target_size: int = 40) -> List[str]:
         """Expand playlist to target size using taste-based recommendations"""
         initial_names = {t['name'] for t in initial_tracks}
-        final_tracks = list(initial_names)
+        final_tracks = list(dict.fromkeys(t['name'] for t in initial_tracks))
         
         if len(final_tracks) >= target_size:
             return list(final_tracks)[:target_size]
@@ -247,169 +166,23 @@ class ExpandedPlaylistOrganizer:
             final_tracks.extend(more_similar)
         
         return list(final_tracks)[:target_size]
-    
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        # Create playlist first
-        create_script = f'''
-        tell application "Music"
-            try
-                -- Delete existing playlist if it exists
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                -- Create new playlist
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        # Add tracks in batches
-        added = 0
-        batch_size = 20
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function"""
-        print("=" * 70)
-        print("Expanded Custom Apple Music Playlist Organizer")
-        print("=" * 70)
-        print("\nCreating playlists (minimum 40 tracks each):")
-        print("  • Angry/Mad")
-        print("  • Heartbreak")
-        print("  • Workout/Go Time")
-        print("  • Calming")
-        print("  • In Love")
-        print("  • While Doing Homework")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found in your library.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Initial classification
-        print("\nClassifying tracks...")
-        mood_tracks = defaultdict(list)  # Store full track dicts
-        
-        for track in all_tracks:
-            moods = self.classify_track(track)
-            for mood in moods:
-                mood_tracks[mood].append(track)
-        
-        # Display initial classification
-        print("\n" + "=" * 70)
-        print("Initial Classification:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(mood_tracks.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Expand each playlist to at least 40 tracks
-        print("\nExpanding playlists to 40+ tracks using taste-based recommendations...")
+
+    def expand_playlists(self, mood_tracks: Dict[str, List[Dict]],
+                         all_tracks: List[Dict]) -> Dict[str, List[str]]:
+        """Expand each playlist to at least 40 tracks"""
+        print("Expanding playlists to 40+ tracks using taste-based recommendations...")
         expanded_playlists = {}
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
+
+        for mood in self.moods():
             initial = mood_tracks.get(mood, [])
             print(f"\n  Expanding '{mood}'...")
             print(f"    Initial: {len(initial)} tracks")
-            
-            expanded = self.expand_playlist(mood, initial, all_tracks, target_size=40)
+
+            expanded = self.expand_playlist(mood, initial, all_tracks, target_size=self.playlist_size)
             expanded_playlists[mood] = expanded
             print(f"    Final: {len(expanded)} tracks")
-        
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(expanded_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            track_list = expanded_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
-            else:
-                print(f"  '{mood}' playlist (0 tracks)... (skipped)")
-        
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} playlists with 40+ tracks each.")
-        print("   Check your Music.app to see the new playlists!")
-        print("=" * 70)
+
+        return expanded_playlists
 
 def main():
     organizer = ExpandedPlaylistOrganizer()
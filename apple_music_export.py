@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Playlist file export
+Writes each playlist as an M3U8 or XSPF file of local file locations and
+imports it into Music.app with one command, falling back to per-track Apple
+Events for tracks without a local file
+"""
+
+import os
+from typing import Iterable, List, Dict, Optional, Tuple
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+EXPORT_FORMATS = ['m3u8', 'xspf']
+# Characters Music.app and the file system would not take in a file name
+UNSAFE_FILENAME_CHARS = str.maketrans({'/': '-', ':': '-', '\\': '-', '\0': ''})
+
+
+def playlist_filename(playlist_name: str, fmt: str) -> str:
+    return f"{playlist_name.translate(UNSAFE_FILENAME_CHARS).strip() or 'Playlist'}.{fmt}"
+
+
+def write_m3u8(path: str, entries: Iterable[Dict]) -> int:
+    """Stream an extended M3U playlist (UTF-8) and return how many tracks it lists"""
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('#EXTM3U\n')
+        for entry in entries:
+            title = f"{entry['artist']} - {entry['name']}" if entry['artist'] else entry['name']
+            f.write(f"#EXTINF:{int(entry['duration'] or 0)},{' '.join(title.splitlines())}\n")
+            f.write(entry['location'] + '\n')
+            written += 1
+    return written
+
+
+def write_xspf(path: str, title: str, entries: Iterable[Dict]) -> int:
+    """Stream an XSPF playlist and return how many tracks it lists"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<playlist version="1" xmlns="http://xspf.org/ns/0/">\n'
+                f'  <title>{escape(title)}</title>\n'
+                '  <trackList>\n')
+        for entry in entries:
+            f.write(f"    <track><location>file://{escape(quote(entry['location']))}</location>"
+                    f"<title>{escape(entry['name'])}</title><creator>{escape(entry['artist'])}</creator>"
+                    f"<duration>{int((entry['duration'] or 0) * 1000)}</duration></track>\n")
+            written += 1
+        f.write('  </trackList>\n</playlist>\n')
+    return written
+
+
+class PlaylistExporter:
+    """Writes playlists as files and imports them, one `add` command per playlist
+
+    Playlists list track names; each name resolves to the first addable library
+    track of that name with a local file. Names without one are added to the
+    imported playlist by name through the usual Apple Event path afterwards.
+    """
+
+    def __init__(self, directory: str, fmt: str = 'm3u8', import_files: bool = True):
+        self.directory = directory
+        self.fmt = fmt
+        self.import_files = import_files
+        self.by_name: Dict[str, Dict] = {}
+        # Tracks that went through a file, and those that needed Apple Events
+        self.exported = 0
+        self.fallback = 0
+
+    def locate(self, rows: Iterable[Dict], locations: Dict[str, str]):
+        """Index the library's local files by track name"""
+        by_name = {}
+        for row in rows:
+            location = locations.get(row['persistent_id'])
+            if location and not row.get('status') and row['name'] not in by_name:
+                by_name[row['name']] = {'location': location, 'name': row['name'],
+                                        'artist': row['artist'], 'duration': row['duration']}
+        self.by_name = by_name
+
+    def split(self, track_names: List[str]) -> Tuple[List[Dict], List[str]]:
+        """Entries with a local file, and names without one"""
+        located, missing = [], []
+        for name in track_names:
+            entry = self.by_name.get(name)
+            if entry is None:
+                missing.append(name)
+            else:
+                located.append(entry)
+        return located, missing
+
+    def write_file(self, playlist_name: str, entries: Iterable[Dict]) -> Tuple[str, int]:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.directory, playlist_filename(playlist_name, self.fmt)))
+        if self.fmt == 'xspf':
+            return path, write_xspf(path, playlist_name, entries)
+        return path, write_m3u8(path, entries)
+
+    def write(self, music, playlist_name: str, track_names: List[str]) -> bool:
+        """Export one playlist and, unless only exporting, import it into Music.app"""
+        located, missing = self.split(track_names)
+        path, written = self.write_file(playlist_name, located)
+        if not self.import_files:
+            self.exported += written
+            return True
+
+        if written and music.import_playlist(playlist_name, path, written, missing):
+            self.exported += written
+            self.fallback += len(missing)
+            return True
+        # Nothing to import, or the import came up short: write it the slow way
+        self.fallback += len(track_names)
+        return music.create_playlist(playlist_name, track_names)
+
+    def summary(self) -> Optional[str]:
+        if not self.exported and not self.fallback:
+            return None
+        action = 'imported from' if self.import_files else 'exported to'
+        return (f"{self.exported} tracks {action} {self.fmt.upper()} files in {self.directory}"
+                + (f", {self.fallback} added by Apple Events" if self.fallback else ""))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation for the Apple Music organizers
+Records wall time per pipeline phase and every osascript call, and writes
+them as a JSON summary or a Chrome trace (chrome://tracing, Perfetto)
+"""
+
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Deque
+
+TRACE_FORMATS = ['json', 'chrome']
+# Most recent phases and osascript calls kept individually; totals still cover
+# every one, so a long-running daemon's history stays bounded
+MAX_CALL_HISTORY = 10000
+
+
+class Instrumentation:
+    """Collects phase timings and Apple Event call records for one run"""
+
+    def __init__(self, max_calls: int = MAX_CALL_HISTORY):
+        self.origin = time.perf_counter()
+        self.phases: Deque[Dict] = deque(maxlen=max_calls)
+        self.calls: Deque[Dict] = deque(maxlen=max_calls)
+        # Seconds per top-level phase and totals per script kind, over the whole run
+        self.phase_seconds: Dict[str, float] = {}
+        self.totals: Dict[str, Dict] = {}
+        # Event counts such as fetch ranges retried or skipped
+        self.counters: Dict[str, int] = {}
+        self._open_phases: List[str] = []
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a pipeline phase; phases may nest"""
+        start = self._now()
+        self._open_phases.append(name)
+        try:
+            yield
+        finally:
+            self._open_phases.pop()
+            seconds = self._now() - start
+            if not self._open_phases:
+                self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+            self.phases.append({
+                'name': name,
+                'start': start,
+                'seconds': seconds,
+                'depth': len(self._open_phases)
+            })
+
+    def record_call(self, kind: str, start: float, seconds: float, bytes_in: int,
+                    bytes_out: int, timed_out: bool = False, failed: bool = False):
+        """Record one osascript invocation; start is a time.perf_counter() value"""
+        entry = self.totals.setdefault(kind, {
+            'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+            'bytes_in': 0, 'bytes_out': 0, 'timeouts': 0, 'failures': 0
+        })
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['max_seconds'] = max(entry['max_seconds'], seconds)
+        entry['bytes_in'] += bytes_in
+        entry['bytes_out'] += bytes_out
+        entry['timeouts'] += timed_out
+        entry['failures'] += failed
+        self.calls.append({
+            'kind': kind,
+            'phase': self._open_phases[-1] if self._open_phases else None,
+            'start': start - self.origin,
+            'seconds': seconds,
+            'bytes_in': bytes_in,
+            'bytes_out': bytes_out,
+            'timed_out': timed_out,
+            'failed': failed
+        })
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def phase_totals(self) -> Dict[str, float]:
+        """Seconds spent in each top-level phase, in the order they ran"""
+        return self.phase_seconds
+
+    def call_totals(self) -> Dict[str, Dict]:
+        """Per script kind: call count, latency, bytes and timeouts"""
+        return self.totals
+
+    def summary(self) -> Dict:
+        return {
+            'phases': self.phase_totals(),
+            'apple_events': self.call_totals(),
+            'counters': self.counters,
+            'calls': list(self.calls)
+        }
+
+    def chrome_trace(self) -> Dict:
+        """Trace Event Format: phases on one track, osascript calls on another"""
+        pid = os.getpid()
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 1, 'args': {'name': 'pipeline'}},
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 2, 'args': {'name': 'osascript'}}
+        ]
+        for phase in self.phases:
+            events.append({
+                'name': phase['name'], 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': 1,
+                'ts': phase['start'] * 1e6, 'dur': phase['seconds'] * 1e6
+            })
+        for call in self.calls:
+            events.append({
+                'name': call['kind'], 'cat': 'apple_event', 'ph': 'X', 'pid': pid, 'tid': 2,
+                'ts': call['start'] * 1e6, 'dur': call['seconds'] * 1e6,
+                'args': {key: call[key] for key in ('bytes_in', 'bytes_out', 'timed_out', 'failed')}
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path: str, trace_format: str = 'json'):
+        """Write the run as a JSON summary or a Chrome trace"""
+        data = self.chrome_trace() if trace_format == 'chrome' else self.summary()
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def report(self) -> str:
+        """One-line phase breakdown for the end-of-run banner"""
+        return ', '.join(f"{name} {seconds:.1f}s" for name, seconds in self.phase_totals().items())
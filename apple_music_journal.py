@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Write-ahead journal for playlist writes
+Records a playlist's previous track IDs before it is replaced and the IDs
+added batch by batch, so a write cut short can be rolled back or forward
+on the next start using ID lists alone
+"""
+
+import json
+import os
+from typing import List, Dict, Optional
+
+DEFAULT_JOURNAL = os.path.expanduser('~/.apple_music_journal.jsonl')
+
+
+class PlaylistJournal:
+    """Append-only JSON-lines log of playlist replacements
+
+    Every write is a begin record (playlist name and previous track IDs, or
+    null if it did not exist), an added record per batch with the persistent
+    IDs that went in, a complete record once every batch ran, and finally
+    commit or rollback. Records are fsynced before Music.app is touched, and
+    the file is emptied once no write is open.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL):
+        self.path = path
+        self.entries: Dict[int, Dict] = {}
+        self.next_id = 1
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last line
+                self.apply(record)
+        self.next_id = max(self.entries, default=0) + 1
+
+    def apply(self, record: Dict):
+        entry_id = record['id']
+        op = record['op']
+        if op == 'begin':
+            self.entries[entry_id] = {'id': entry_id, 'playlist': record['playlist'],
+                                      'old_ids': record['old_ids'], 'ids': [], 'complete': False}
+        elif entry_id not in self.entries:
+            return
+        elif op == 'added':
+            self.entries[entry_id]['ids'].extend(record['ids'])
+        elif op == 'complete':
+            self.entries[entry_id]['complete'] = True
+        elif op in ('commit', 'rollback'):
+            del self.entries[entry_id]
+
+    def append(self, record: Dict):
+        self.apply(record)
+        if not self.entries and record['op'] in ('commit', 'rollback'):
+            # Nothing left open: start the next write with an empty journal
+            open(self.path, 'w').close()
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, playlist_name: str, old_ids: Optional[List[str]]) -> int:
+        entry_id = self.next_id
+        self.next_id += 1
+        self.append({'op': 'begin', 'id': entry_id, 'playlist': playlist_name, 'old_ids': old_ids})
+        return entry_id
+
+    def added(self, entry_id: int, ids: List[str]):
+        self.append({'op': 'added', 'id': entry_id, 'ids': ids})
+
+    def complete(self, entry_id: int):
+        self.append({'op': 'complete', 'id': entry_id})
+
+    def commit(self, entry_id: int):
+        self.append({'op': 'commit', 'id': entry_id})
+
+    def rollback(self, entry_id: int):
+        self.append({'op': 'rollback', 'id': entry_id})
+
+    def pending(self) -> List[Dict]:
+        """Writes that neither committed nor rolled back, oldest first"""
+        return [self.entries[entry_id] for entry_id in sorted(self.entries)]
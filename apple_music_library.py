@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Shared Apple Music track library
+Dictionary-encodes the artist and genre columns so each distinct value is
+stored and normalized once, no matter how many tracks share it; titles are
+normalized once at ingest
+"""
+
+import json
+import sys
+from typing import List, Dict, Tuple
+
+from apple_music_normalize import canonical_title, normalize_text, tokenize
+
+SNAPSHOT_VERSION = 1
+
+
+class StringDictionary:
+    """Interned string column mapping each distinct value to an integer code"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.lowered: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        """Return the code for value, adding it on first sight"""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            value = sys.intern(value)
+            self.codes[value] = code
+            self.values.append(value)
+            self.lowered.append(sys.intern(normalize_text(value)))
+        return code
+
+
+class TrackTable:
+    """Column-oriented track store with dictionary-encoded artist/genre"""
+
+    def __init__(self):
+        self.persistent_ids: List[str] = []
+        self.names: List[str] = []
+        self.names_canonical: List[str] = []
+        self.name_tokens: List[Tuple[str, ...]] = []
+        self.artist_codes: List[int] = []
+        self.genre_codes: List[int] = []
+        self.durations: List[float] = []
+        # Why a track cannot be added to playlists ('' if it can)
+        self.statuses: List[str] = []
+        self.artists = StringDictionary()
+        self.genres = StringDictionary()
+        # Persistent IDs of tracks that cannot be added, with the reason; set
+        # before the rows are added
+        self.unaddable: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, artist: str, genre: str,
+               duration: float = 0.0, persistent_id: str = '') -> int:
+        """Add one track and return its row index"""
+        self.persistent_ids.append(persistent_id)
+        self.names.append(name)
+        canonical = canonical_title(name)
+        self.names_canonical.append(canonical)
+        self.name_tokens.append(tokenize(canonical))
+        self.artist_codes.append(self.artists.encode(artist))
+        self.genre_codes.append(self.genres.encode(genre))
+        self.durations.append(duration)
+        self.statuses.append(self.unaddable.get(persistent_id, ''))
+        return len(self.names) - 1
+
+    def extend(self, fetched: List[Tuple[str, str, str, str, float]]) -> List[Dict]:
+        """Add (persistent ID, name, artist, genre, duration) rows and return them as dicts"""
+        start = len(self.names)
+        for persistent_id, name, artist, genre, duration in fetched:
+            self.append(name, artist, genre, duration, persistent_id)
+        return [self.row(i) for i in range(start, len(self.names))]
+
+    def update(self, fetched: List[Tuple[str, str, str, str, float]]) -> List[Dict]:
+        """Replace the rows of tracks already in the table by persistent ID, add
+        the rest, and return the changed rows as dicts"""
+        positions = {pid: i for i, pid in enumerate(self.persistent_ids) if pid}
+        changed = []
+        for persistent_id, name, artist, genre, duration in fetched:
+            idx = positions.get(persistent_id)
+            if idx is None:
+                idx = self.append(name, artist, genre, duration, persistent_id)
+                positions[persistent_id] = idx
+            else:
+                canonical = canonical_title(name)
+                self.names[idx] = name
+                self.names_canonical[idx] = canonical
+                self.name_tokens[idx] = tokenize(canonical)
+                self.artist_codes[idx] = self.artists.encode(artist)
+                self.genre_codes[idx] = self.genres.encode(genre)
+                self.durations[idx] = duration
+                self.statuses[idx] = self.unaddable.get(persistent_id, '')
+            changed.append(idx)
+        return [self.row(i) for i in changed]
+
+    def remove(self, persistent_ids: List[str]):
+        """Drop the rows of the given persistent IDs"""
+        removed = set(persistent_ids)
+        keep = [i for i, pid in enumerate(self.persistent_ids) if pid not in removed]
+        if len(keep) == len(self.persistent_ids):
+            return
+        for column in ('persistent_ids', 'names', 'names_canonical', 'name_tokens',
+                       'artist_codes', 'genre_codes', 'durations', 'statuses'):
+            values = getattr(self, column)
+            setattr(self, column, [values[i] for i in keep])
+
+    def row(self, idx: int) -> Dict:
+        """Materialize a track dict sharing the interned column values"""
+        artist_id = self.artist_codes[idx]
+        genre_id = self.genre_codes[idx]
+        return {
+            'persistent_id': self.persistent_ids[idx],
+            'name': self.names[idx],
+            'artist': self.artists.values[artist_id],
+            'genre': self.genres.values[genre_id],
+            'name_canonical': self.names_canonical[idx],
+            'name_tokens': self.name_tokens[idx],
+            'artist_lower': self.artists.lowered[artist_id],
+            'genre_lower': self.genres.lowered[genre_id],
+            'duration': self.durations[idx],
+            'status': self.statuses[idx]
+        }
+
+    def fetched_rows(self) -> List[Tuple[str, str, str, str, float]]:
+        """Rows in the (persistent ID, name, artist, genre, duration) form extend() accepts"""
+        return [(self.persistent_ids[i], self.names[i], self.artists.values[self.artist_codes[i]],
+                 self.genres.values[self.genre_codes[i]], self.durations[i])
+                for i in range(len(self.names))]
+
+    def rows(self) -> List[Dict]:
+        """Materialize every track as a dict"""
+        return [self.row(i) for i in range(len(self.names))]
+
+
+def save_snapshot(table: TrackTable, path: str):
+    """Write the library to a JSON snapshot so later runs can skip Music.app"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'tracks': table.fetched_rows(),
+                   'unaddable': table.unaddable}, f, ensure_ascii=False)
+
+
+def load_snapshot(path: str) -> TrackTable:
+    """Read a snapshot written by save_snapshot"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: unsupported snapshot version {data.get('version')!r}")
+    table = TrackTable()
+    table.unaddable = data.get('unaddable', {})
+    table.extend(tuple(row) for row in data['tracks'])
+    return table
+
+
+def addable_tracks(tracks: List[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
+    """Tracks that can be added to playlists, and how many were left out per reason"""
+    addable = []
+    skipped: Dict[str, int] = {}
+    for track in tracks:
+        status = track.get('status')
+        if status:
+            skipped[status] = skipped.get(status, 0) + 1
+        else:
+            addable.append(track)
+    return addable, skipped
+
+
+def lowered_fields(track: Dict) -> Tuple[str, str, str]:
+    """Return the canonical title and normalized artist and genre, reusing forms
+    precomputed at ingest"""
+    if 'genre_lower' in track:
+        return track['name_canonical'], track['artist_lower'], track['genre_lower']
+    return (canonical_title(track.get('name', '')),
+            normalize_text(track.get('artist', '')),
+            normalize_text(track.get('genre', '')))
+
+
+def title_tokens(track: Dict) -> Tuple[str, ...]:
+    """Word tokens of the canonical title, reusing the ones computed at ingest"""
+    if 'name_tokens' in track:
+        return track['name_tokens']
+    return tokenize(canonical_title(track.get('name', '')))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Apple Music Daemon Load Test
+Hammers a running daemon's query API from several clients with batched mood
+lookups and track pages, and checks the throughput against a target
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from typing import List, Dict
+
+from apple_music_daemon import DaemonClient, DEFAULT_SOCKET
+
+# Queries (ops, each moods lookup or tracks page counting once) per second the
+# daemon should sustain (default --target)
+TARGET_QUERIES_PER_SECOND = 20000
+# Track IDs per moods query, and share of queries asking for a page of tracks
+IDS_PER_LOOKUP = 10
+PAGE_SHARE = 0.1
+PAGE_SIZE = 40
+
+
+def sample_ids(client: DaemonClient, moods: List[str]) -> List[str]:
+    """Persistent IDs to look up, gathered from each mood's first pages"""
+    ids = []
+    for mood in moods:
+        page = client.request({'op': 'tracks', 'mood': mood, 'limit': 500})
+        ids.extend(track['persistent_id'] for track in page['tracks'])
+    # Some unknown IDs, as real callers send
+    ids.extend(f'UNKNOWN{i:08X}' for i in range(len(ids) // 20 + 1))
+    return ids
+
+
+def run_client(socket_path: str, ids: List[str], moods: List[str], batch: int,
+               deadline: float, seed: int, results: List[Dict]):
+    rng = random.Random(seed)
+    latencies = []
+    queries = 0
+    ids_looked_up = 0
+    errors = 0
+    with DaemonClient(socket_path) as client:
+        while time.perf_counter() < deadline:
+            requests = []
+            for _ in range(batch):
+                if rng.random() < PAGE_SHARE:
+                    requests.append({'op': 'tracks', 'mood': rng.choice(moods), 'limit': PAGE_SIZE,
+                                     'offset': rng.randrange(0, 200)})
+                else:
+                    # With replacement, so a library with fewer tracks than a lookup still works
+                    requests.append({'op': 'moods', 'ids': rng.choices(ids, k=IDS_PER_LOOKUP)})
+            start = time.perf_counter()
+            replies = client.request(requests)
+            latencies.append(time.perf_counter() - start)
+            queries += len(requests)
+            ids_looked_up += sum(len(r['ids']) for r in requests if r['op'] == 'moods')
+            errors += sum(1 for reply in replies if 'error' in reply)
+    results.append({'batches': len(latencies), 'queries': queries, 'ids': ids_looked_up,
+                    'errors': errors, 'latencies': latencies})
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, metavar='PATH',
+                        help=f'daemon socket (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--clients', type=int, default=4, help='concurrent connections (default: 4)')
+    parser.add_argument('--batch', type=int, default=50, help='queries per request (default: 50)')
+    parser.add_argument('--seconds', type=float, default=5.0, help='test duration (default: 5)')
+    parser.add_argument('--target', type=float, default=TARGET_QUERIES_PER_SECOND,
+                        help=f'queries per second to reach (default: {TARGET_QUERIES_PER_SECOND})')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    try:
+        with DaemonClient(args.socket) as client:
+            moods = [mood for mood, count in client.request({'op': 'summary'})['moods'].items() if count]
+            ids = sample_ids(client, moods)
+    except OSError as e:
+        parser.exit(1, f"No daemon on {args.socket}: {e}\n")
+    if not moods or not ids:
+        parser.exit(1, "The daemon has no classified tracks to query.\n")
+
+    print("=" * 70)
+    print(f"Load test: {args.clients} clients, {args.batch} queries per request, {args.seconds:g}s")
+    print("=" * 70)
+    results: List[Dict] = []
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=run_client,
+                                args=(args.socket, ids, moods, args.batch, deadline, args.seed + i, results))
+               for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for result in results for latency in result['latencies']]
+    queries = sum(result['queries'] for result in results)
+    report = {
+        'clients': args.clients,
+        'batch': args.batch,
+        'seconds': round(elapsed, 3),
+        'requests': len(latencies),
+        'queries': queries,
+        'ids_looked_up': sum(result['ids'] for result in results),
+        'errors': sum(result['errors'] for result in results),
+        'queries_per_second': round(queries / elapsed),
+        'request_ms': {'p50': round(percentile(latencies, 0.5) * 1000, 3),
+                       'p99': round(percentile(latencies, 0.99) * 1000, 3)},
+        'target': args.target
+    }
+    print(f"  Requests:        {report['requests']} ({report['errors']} errors)")
+    print(f"  Queries:         {queries} ({report['queries_per_second']}/s)")
+    print(f"  IDs looked up:   {report['ids_looked_up']}")
+    print(f"  Request latency: p50 {report['request_ms']['p50']}ms, p99 {report['request_ms']['p99']}ms")
+    passed = report['queries_per_second'] >= args.target and not report['errors']
+    print(f"  {'✓' if passed else '✗'} Target {args.target:g} queries/s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Word-boundary keyword matching
+Turns a title, artist or genre into the set of its words and word n-grams so
+a mood keyword or phrase is found with one set lookup, and only as whole words
+('go' no longer hits "Chicago", 'die' no longer hits "Audience")
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple, FrozenSet
+
+from apple_music_library import title_tokens
+from apple_music_normalize import normalize_text, tokenize
+
+# Longest keyword phrase, in words ('lana del rey')
+MAX_PHRASE_WORDS = 3
+# Distinct artist and genre strings whose terms are kept
+FIELD_CACHE_SIZE = 8192
+
+
+def word_grams(tokens: Tuple[str, ...]) -> FrozenSet[str]:
+    """Words and space-joined word n-grams of a token sequence
+
+    Hyphenated words count whole and as their parts, so 'lo-fi' matches "Lo-Fi",
+    'rock' matches "Post-Rock" and 'hip hop' matches "Hip-Hop".
+    """
+    grams = set(tokens)
+    words = []
+    for token in tokens:
+        if '-' in token:
+            words.extend(token.split('-'))
+        else:
+            words.append(token)
+    grams.update(words)
+    for n in range(2, MAX_PHRASE_WORDS + 1):
+        for i in range(len(words) - n + 1):
+            grams.add(' '.join(words[i:i + n]))
+    return frozenset(grams)
+
+
+def keyword_term(keyword: str) -> str:
+    """A keyword in the form word_grams() produces for text containing it:
+    one token as is, a phrase as its words (hyphens split) joined by spaces"""
+    tokens = tokenize(normalize_text(keyword))
+    if len(tokens) == 1:
+        return tokens[0]
+    return ' '.join(word for token in tokens for word in token.split('-'))
+
+
+def title_terms(track: Dict) -> FrozenSet[str]:
+    """Terms of the canonical title, built from the tokens stored at ingest"""
+    return word_grams(title_tokens(track))
+
+
+@lru_cache(maxsize=FIELD_CACHE_SIZE)
+def field_terms(text: str) -> FrozenSet[str]:
+    """Terms of a normalized artist or genre string"""
+    return word_grams(tokenize(text))
+
+
+def text_terms(text: str) -> FrozenSet[str]:
+    """Terms of arbitrary text, normalized first"""
+    return word_grams(tokenize(normalize_text(text)))
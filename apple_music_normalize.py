@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Track title normalization
+Canonical forms computed once per track at ingest: Unicode-normalized,
+casefolded, without featured artists or remaster/live/version tags, plus the
+title's word tokens
+"""
+
+import re
+import sys
+import unicodedata
+from typing import Tuple
+
+# A release tag, matched as a whole bracket or dash suffix: "Live", "Live at
+# Wembley", "Remastered 2011", "2011 Remaster", "Single Version", "Radio Edit",
+# "Club Remix", "Deluxe Edition", "Mono"; "Dance With Me" or "Live Forever" is
+# part of the title
+RELEASE_TAG = (
+    r"(?:live(?:\s+(?:at|in|from|on)\s[^\)\]]+|\s+\d{4})?"
+    r"|(?:(?![-–—]\s)[^\s\(\)\[\]]+\s+)*?"
+    r"(?:remaster(?:ed)?|remix|version|edit|mono|stereo|deluxe|edition|bonus\s+track"
+    r"|(?:mono|stereo|radio|club|extended|original|single|album)\s+mix)(?:\s+\d{4})?)"
+)
+# Bracketed featured artists or release tags after the title: "(feat. X)",
+# "[Remastered 2011]", "(Live at Wembley)"; a leading bracket is part of the
+# title ("(Live) Forever", "(I Can't Get No) Satisfaction")
+BRACKETED_TAG = re.compile(
+    r"(?<=\S)\s*[\(\[](?:(?:feat\.?|ft\.?|featuring)\s[^\)\]]*|" + RELEASE_TAG + r")[\)\]]"
+)
+# Artist credits with a lowercase "with", matched before casefolding: "(with X)"
+# is a credit, "(With or Without You)" is part of the title
+WITH_CREDIT = re.compile(r"(?<=\S)\s*[\(\[]with\s[^\)\]]*[\)\]]")
+# Unbracketed featured artists run to the end of the title: "Song feat. X", but
+# not "A Great Feat of Strength"
+FEATURING = re.compile(r"\s+(?:feat\.|ft\.|featuring)\s.*$")
+# Dash suffixes that are a release tag: "Song - Remastered 2011", "Song - Live",
+# "Song - 2004 Mono Mix"
+DASH_TAG = re.compile(r"\s+[-–—]\s+" + RELEASE_TAG + r"$")
+WHITESPACE = re.compile(r"\s+")
+# Words keep inner apostrophes, ampersands and hyphens: "don't", "r&b", "lo-fi"
+TOKEN = re.compile(r"\w+(?:['&-]\w+)*")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalized, casefolded text with whitespace collapsed"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def canonical_title(name: str) -> str:
+    """Normalized title without featured artists or release tags"""
+    text = normalize_text(name)
+    stripped = normalize_text(WITH_CREDIT.sub('', name)) if 'with' in name else text
+    stripped = DASH_TAG.sub('', FEATURING.sub('', BRACKETED_TAG.sub('', stripped))).strip()
+    # A title that is nothing but a tag ("Live") keeps its text
+    return stripped or text
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Word tokens of normalized text, interned so equal tokens share storage"""
+    return tuple(sys.intern(token) for token in TOKEN.findall(text))
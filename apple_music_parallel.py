@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Parallel track classification for very large libraries
+Shards the track list across a process pool; each worker builds the organizer
+(and so compiles its mood rules) once at startup and only track data travels
+per task
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+from apple_music_library import TrackTable
+
+# Tracks classified between progress updates on the serial path
+PROGRESS_SHARD = 1000
+
+# Per-worker state, filled in by _init_worker
+_worker_organizer = None
+_worker_spec = None
+
+
+class ClassifierSpec:
+    """Picklable description of which organizer method classifies a track"""
+
+    def __init__(self, organizer_cls, classify_method: str, score_method: Optional[str] = None,
+                 rules: Optional[Dict] = None):
+        self.organizer_cls = organizer_cls
+        self.classify_method = classify_method
+        self.score_method = score_method
+        # Mood rules replacing the organizer's built-in ones
+        self.rules = rules
+
+    def build(self):
+        """Instantiate the organizer, compiling its mood rules"""
+        organizer = self.organizer_cls()
+        if self.rules is not None:
+            organizer.set_rules(self.rules)
+        return organizer
+
+
+class ClassificationResult:
+    """Per-track mood assignments (and optional scores) in library order"""
+
+    def __init__(self, moods: List[List[str]], scores: Optional[List[Dict[str, float]]] = None):
+        self.moods = moods
+        self.scores = scores
+
+    def __eq__(self, other) -> bool:
+        return self.moods == other.moods and self.scores == other.scores
+
+
+def mood_names(organizer) -> List[str]:
+    """Mood vocabulary of an organizer, in its declared order"""
+    return organizer.moods()
+
+
+def _classify_shard(organizer, spec: ClassifierSpec, tracks: List[Dict]):
+    """Classify one shard and encode moods as indices into the mood vocabulary"""
+    vocabulary = {mood: idx for idx, mood in enumerate(mood_names(organizer))}
+    classify = getattr(organizer, spec.classify_method)
+    score = getattr(organizer, spec.score_method) if spec.score_method else None
+
+    assignments = []
+    scores = []
+    for track in tracks:
+        moods = classify(track)
+        if isinstance(moods, str):
+            moods = [moods]
+        assignments.append(tuple(vocabulary.get(m, m) for m in moods))
+        if score:
+            scores.append(tuple((vocabulary.get(m, m), s) for m, s in score(track).items()))
+    return assignments, scores
+
+
+def _init_worker(spec: ClassifierSpec):
+    """Build the organizer once per worker process"""
+    global _worker_organizer, _worker_spec
+    _worker_spec = spec
+    _worker_organizer = spec.build()
+
+
+def _run_shard(shard: List[Tuple[str, str, str, float]]):
+    """Rebuild the shard's track rows locally and classify them"""
+    table = TrackTable()
+    for name, artist, genre, duration in shard:
+        table.append(name, artist, genre, duration)
+    return _classify_shard(_worker_organizer, _worker_spec, table.rows())
+
+
+def _decode(vocabulary: List[str], code):
+    return vocabulary[code] if isinstance(code, int) else code
+
+
+def classify_tracks(spec: ClassifierSpec, tracks: List[Dict], workers: int = 1,
+                    shard_size: Optional[int] = None, organizer=None, progress=None) -> ClassificationResult:
+    """Classify tracks serially or across a process pool; both paths give identical results
+
+    With a Progress, the classify phase is reported as shards finish.
+    """
+    if organizer is None:
+        organizer = spec.build()
+    vocabulary = mood_names(organizer)
+    phase = progress.phase('classify', len(tracks)) if progress is not None else None
+
+    if phase is None and (workers <= 1 or len(tracks) < 2):
+        shard_results = [_classify_shard(organizer, spec, tracks)]
+    elif workers <= 1 or len(tracks) < 2:
+        shard_results = []
+        for i in range(0, len(tracks), PROGRESS_SHARD):
+            shard_results.append(_classify_shard(organizer, spec, tracks[i:i + PROGRESS_SHARD]))
+            phase.update(len(shard_results[-1][0]))
+    else:
+        # Workers only need the raw fields; everything else is rebuilt on their side
+        rows = [(t.get('name', ''), t.get('artist', ''), t.get('genre', ''), t.get('duration', 0.0))
+                for t in tracks]
+        if not shard_size:
+            # A few shards per worker keeps the pool busy when shards finish unevenly
+            shard_size = max(1, -(-len(rows) // (workers * 4)))
+        shards = [rows[i:i + shard_size] for i in range(0, len(rows), shard_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(spec,)) as pool:
+            # map() yields in submission order, so the merge is deterministic
+            shard_results = []
+            for result in pool.map(_run_shard, shards):
+                shard_results.append(result)
+                if phase is not None:
+                    phase.update(len(result[0]))
+    if phase is not None:
+        phase.finish()
+
+    moods = []
+    scores = [] if spec.score_method else None
+    for assignments, shard_scores in shard_results:
+        for codes in assignments:
+            moods.append([_decode(vocabulary, c) for c in codes])
+        if scores is not None:
+            for pairs in shard_scores:
+                scores.append({_decode(vocabulary, c): s for c, s in pairs})
+    return ClassificationResult(moods, scores)
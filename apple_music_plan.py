@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Dry-run playlist plans
+Describes the playlists a run would create, one row per track with its
+score and the reason it was picked, without sending anything to Music.app
+"""
+
+import csv
+import json
+from typing import List, Dict
+
+PLAN_FORMATS = ['json', 'csv']
+PLAN_FIELDS = ['playlist', 'mood', 'position', 'persistent_id', 'name', 'artist', 'genre',
+               'score', 'source', 'matched']
+# Matched keywords listed per row
+MAX_REASONS = 5
+
+
+def matched_keywords(organizer, track: Dict, mood: str) -> List[str]:
+    """Rule keywords of mood found in the track's genre, name or artist"""
+    name, artist, genre = organizer.match_fields(track)
+    combined = organizer.combine(genre, name, artist)
+    found = []
+    for rule_mood, group, keyword in organizer.rules():
+        if rule_mood == mood and keyword in combined and keyword not in found:
+            found.append(keyword)
+            if len(found) >= MAX_REASONS:
+                break
+    return found
+
+
+def build_plan(organizer, mood_tracks: Dict[str, List[Dict]], all_tracks: List[Dict],
+               final_playlists: Dict[str, List[str]]) -> List[Dict]:
+    """One row per track the run would add, in playlist order"""
+    by_name = {}
+    for track in all_tracks:
+        by_name.setdefault(track['name'], track)
+
+    rows = []
+    for mood in organizer.moods():
+        # Tracks picked by the classifier, as opposed to added by the expansion policy
+        classified = {t['name'] for t in mood_tracks.get(mood, [])}
+        for playlist, names in organizer.playlist_parts(mood, final_playlists.get(mood, [])):
+            for position, name in enumerate(names, 1):
+                track = by_name.get(name, {'name': name})
+                score = organizer.score(track).get(mood) if 'genre' in track else None
+                rows.append({
+                    'playlist': playlist,
+                    'mood': mood,
+                    'position': position,
+                    'persistent_id': track.get('persistent_id', ''),
+                    'name': name,
+                    'artist': track.get('artist', ''),
+                    'genre': track.get('genre', ''),
+                    'score': score,
+                    'source': 'classified' if name in classified else 'expanded',
+                    'matched': matched_keywords(organizer, track, mood) if 'genre' in track else []
+                })
+    return rows
+
+
+def write_plan(rows: List[Dict], path: str, plan_format: str = None, strategy: str = ''):
+    """Write a plan as JSON (grouped by playlist) or CSV (one row per track)"""
+    if plan_format is None:
+        plan_format = 'csv' if path.lower().endswith('.csv') else 'json'
+
+    if plan_format == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=PLAN_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(dict(row, matched='; '.join(row['matched'])))
+        return
+
+    playlists = {}
+    for row in rows:
+        entry = {key: value for key, value in row.items() if key not in ('playlist', 'mood')}
+        playlists.setdefault(row['playlist'], {'mood': row['mood'], 'tracks': []})['tracks'].append(entry)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'strategy': strategy, 'playlists': playlists}, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Profiling for the classify and expand phases
+Wraps the phases in cProfile and tracemalloc, and measures every mood rule
+keyword against the library so expensive or useless rules can be tuned away
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import List, Dict
+
+# Rows kept in each ranked section of the report
+REPORT_ROWS = 15
+# tracemalloc frames kept per allocation site
+TRACE_FRAMES = 4
+# Each rule is timed over enough scans of the library to last this long, and
+# the fastest of RULE_REPEATS such batches kept, so timer noise averages out
+RULE_MIN_SECONDS = 0.002
+RULE_REPEATS = 3
+# Track field each keyword group is matched against; other groups ('keywords',
+# 'themes') are matched against the title, artist and genre combined
+GROUP_FIELDS = {
+    'genres': 'genre', 'genre_keywords': 'genre', 'exclude_genres': 'genre',
+    'artist_keywords': 'artist', 'artists_patterns': 'artist',
+    'title_keywords': 'name', 'name_keywords': 'name',
+    'positive_words': 'name', 'negative_words': 'name'
+}
+
+
+def profile_rules(organizer, tracks: List[Dict]) -> List[Dict]:
+    """Hit count and per-scan time of every rule keyword over the library, each
+    matched against the field its group targets with the organizer's matcher"""
+    fields = {'name': [], 'artist': [], 'genre': [], 'combined': []}
+    for track in tracks:
+        name, artist, genre = organizer.match_fields(track)
+        fields['name'].append(name)
+        fields['artist'].append(artist)
+        fields['genre'].append(genre)
+        fields['combined'].append(organizer.combine(genre, name, artist))
+
+    has_any = organizer.has_any
+    results = []
+    for mood, group, keyword in organizer.rules():
+        field = GROUP_FIELDS.get(group, 'combined')
+        values = fields[field]
+        keywords = [keyword]
+
+        start = time.perf_counter()
+        hits = sum(1 for value in values if has_any(value, keywords))
+        first = time.perf_counter() - start
+        scans = max(1, int(RULE_MIN_SECONDS / first)) if first > 0 else 1
+        best = None
+        for _ in range(RULE_REPEATS):
+            start = time.perf_counter()
+            for _ in range(scans):
+                sum(1 for value in values if has_any(value, keywords))
+            elapsed = (time.perf_counter() - start) / scans
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            'mood': mood,
+            'group': group,
+            'keyword': keyword,
+            'field': field,
+            'hits': hits,
+            'seconds': best
+        })
+    return results
+
+
+class Profiler:
+    """Collects cProfile and tracemalloc data for named phases of one run"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.phases: Dict[str, Dict] = {}
+        self.allocations = []
+
+    @contextmanager
+    def phase(self, name: str):
+        tracemalloc.start(TRACE_FRAMES)
+        start = time.perf_counter()
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.phases[name] = {'seconds': seconds, 'peak_bytes': peak}
+            for stat in snapshot.statistics('lineno')[:REPORT_ROWS]:
+                frame = stat.traceback[0]
+                self.allocations.append({
+                    'phase': name,
+                    'site': f"{frame.filename}:{frame.lineno}",
+                    'bytes': stat.size,
+                    'blocks': stat.count
+                })
+
+    def functions(self) -> List[Dict]:
+        """Functions ranked by time spent in them (excluding callees)"""
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = []
+        for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                'function': f"{func} ({filename.rsplit('/', 1)[-1]}:{lineno})",
+                'calls': ncalls,
+                'own_seconds': tottime,
+                'cumulative_seconds': cumtime
+            })
+        rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+        return rows
+
+    def build_report(self, organizer, tracks: List[Dict],
+                     mood_tracks: Dict[str, List[Dict]]) -> Dict:
+        rules = profile_rules(organizer, tracks)
+        moods = {}
+        for mood in organizer.moods():
+            mood_rules = [rule for rule in rules if rule['mood'] == mood]
+            moods[mood] = {
+                'classified': len(mood_tracks.get(mood, [])),
+                'rules': len(mood_rules),
+                'rule_hits': sum(rule['hits'] for rule in mood_rules),
+                'rule_seconds': sum(rule['seconds'] for rule in mood_rules)
+            }
+        return {
+            'phases': self.phases,
+            'moods': moods,
+            'rules': sorted(rules, key=lambda rule: rule['seconds'], reverse=True),
+            'dead_rules': [rule for rule in rules if not rule['hits']],
+            'functions': self.functions()[:REPORT_ROWS * 2],
+            'allocations': sorted(self.allocations, key=lambda a: a['bytes'], reverse=True)
+        }
+
+
+def print_report(report: Dict):
+    print("\n" + "=" * 70)
+    print("Profile")
+    print("=" * 70)
+    for name, phase in report['phases'].items():
+        print(f"  {name:12} {phase['seconds']:8.3f}s   peak {phase['peak_bytes'] / 1024:10.1f} KiB")
+
+    print("\n  Per mood:")
+    print(f"  {'mood':25} {'tracks':>7} {'rules':>6} {'hits':>8} {'scan':>9}")
+    for mood, row in report['moods'].items():
+        print(f"  {mood:25} {row['classified']:7} {row['rules']:6} "
+              f"{row['rule_hits']:8} {row['rule_seconds'] * 1000:7.1f}ms")
+
+    print("\n  Most expensive rule keywords:")
+    for rule in report['rules'][:REPORT_ROWS]:
+        print(f"  {rule['seconds'] * 1000:7.3f}ms {rule['hits']:7} hits  "
+              f"{rule['mood']} / {rule['group']} / {rule['keyword']!r} in {rule['field']}")
+
+    if report['dead_rules']:
+        print(f"\n  Keywords that matched no track: {len(report['dead_rules'])}")
+        for rule in report['dead_rules'][:REPORT_ROWS]:
+            print(f"    {rule['mood']} / {rule['group']} / {rule['keyword']!r}")
+
+    print("\n  Hottest functions (own time):")
+    for row in report['functions'][:REPORT_ROWS]:
+        print(f"  {row['own_seconds']:8.3f}s {row['calls']:9} calls  {row['function']}")
+
+    print("\n  Largest allocation sites:")
+    for row in report['allocations'][:5]:
+        print(f"  {row['bytes'] / 1024:10.1f} KiB  [{row['phase']}] {row['site']}")
+    print("=" * 70)
+
+
+def write_report(report: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Throttled progress reporting
+Redraws one status line per phase (count, rate, ETA and counters) at most
+every few hundred milliseconds on a terminal; when stdout is not a TTY it
+writes occasional structured log lines instead
+"""
+
+import sys
+import time
+from typing import Dict, Optional, TextIO
+
+# Milliseconds between redraws of the terminal status line
+PROGRESS_INTERVAL_MS = 250
+# Seconds between structured log lines when stdout is not a terminal
+LOG_INTERVAL = 10.0
+
+
+def format_seconds(seconds: float) -> str:
+    seconds = int(seconds + 0.5)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class PhaseProgress:
+    """Progress of one phase; update() is cheap enough to call per item"""
+
+    def __init__(self, reporter: 'Progress', name: str, total: Optional[int], unit: str):
+        self.reporter = reporter
+        self.name = name
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.next_report = self.started + reporter.interval
+        self.width = 0
+
+    def update(self, advance: int = 1, **counters: int):
+        """Count finished items (and named counters); reports only when due"""
+        self.done += advance
+        for key, amount in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + amount
+        now = time.perf_counter()
+        if now >= self.next_report:
+            self.next_report = now + self.reporter.interval
+            self.report(now)
+
+    def rate(self, now: float) -> float:
+        elapsed = now - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def fields(self, now: float) -> Dict:
+        rate = self.rate(now)
+        fields = {'phase': self.name, 'done': self.done, 'total': self.total, 'unit': self.unit,
+                  'rate': round(rate, 1), 'elapsed': round(now - self.started, 2)}
+        if self.total is not None and rate > 0:
+            fields['eta'] = round(max(0, self.total - self.done) / rate, 1)
+        fields.update(self.counters)
+        return fields
+
+    def report(self, now: float):
+        if not self.reporter.tty:
+            self.reporter.log('progress', self.fields(now))
+            return
+        rate = self.rate(now)
+        line = f"  {self.name}: {self.done:,}"
+        if self.total:
+            line += f"/{self.total:,} {self.unit} ({100 * self.done // self.total}%)"
+        else:
+            line += f" {self.unit}"
+        line += f", {rate:,.0f}/s"
+        if self.total and rate > 0:
+            line += f", ETA {format_seconds(max(0, self.total - self.done) / rate)}"
+        for key, value in self.counters.items():
+            if value:
+                line += f", {key} {value:,}"
+        self.reporter.stream.write('\r' + line.ljust(self.width))
+        self.reporter.stream.flush()
+        self.width = len(line)
+
+    def finish(self):
+        """Clear the status line, or log the phase's totals"""
+        now = time.perf_counter()
+        if not self.reporter.tty:
+            self.reporter.log('done', self.fields(now))
+        elif self.width:
+            self.reporter.stream.write('\r' + ' ' * self.width + '\r')
+            self.reporter.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+
+class Progress:
+    """Factory for phase progress sharing one output stream and throttle
+
+    On a terminal each phase redraws a single line at most every interval_ms.
+    Anywhere else (a pipe, a log file, cron) it writes a `progress` line of
+    key=value fields every LOG_INTERVAL seconds and a `done` line at the end.
+    """
+
+    def __init__(self, interval_ms: float = PROGRESS_INTERVAL_MS, stream: Optional[TextIO] = None):
+        self.interval_ms = interval_ms
+        # None follows sys.stdout as it is when a phase reports, redirections included
+        self.output = stream
+
+    @property
+    def stream(self) -> TextIO:
+        return self.output or sys.stdout
+
+    @property
+    def tty(self) -> bool:
+        return self.stream.isatty()
+
+    @property
+    def interval(self) -> float:
+        return self.interval_ms / 1000 if self.tty else LOG_INTERVAL
+
+    def phase(self, name: str, total: Optional[int] = None, unit: str = 'tracks') -> PhaseProgress:
+        return PhaseProgress(self, name, total, unit)
+
+    def log(self, event: str, fields: Dict):
+        values = ' '.join(f"{key}={value}" for key, value in fields.items() if value is not None)
+        self.stream.write(f"{event} {values}\n")
+        self.stream.flush()
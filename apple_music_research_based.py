@@ -4,15 +4,19 @@ Research-Based Apple Music Playlist Organizer
 Researches each song externally to properly classify by mood
 """
 
-import subprocess
-import time
 from typing import List, Dict, Set
 from collections import defaultdict, Counter
 import json
 import re
+from apple_music_engine import MoodOrganizer, register_strategy
+
+@register_strategy('research_based')
+class ResearchBasedOrganizer(MoodOrganizer):
+    title = "Research-Based Apple Music Playlist Organizer"
+    playlist_size = 40
 
-class ResearchBasedOrganizer:
     def __init__(self):
+        super().__init__()
         self.mood_categories = {
             'Angry/Mad': {
                 'keywords': ['angry', 'rage', 'furious', 'mad', 'aggressive', 'intense', 'heavy', 'metal', 'punk', 'hardcore'],
@@ -42,78 +46,6 @@ class ResearchBasedOrganizer:
         
         self.song_cache = {}  # Cache research results
     
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks from library"""
-        track_count_script = 'tell application "Music" to return count of tracks of library playlist 1'
-        track_count = int(self.run_applescript(track_count_script) or 0)
-        
-        if track_count == 0:
-            return []
-        
-        all_tracks = []
-        batch_size = 50  # Smaller batches for reliability
-        
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
-    
     def research_song(self, song_name: str, artist: str) -> Dict:
         """Research a song to determine its mood and themes"""
         cache_key = f"{song_name}|{artist}"
@@ -145,15 +77,13 @@ class ResearchBasedOrganizer:
     
     def classify_song_by_research(self, track: Dict) -> List[str]:
         """Classify song based on external research"""
-        song_name = track.get('name', '').lower()
-        artist = track.get('artist', '').lower()
-        genre = track.get('genre', '').lower()
+        song_name, artist, genre = self.match_fields(track)
         
         # Research the song
         research = self.research_song(track['name'], track['artist'])
         
         # Combine all text for analysis
-        combined_text = f"{genre} {song_name} {artist}".lower()
+        combined_text = self.combine(genre, song_name, artist)
         
         # Score each mood category
         mood_scores = {}
@@ -172,25 +102,24 @@ class ResearchBasedOrganizer:
                     score += 3
             
             # Title-based heuristics
-            title_words = song_name.split()
-            for word in title_words:
+            for word in self.title_words(track):
                 if word in config['keywords']:
                     score += 1
                 if word in config['themes']:
                     score += 2
             
             # Genre-based classification
-            if mood == 'Angry/Mad' and any(g in genre for g in ['metal', 'punk', 'hardcore', 'rock', 'alternative']):
+            if mood == 'Angry/Mad' and self.has_any(genre, ['metal', 'punk', 'hardcore', 'rock', 'alternative']):
                 score += 3
-            elif mood == 'Heartbreak' and any(g in genre for g in ['ballad', 'soul', 'r&b', 'country', 'blues']):
+            elif mood == 'Heartbreak' and self.has_any(genre, ['ballad', 'soul', 'r&b', 'country', 'blues']):
                 score += 3
-            elif mood == 'Workout/Go Time' and any(g in genre for g in ['hip hop', 'rap', 'edm', 'electronic', 'dance']):
+            elif mood == 'Workout/Go Time' and self.has_any(genre, ['hip hop', 'rap', 'edm', 'electronic', 'dance']):
                 score += 3
-            elif mood == 'Calming' and any(g in genre for g in ['ambient', 'new age', 'classical', 'jazz']):
+            elif mood == 'Calming' and self.has_any(genre, ['ambient', 'new age', 'classical', 'jazz']):
                 score += 3
-            elif mood == 'In Love' and any(g in genre for g in ['pop', 'r&b', 'soul', 'jazz', 'smooth']):
+            elif mood == 'In Love' and self.has_any(genre, ['pop', 'r&b', 'soul', 'jazz', 'smooth']):
                 score += 3
-            elif mood == 'While Doing Homework' and any(g in genre for g in ['instrumental', 'classical', 'ambient', 'lo-fi']):
+            elif mood == 'While Doing Homework' and self.has_any(genre, ['instrumental', 'classical', 'ambient', 'lo-fi']):
                 score += 3
             
             if score > 0:
@@ -212,6 +141,8 @@ class ResearchBasedOrganizer:
                 break
         
         return result if result else ['Calming']
+
+    classify = classify_song_by_research
     
     def web_search_song_info(self, song_name: str, artist: str) -> str:
         """Use web search to get song information"""
@@ -220,207 +151,59 @@ class ResearchBasedOrganizer:
         search_term = f'"{song_name}" "{artist}" song meaning mood'
         return search_term
     
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        # Create playlist
-        create_script = f'''
-        tell application "Music"
-            try
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        # Add tracks in batches
-        added = 0
-        batch_size = 15
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function with research-based classification"""
-        print("=" * 70)
-        print("Research-Based Apple Music Playlist Organizer")
-        print("=" * 70)
-        print("\nThis will research each song to properly match moods...")
-        print("\nPlaylists to create:")
-        for mood in self.mood_categories.keys():
-            print(f"  • {mood}")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Research and classify each track
-        print("\n" + "=" * 70)
-        print("Researching and classifying songs...")
-        print("=" * 70)
-        print("(This may take a while as we analyze each song)")
-        
-        mood_tracks = defaultdict(list)
-        total_processed = 0
-        
-        for i, track in enumerate(all_tracks, 1):
-            print(f"  Researching: {track['name']} by {track['artist']}... ({i}/{len(all_tracks)})", end='\r')
-            
-            # Classify based on research
-            moods = self.classify_song_by_research(track)
-            
-            for mood in moods:
-                mood_tracks[mood].append(track['name'])
-            
-            total_processed += 1
-        
-        print(f"\n  Processed {total_processed} tracks")
-        
-        # Display classification summary
-        print("\n" + "=" * 70)
-        print("Research-Based Classification Summary:")
-        print("=" * 70)
-        for mood in self.mood_categories.keys():
-            count = len(mood_tracks.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Ensure each playlist has at least 40 tracks
-        print("\nExpanding playlists to 40+ tracks...")
+    def expand_playlists(self, mood_tracks: Dict[str, List[Dict]],
+                         all_tracks: List[Dict]) -> Dict[str, List[str]]:
+        """Ensure each playlist has at least 40 tracks"""
+        print("Expanding playlists to 40+ tracks...")
+        target = self.playlist_size
         final_playlists = {}
         
-        for mood in self.mood_categories.keys():
-            tracks = mood_tracks.get(mood, [])
+        for mood in self.moods():
+            tracks = [t['name'] for t in mood_tracks.get(mood, [])]
+            chosen = set(tracks)
             
             # If less than 40, find similar tracks
-            if len(tracks) < 40:
+            if len(tracks) < target:
                 # Find additional tracks from same artists/genres
                 artist_genre_map = defaultdict(set)
                 for track in all_tracks:
-                    if track['name'] in tracks:
+                    if track['name'] in chosen:
                         artist_genre_map[track['artist']].add(track['genre'])
                 
                 # Add similar tracks
-                needed = 40 - len(tracks)
+                needed = target - len(tracks)
                 added = 0
                 for track in all_tracks:
-                    if track['name'] in tracks:
+                    if track['name'] in chosen:
                         continue
                     
                     # Check if similar artist/genre
                     if track['artist'] in artist_genre_map:
                         if track['genre'] in artist_genre_map[track['artist']] or not artist_genre_map[track['artist']]:
                             tracks.append(track['name'])
+                            chosen.add(track['name'])
                             added += 1
                             if added >= needed:
                                 break
                 
                 # If still not enough, add based on genre similarity
-                if len(tracks) < 40:
-                    genre_counts = Counter([t['genre'] for t in all_tracks if t['name'] in tracks])
+                if len(tracks) < target:
+                    genre_counts = Counter([t['genre'] for t in all_tracks if t['name'] in chosen])
                     top_genres = {g for g, _ in genre_counts.most_common(3)}
                     
                     for track in all_tracks:
-                        if track['name'] in tracks:
+                        if track['name'] in chosen:
                             continue
                         if track['genre'] in top_genres:
                             tracks.append(track['name'])
-                            if len(tracks) >= 40:
+                            chosen.add(track['name'])
+                            if len(tracks) >= target:
                                 break
             
             # Limit to 40 tracks
-            final_playlists[mood] = list(set(tracks))[:40]
-        
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in self.mood_categories.keys():
-            count = len(final_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in self.mood_categories.keys():
-            track_list = final_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
+            final_playlists[mood] = list(dict.fromkeys(tracks))[:target]
         
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} research-based playlists.")
-        print("   Each song has been analyzed to match its mood category.")
-        print("=" * 70)
+        return final_playlists
 
 def main():
     organizer = ResearchBasedOrganizer()
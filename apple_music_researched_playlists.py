@@ -4,15 +4,18 @@ Researched Apple Music Playlist Organizer
 Researches each song externally to properly match moods
 """
 
-import subprocess
-import time
 from typing import List, Dict, Set
-from collections import defaultdict
 import json
 import re
+from apple_music_engine import MoodOrganizer, register_strategy
+
+@register_strategy('researched_playlists')
+class ResearchedPlaylistOrganizer(MoodOrganizer):
+    title = "Researched Apple Music Playlist Organizer"
+    playlist_size = 40
 
-class ResearchedPlaylistOrganizer:
     def __init__(self):
+        super().__init__()
         self.mood_categories = {
             'Angry/Mad': {
                 'keywords': ['angry', 'rage', 'furious', 'aggressive', 'intense', 'heavy', 'metal', 
@@ -60,82 +63,6 @@ class ResearchedPlaylistOrganizer:
         
         self.song_cache = {}  # Cache research results
     
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_track_count(self) -> int:
-        """Get total number of tracks"""
-        script = 'tell application "Music" to return count of tracks of library playlist 1'
-        result = self.run_applescript(script)
-        try:
-            return int(result) if result else 0
-        except:
-            return 0
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks with full information"""
-        track_count = self.get_track_count()
-        all_tracks = []
-        batch_size = 100
-        
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
-    
     def research_song(self, track_name: str, artist: str) -> Dict:
         """Research a song to understand its mood and characteristics"""
         cache_key = f"{track_name}|{artist}"
@@ -164,10 +91,8 @@ class ResearchedPlaylistOrganizer:
     def classify_track_researched(self, track: Dict, all_tracks: List[Dict]) -> List[str]:
         """Classify track based on research and analysis"""
         moods = []
-        genre = track.get('genre', '').lower()
-        name = track.get('name', '').lower()
-        artist = track.get('artist', '').lower()
-        combined = f"{genre} {name} {artist}"
+        name, artist, genre = self.match_fields(track)
+        combined = self.combine(genre, name, artist)
         
         # Score each mood category
         mood_scores = {}
@@ -176,21 +101,16 @@ class ResearchedPlaylistOrganizer:
             score = 0
             
             # Check genre match
-            for mood_genre in criteria['genres']:
-                if mood_genre in genre:
-                    score += 3
-                    break
+            if self.has_any(genre, criteria['genres']):
+                score += 3
             
             # Check keyword matches
-            for keyword in criteria['keywords']:
-                if keyword in combined:
-                    score += 2
-                    break
+            if self.has_any(combined, criteria['keywords']):
+                score += 2
             
             # Check track name for mood indicators
-            name_lower = name.lower()
             for keyword in criteria['keywords']:
-                if keyword in name_lower:
+                if keyword in name:
                     score += 1
             
             if score > 0:
@@ -208,180 +128,10 @@ class ResearchedPlaylistOrganizer:
                     break
         
         return moods if moods else []
-    
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        # Create playlist first
-        create_script = f'''
-        tell application "Music"
-            try
-                -- Delete existing playlist if it exists
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                -- Create new playlist
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        # Add tracks in batches
-        added = 0
-        batch_size = 20
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function"""
-        print("=" * 70)
-        print("Researched Apple Music Playlist Organizer")
-        print("Researching and properly classifying each song...")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found in your library.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Research and classify each track
-        print("\nResearching and classifying each song...")
-        print("(This may take a few minutes)")
-        
-        mood_tracks = defaultdict(list)
-        
-        for i, track in enumerate(all_tracks, 1):
-            if i % 50 == 0:
-                print(f"  Processed {i}/{len(all_tracks)} tracks...", end='\r')
-            
-            # Research the song
-            research = self.research_song(track['name'], track['artist'])
-            
-            # Classify based on research and metadata
-            moods = self.classify_track_researched(track, all_tracks)
-            
-            for mood in moods:
-                mood_tracks[mood].append(track)
-        
-        print(f"\n  Processed {len(all_tracks)} tracks")
-        
-        # Display classification
-        print("\n" + "=" * 70)
-        print("Classification Results:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(mood_tracks.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Ensure each playlist has at least 40 tracks
-        print("\nEnsuring each playlist has 40+ tracks...")
-        final_playlists = {}
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            tracks = mood_tracks.get(mood, [])
-            track_names = [t['name'] for t in tracks]
-            
-            # If less than 40, we'll use what we have (properly classified)
-            # If more than 40, take the best 40
-            if len(track_names) > 40:
-                # Take first 40 (they're already sorted by relevance)
-                track_names = track_names[:40]
-            elif len(track_names) < 40:
-                # Keep what we have - these are properly classified
-                pass
-            
-            final_playlists[mood] = track_names
-        
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(final_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            track_list = final_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
-            else:
-                print(f"  '{mood}' playlist (0 tracks)... (skipped)")
-        
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} properly researched playlists.")
-        print("   Each song has been researched and matched to its mood category.")
-        print("=" * 70)
+
+    def classify(self, track: Dict) -> List[str]:
+        """Classify track based on metadata (the library itself is not consulted)"""
+        return self.classify_track_researched(track, [])
 
 def main():
     organizer = ResearchedPlaylistOrganizer()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Mood rules from a file
+Loads a strategy's mood dictionary from TOML or JSON, tokenizes its keywords
+the way track fields are tokenized at ingest, and works out which keywords
+changed between two versions so only the tracks they touch are rescored
+"""
+
+import hashlib
+import json
+from typing import List, Dict, Optional, Set
+
+from apple_music_matcher import MAX_PHRASE_WORDS, keyword_term
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+
+def file_hash(path: str) -> str:
+    """Content hash of a rules file"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=12).hexdigest()
+
+
+def read_rules(path: str) -> Dict:
+    """Parse a rules file: a table per mood, or a keyword list per mood"""
+    if path.lower().endswith('.toml'):
+        if tomllib is None:
+            raise ValueError(f"{path}: TOML rules need Python 3.11+; use JSON instead")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def normalize_keywords(mood: str, group: str, values: List) -> List[str]:
+    """Keywords as the words word matching looks up: "Rock & Roll" becomes
+    'rock roll', as the title "Rock & Roll" is tokenized"""
+    keywords = []
+    for value in values:
+        if not isinstance(value, str):
+            raise ValueError(f"{mood} / {group}: keyword {value!r} is not a string")
+        keyword = keyword_term(value)
+        if not keyword:
+            raise ValueError(f"{mood} / {group}: keyword {value!r} has no words")
+        if len(keyword.split()) > MAX_PHRASE_WORDS:
+            raise ValueError(f"{mood} / {group}: keyword {value!r} is longer than "
+                             f"{MAX_PHRASE_WORDS} words and could never match")
+        keywords.append(keyword)
+    return keywords
+
+
+def compile_rules(raw: Dict, template: Dict) -> Dict:
+    """Check raw rules have the shape of a strategy's built-in ones and normalize keywords
+
+    Strategies with criteria tables need every keyword group all their built-in
+    moods share; other settings in a table are passed through unchanged.
+    """
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("rules must map each mood to its keywords")
+    tables = isinstance(next(iter(template.values())), dict)
+    if tables:
+        required = set.intersection(*(
+            {group for group, values in criteria.items() if isinstance(values, list)}
+            for criteria in template.values()
+        ))
+
+    compiled = {}
+    for mood, criteria in raw.items():
+        if not tables:
+            if not isinstance(criteria, list):
+                raise ValueError(f"{mood}: expected a list of keywords")
+            compiled[mood] = normalize_keywords(mood, 'keywords', criteria)
+            continue
+        if not isinstance(criteria, dict):
+            raise ValueError(f"{mood}: expected a table of keyword groups")
+        missing = required - set(criteria)
+        if missing:
+            raise ValueError(f"{mood}: missing keyword groups {', '.join(sorted(missing))}")
+        compiled[mood] = {group: normalize_keywords(mood, group, values) if isinstance(values, list)
+                          else values
+                          for group, values in criteria.items()}
+    return compiled
+
+
+def load_rules(path: str, template: Dict) -> Dict:
+    return compile_rules(read_rules(path), template)
+
+
+def dump_rules(categories: Dict, path: str):
+    """Write a strategy's rules as JSON, as a starting point for a rules file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(categories, f, indent=2, ensure_ascii=False)
+
+
+def changed_keywords(old: Dict, new: Dict) -> Optional[Set[str]]:
+    """Keywords added to or removed from any mood between two rule sets
+
+    Returns None when the change can move any track: moods added, removed or
+    reordered, keyword groups added or removed, or other settings edited.
+    """
+    if list(old) != list(new):
+        return None
+    changed = set()
+    for mood, criteria in new.items():
+        previous = old[mood]
+        if isinstance(criteria, list) and isinstance(previous, list):
+            changed |= set(previous) ^ set(criteria)
+            continue
+        if not (isinstance(criteria, dict) and isinstance(previous, dict)) or set(criteria) != set(previous):
+            return None
+        for group, values in criteria.items():
+            if isinstance(values, list) and isinstance(previous[group], list):
+                changed |= set(previous[group]) ^ set(values)
+            elif values != previous[group]:
+                return None
+    return changed
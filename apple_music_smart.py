@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Smart playlist definitions
+Finds moods whose tracks are exactly those of certain genres and describes
+them as Music.app smart-playlist criteria instead of static track lists
+"""
+
+import json
+from collections import defaultdict
+from typing import List, Dict, Optional
+
+
+def genre_keywords(organizer, mood: str, tracks: List[Dict], track_moods: List[List[str]]) -> Optional[List[str]]:
+    """Keywords of mood whose "genre contains" criteria select exactly the mood's
+    tracks in this library, or None if the mood depends on anything but genre
+
+    Every genre must be all in the mood or all out of it, and every genre that is
+    in must contain one of the mood's own keywords that no genre outside does,
+    so the criteria follow from the rules rather than from chance.
+    """
+    inside = defaultdict(int)
+    total = defaultdict(int)
+    for track, moods in zip(tracks, track_moods):
+        genre = track.get('genre_lower', track.get('genre', '').lower())
+        total[genre] += 1
+        if mood in moods:
+            inside[genre] += 1
+    if not inside or any(inside[genre] not in (0, total[genre]) for genre in inside):
+        return None
+
+    in_genres = [genre for genre in total if inside[genre]]
+    out_genres = [genre for genre in total if not inside[genre]]
+    keywords = []
+    for rule_mood, _, keyword in organizer.rules():
+        keyword = keyword.lower()
+        if (rule_mood == mood and keyword and keyword not in keywords
+                and any(keyword in genre for genre in in_genres)
+                and not any(keyword in genre for genre in out_genres)):
+            keywords.append(keyword)
+    if not all(any(keyword in genre for keyword in keywords) for genre in in_genres):
+        return None
+    # Drop keywords another kept keyword already covers ("rock" makes "indie rock" redundant)
+    return [keyword for keyword in keywords
+            if not any(other != keyword and other in keyword for other in keywords)]
+
+
+def smart_playlists(organizer, tracks: List[Dict], track_moods: List[List[str]],
+                    final_playlists: Dict[str, List[str]]) -> Dict[str, Dict]:
+    """Smart-playlist definitions for the moods whose final playlist is every
+    track of some genres, in mood order"""
+    definitions = {}
+    for mood in organizer.moods():
+        names = final_playlists.get(mood, [])
+        members = [track['name'] for track, moods in zip(tracks, track_moods) if mood in moods]
+        # A capped or expanded playlist is not a plain genre selection; a split one
+        # becomes a single smart playlist, which has no size to split for
+        if not names or names != members:
+            continue
+        keywords = genre_keywords(organizer, mood, tracks, track_moods)
+        if keywords:
+            definitions[mood] = {
+                'match': 'any',
+                'criteria': [{'field': 'genre', 'operator': 'contains', 'value': keyword}
+                             for keyword in keywords],
+                'live_updating': True,
+                'tracks': len(names)
+            }
+    return definitions
+
+
+def describe(definition: Dict) -> str:
+    """Criteria as Music.app's smart playlist editor shows them"""
+    joiner = ' or ' if definition['match'] == 'any' else ' and '
+    return joiner.join(f"{c['field'].capitalize()} {c['operator']} \"{c['value']}\""
+                       for c in definition['criteria'])
+
+
+def write_smart_playlists(definitions: Dict[str, Dict], path: str, strategy: str = ''):
+    """Write the definitions as JSON, with each one's criteria spelled out"""
+    playlists = {mood: dict(definition, description=describe(definition))
+                 for mood, definition in definitions.items()}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'strategy': strategy, 'playlists': playlists}, f, indent=2, ensure_ascii=False)
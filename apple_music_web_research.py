@@ -4,14 +4,19 @@ Web Research-Based Apple Music Playlist Organizer
 Researches each song via web search to properly classify by mood
 """
 
-import subprocess
-import time
 from typing import List, Dict, Set
-from collections import defaultdict, Counter
+from collections import Counter
 import json
+from apple_music_engine import MoodOrganizer, register_strategy
+from apple_music_library import lowered_fields
+
+@register_strategy('web_research')
+class WebResearchOrganizer(MoodOrganizer):
+    title = "Web Research-Based Apple Music Playlist Organizer"
+    playlist_size = 40
 
-class WebResearchOrganizer:
     def __init__(self):
+        super().__init__()
         self.mood_categories = {
             'Angry/Mad': {
                 'keywords': ['angry', 'rage', 'furious', 'mad', 'aggressive', 'intense', 'heavy', 'metal', 'punk', 'hardcore', 'screaming', 'yelling'],
@@ -47,78 +52,6 @@ class WebResearchOrganizer:
         
         self.song_research_cache = {}
     
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks from library"""
-        track_count_script = 'tell application "Music" to return count of tracks of library playlist 1'
-        track_count = int(self.run_applescript(track_count_script) or 0)
-        
-        if track_count == 0:
-            return []
-        
-        all_tracks = []
-        batch_size = 50
-        
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
-    
     def web_search_song(self, song_name: str, artist: str) -> Dict:
         """Search for song information on the web using subprocess to call web search"""
         cache_key = f"{song_name}|{artist}"
@@ -154,17 +87,17 @@ class WebResearchOrganizer:
     
     def classify_song_with_research(self, track: Dict, research_data: Dict = None) -> List[str]:
         """Classify song using web research and analysis"""
-        song_name = track.get('name', '').lower()
-        artist = track.get('artist', '').lower()
-        genre = track.get('genre', '').lower()
+        song_name, artist, genre = self.match_fields(track)
         
         # Get research data if not provided
         if research_data is None:
-            research_data = self.web_search_song(track['name'], track['artist'])
+            name_text, artist_text, _ = lowered_fields(track)
+            research_data = self.web_search_song(name_text, artist_text)
         
-        combined_text = f"{genre} {song_name} {artist}".lower()
-        if research_data.get('lyrics_analysis'):
-            combined_text += " " + research_data['lyrics_analysis'].lower()
+        research_text = self.match_text(research_data.get('lyrics_analysis', ''))
+        combined_text = self.combine(genre, song_name, artist)
+        if research_text:
+            combined_text = self.combine(combined_text, research_text)
         
         # Score each mood category
         mood_scores = {}
@@ -195,7 +128,6 @@ class WebResearchOrganizer:
                         score += 4
             
             # Research data matching
-            research_text = research_data.get('lyrics_analysis', '').lower()
             if research_text:
                 for keyword in config['keywords']:
                     if keyword in research_text:
@@ -205,8 +137,7 @@ class WebResearchOrganizer:
                         score += 5
             
             # Title word analysis
-            title_words = song_name.split()
-            for word in title_words:
+            for word in self.title_words(track):
                 if word in config['keywords']:
                     score += 4
                 if word in config['themes']:
@@ -231,143 +162,24 @@ class WebResearchOrganizer:
                 break
         
         return result if result else ['Calming']
-    
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        create_script = f'''
-        tell application "Music"
-            try
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        added = 0
-        batch_size = 15
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function"""
-        print("=" * 70)
-        print("Web Research-Based Apple Music Playlist Organizer")
-        print("=" * 70)
-        print("\nResearching each song to properly match moods...")
-        print("\nPlaylists to create:")
-        for mood in self.mood_categories.keys():
-            print(f"  • {mood}")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Research and classify each track
-        print("\n" + "=" * 70)
-        print("Researching and classifying each song...")
-        print("(This will take time as we research each song)")
-        print("=" * 70)
-        
-        mood_tracks = defaultdict(list)
-        
-        for i, track in enumerate(all_tracks, 1):
-            print(f"  [{i}/{len(all_tracks)}] Researching: {track['name']} by {track['artist']}", end='\r')
-            
-            # Research the song
-            research_data = self.web_search_song(track['name'], track['artist'])
-            
-            # Classify based on research
-            moods = self.classify_song_with_research(track, research_data)
-            
-            for mood in moods:
-                mood_tracks[mood].append(track['name'])
-        
-        print(f"\n  Completed research on {len(all_tracks)} tracks")
-        
-        # Display classification summary
-        print("\n" + "=" * 70)
-        print("Research-Based Classification Summary:")
-        print("=" * 70)
-        for mood in self.mood_categories.keys():
-            count = len(mood_tracks.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Ensure each playlist has at least 40 tracks
-        print("\nEnsuring each playlist has 40+ tracks...")
+
+    classify = classify_song_with_research
+
+    def expand_playlists(self, mood_tracks: Dict[str, List[Dict]],
+                         all_tracks: List[Dict]) -> Dict[str, List[str]]:
+        """Ensure each playlist has at least 40 tracks"""
+        print("Ensuring each playlist has 40+ tracks...")
+        target = self.playlist_size
         final_playlists = {}
         
-        for mood in self.mood_categories.keys():
-            tracks = list(set(mood_tracks.get(mood, [])))  # Remove duplicates
+        for mood in self.moods():
+            tracks = list(dict.fromkeys(t['name'] for t in mood_tracks.get(mood, [])))  # Remove duplicates
+            chosen = set(tracks)
             
             # If less than 40, find similar tracks based on artists/genres
-            if len(tracks) < 40:
+            if len(tracks) < target:
                 # Analyze patterns from existing tracks
-                existing_track_objs = [t for t in all_tracks if t['name'] in tracks]
+                existing_track_objs = [t for t in all_tracks if t['name'] in chosen]
                 artist_counts = Counter([t['artist'] for t in existing_track_objs if t['artist']])
                 genre_counts = Counter([t['genre'] for t in existing_track_objs if t['genre']])
                 
@@ -375,61 +187,36 @@ class WebResearchOrganizer:
                 top_genres = {g for g, _ in genre_counts.most_common(3)}
                 
                 # Find similar tracks
-                needed = 40 - len(tracks)
+                needed = target - len(tracks)
                 added = 0
                 for track in all_tracks:
-                    if track['name'] in tracks:
+                    if track['name'] in chosen:
                         continue
                     
                     # Prefer tracks from same artists or genres
                     if track['artist'] in top_artists or track['genre'] in top_genres:
                         tracks.append(track['name'])
+                        chosen.add(track['name'])
                         added += 1
                         if added >= needed:
                             break
                 
                 # If still not enough, add based on genre similarity
-                if len(tracks) < 40:
+                if len(tracks) < target:
                     for track in all_tracks:
-                        if track['name'] in tracks:
+                        if track['name'] in chosen:
                             continue
                         if track['genre'] in top_genres:
                             tracks.append(track['name'])
-                            if len(tracks) >= 40:
+                            chosen.add(track['name'])
+                            if len(tracks) >= target:
                                 break
             
             # Limit to 40 tracks
-            final_playlists[mood] = tracks[:40]
+            final_playlists[mood] = tracks[:target]
         
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in self.mood_categories.keys():
-            count = len(final_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in self.mood_categories.keys():
-            track_list = final_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
-        
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} research-based playlists.")
-        print("   Each song has been researched and properly matched to its mood.")
-        print("=" * 70)
-
+        return final_playlists
+    
 def main():
     organizer = WebResearchOrganizer()
     organizer.organize()
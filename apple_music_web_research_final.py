@@ -4,19 +4,27 @@ Final Web-Researched Apple Music Playlist Organizer
 Researches each song via web search for accurate mood classification
 """
 
-import subprocess
-import time
+import argparse
 from typing import List, Dict, Set
-from collections import defaultdict
 import json
 import re
+from functools import lru_cache
+from apple_music_engine import MoodOrganizer, register_strategy
 
 # Note: This script uses web search to research songs
 # For actual web search, you would integrate with a search API
 # Here we use enhanced pattern matching based on known song characteristics
 
-class WebResearchFinalOrganizer:
+GENRE_CACHE_SIZE = 1024
+ARTIST_CACHE_SIZE = 8192
+
+@register_strategy('web_research_final')
+class WebResearchFinalOrganizer(MoodOrganizer):
+    title = "Final Web-Researched Apple Music Playlist Organizer"
+    playlist_size = 40
+
     def __init__(self):
+        super().__init__()
         # Enhanced mood categories with comprehensive patterns
         self.mood_categories = {
             'Angry/Mad': {
@@ -69,167 +77,129 @@ class WebResearchFinalOrganizer:
         
         # Known song database (would be populated from web research)
         self.known_songs = {}
-    
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_track_count(self) -> int:
-        """Get total number of tracks"""
-        script = 'tell application "Music" to return count of tracks of library playlist 1'
-        result = self.run_applescript(script)
-        try:
-            return int(result) if result else 0
-        except:
-            return 0
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks with full information"""
-        track_count = self.get_track_count()
-        all_tracks = []
-        batch_size = 100
         
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
+        # Bounded memo tables for the per-genre and per-artist score components
+        self.genre_component = lru_cache(maxsize=GENRE_CACHE_SIZE)(self.score_genre)
+        self.artist_component = lru_cache(maxsize=ARTIST_CACHE_SIZE)(self.score_artist)
     
-    def research_song_mood(self, track_name: str, artist: str, genre: str) -> Dict[str, float]:
-        """
-        Research a song's mood using comprehensive analysis
-        In a full implementation, this would use web search APIs
-        """
-        name_lower = track_name.lower()
-        artist_lower = artist.lower()
-        genre_lower = genre.lower()
-        
-        mood_scores = {}
+    def score_genre(self, genre_lower: str) -> Dict[str, Dict]:
+        """Genre component of every mood score: exclusions, base points and genre flags"""
+        is_pop = 'pop' in genre_lower
+        is_pop_ballad = is_pop and 'ballad' in genre_lower
+        is_dance = self.has_any(genre_lower, ['dance', 'edm', 'electronic'])
         
+        profile = {}
         for mood, criteria in self.mood_categories.items():
-            score = 0.0
-            
             # Check if genre is excluded
-            excluded = False
-            for excl_genre in criteria.get('exclude_genres', []):
-                if excl_genre in genre_lower:
-                    excluded = True
-                    break
+            excluded = self.has_any(genre_lower, criteria.get('exclude_genres', []))
             
-            if excluded:
-                continue
+            score = 0.0
             
             # Genre matching (20 points)
-            for mood_genre in criteria['genres']:
-                if mood_genre in genre_lower:
-                    score += 20.0
-                    break
+            if self.has_any(genre_lower, criteria['genres']):
+                score += 20.0
             
-            # Track name keyword matching (10 points per match, max 30)
-            name_matches = 0
-            for keyword in criteria['name_keywords']:
-                if keyword in name_lower:
-                    score += 10.0
-                    name_matches += 1
-                    if name_matches >= 3:
-                        break
+            # Special case: Pop ballads are heartbreak, not workout
+            if is_pop_ballad and mood == 'Heartbreak':
+                score += 12.0
+            
+            profile[mood] = {
+                'excluded': excluded,
+                'score': score,
+                'zeroed': is_pop_ballad and mood == 'Workout/Go Time',
+                'is_pop': is_pop,
+                'is_dance': is_dance
+            }
+        return profile
+    
+    def score_artist(self, artist_lower: str) -> Dict[str, float]:
+        """Artist component of every mood score"""
+        scores = {}
+        for mood, criteria in self.mood_categories.items():
+            score = 0.0
             
             # Artist keyword matching (5 points)
-            for keyword in criteria['artist_keywords']:
-                if keyword in artist_lower:
-                    score += 5.0
-                    break
+            if self.has_any(artist_lower, criteria['artist_keywords']):
+                score += 5.0
             
             # Special case: Adele songs are often heartbreak
             if 'adele' in artist_lower and mood == 'Heartbreak':
                 score += 15.0
             
-            # Special case: EDM/Dance is usually workout (but not always)
-            if any(g in genre_lower for g in ['dance', 'edm', 'electronic']) and mood == 'Workout/Go Time':
-                # Only if it has energetic keywords
-                if any(kw in name_lower for kw in ['go', 'run', 'move', 'fire', 'hype', 'pump', 'energy']):
-                    score += 10.0
-                else:
-                    score += 5.0  # Lower score if no energetic keywords
-            
-            # Special case: Pop with love keywords is usually "In Love"
-            if 'pop' in genre_lower and any(kw in name_lower for kw in ['love', 'heart', 'together', 'forever']) and mood == 'In Love':
-                score += 15.0
+            scores[mood] = score
+        return scores
+    
+    def score_title(self, mood: str, criteria: Dict, name_lower: str, genre: Dict) -> float:
+        """Title component of one mood score, given the mood's genre profile"""
+        score = 0.0
+        
+        # Track name keyword matching (10 points per match, max 30)
+        name_matches = 0
+        for keyword in criteria['name_keywords']:
+            if keyword in name_lower:
+                score += 10.0
+                name_matches += 1
+                if name_matches >= 3:
+                    break
+        
+        # Special case: EDM/Dance is usually workout (but not always)
+        if genre['is_dance'] and mood == 'Workout/Go Time':
+            # Only if it has energetic keywords
+            if self.has_any(name_lower, ['go', 'run', 'move', 'fire', 'hype', 'pump', 'energy']):
+                score += 10.0
+            else:
+                score += 5.0  # Lower score if no energetic keywords
+        
+        # Special case: Pop with love keywords is usually "In Love"
+        if genre['is_pop'] and self.has_any(name_lower, ['love', 'heart', 'together', 'forever']) and mood == 'In Love':
+            score += 15.0
+        
+        # Special case: Pop without love keywords might be workout if energetic
+        if genre['is_pop'] and mood == 'Workout/Go Time':
+            if self.has_any(name_lower, ['go', 'run', 'move', 'fire', 'hype', 'pump', 'energy', 'beat']):
+                score += 8.0
+        
+        return score
+    
+    def research_song_mood(self, track_name: str, artist: str, genre: str) -> Dict[str, float]:
+        """
+        Research a song's mood using comprehensive analysis
+        In a full implementation, this would use web search APIs
+        """
+        return self.score_fields(*self.match_fields({'name': track_name, 'artist': artist, 'genre': genre}))
+    
+    def score_fields(self, name_lower, artist_lower, genre_lower) -> Dict[str, float]:
+        """Mood scores from match_fields() values"""
+        # Genre and artist components repeat across tracks, so they come from the caches
+        genre_profile = self.genre_component(genre_lower)
+        artist_scores = self.artist_component(artist_lower)
+        
+        mood_scores = {}
+        
+        for mood, criteria in self.mood_categories.items():
+            genre_part = genre_profile[mood]
+            if genre_part['excluded']:
+                continue
             
-            # Special case: Pop without love keywords might be workout if energetic
-            if 'pop' in genre_lower and mood == 'Workout/Go Time':
-                if any(kw in name_lower for kw in ['go', 'run', 'move', 'fire', 'hype', 'pump', 'energy', 'beat']):
-                    score += 8.0
+            score = (genre_part['score'] + artist_scores[mood]
+                     + self.score_title(mood, criteria, name_lower, genre_part))
             
-            # Special case: Pop ballads are heartbreak, not workout
-            if 'pop' in genre_lower and 'ballad' in genre_lower and mood == 'Heartbreak':
-                score += 12.0
-            if 'pop' in genre_lower and 'ballad' in genre_lower and mood == 'Workout/Go Time':
-                score = 0  # Exclude ballads from workout
+            # Exclude ballads from workout
+            if genre_part['zeroed']:
+                score = 0
             
             if score > 0:
                 mood_scores[mood] = score
         
         return mood_scores
     
+    def score_track(self, track: Dict) -> Dict[str, float]:
+        """Mood scores of a track dict"""
+        return self.score_fields(*self.match_fields(track))
+    
     def classify_track(self, track: Dict) -> List[str]:
         """Classify track into mood categories"""
-        mood_scores = self.research_song_mood(
-            track['name'], 
-            track['artist'], 
-            track['genre']
-        )
+        mood_scores = self.score_track(track)
         
         if not mood_scores:
             return []
@@ -249,184 +219,18 @@ class WebResearchFinalOrganizer:
                 return [top_mood]
         
         return []
-    
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        # Create playlist first
-        create_script = f'''
-        tell application "Music"
-            try
-                -- Delete existing playlist if it exists
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                -- Create new playlist
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        # Add tracks in batches
-        added = 0
-        batch_size = 20
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function"""
-        print("=" * 70)
-        print("Final Web-Researched Apple Music Playlist Organizer")
-        print("Researching and properly classifying each song...")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found in your library.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Research and classify each track
-        print("\nResearching and classifying each song...")
-        print("(Analyzing genre, lyrics, artist patterns, and song characteristics)")
-        
-        mood_tracks = defaultdict(list)
-        unclassified = []
-        
-        for i, track in enumerate(all_tracks, 1):
-            if i % 50 == 0:
-                print(f"  Researched {i}/{len(all_tracks)} songs...", end='\r')
-            
-            # Classify track
-            moods = self.classify_track(track)
-            
-            if moods:
-                for mood in moods:
-                    mood_tracks[mood].append(track)
-            else:
-                unclassified.append(track)
-        
-        print(f"\n  Researched {len(all_tracks)} songs")
-        
-        # Display classification
-        print("\n" + "=" * 70)
-        print("Research-Based Classification Results:")
-        print("=" * 70)
-        total_classified = 0
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(mood_tracks.get(mood, []))
-            total_classified += count
-            print(f"  {mood:25} {count:5} tracks")
-        print(f"  {'Unclassified':25} {len(unclassified):5} tracks")
-        print(f"  {'Total Classified':25} {total_classified:5} tracks")
-        print("=" * 70)
-        
-        # Prepare playlists (up to 40 tracks each, prioritizing best matches)
-        print("\nPreparing playlists (up to 40 tracks each)...")
-        final_playlists = {}
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            tracks = mood_tracks.get(mood, [])
-            track_names = [t['name'] for t in tracks]
-            
-            # Use up to 40 tracks
-            if len(track_names) > 40:
-                track_names = track_names[:40]
-            
-            final_playlists[mood] = track_names
-        
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(final_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            track_list = final_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
-            else:
-                print(f"  '{mood}' playlist (0 tracks)... (skipped)")
-        
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} properly researched playlists.")
-        print("   Each song has been researched and accurately matched to its mood category.")
-        print("=" * 70)
+
+    classify = classify_track
+    score = score_track
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=1,
+                        help='classify across this many worker processes (default: 1)')
+    args = parser.parse_args()
+    
     organizer = WebResearchFinalOrganizer()
-    organizer.organize()
+    organizer.organize(workers=args.workers)
 
 if __name__ == "__main__":
     main()
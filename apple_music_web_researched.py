@@ -4,15 +4,23 @@ Web-Researched Apple Music Playlist Organizer
 Researches each song via web search to properly match moods
 """
 
-import subprocess
-import time
 from typing import List, Dict, Set
-from collections import defaultdict
 import json
 import re
+from functools import lru_cache
+from apple_music_engine import MoodOrganizer, register_strategy
+from apple_music_library import lowered_fields
+
+GENRE_CACHE_SIZE = 1024
+ARTIST_CACHE_SIZE = 8192
+
+@register_strategy('web_researched')
+class WebResearchedOrganizer(MoodOrganizer):
+    title = "Web-Researched Apple Music Playlist Organizer"
+    playlist_size = 40
 
-class WebResearchedOrganizer:
     def __init__(self):
+        super().__init__()
         self.mood_categories = {
             'Angry/Mad': {
                 'keywords': ['angry', 'rage', 'furious', 'aggressive', 'intense', 'heavy', 'metal',
@@ -53,82 +61,10 @@ class WebResearchedOrganizer:
         }
         
         self.song_research_cache = {}  # Cache research results
-    
-    def escape_applescript_string(self, text: str) -> str:
-        """Escape special characters for AppleScript"""
-        text = text.replace('\\', '\\\\')
-        text = text.replace('"', '\\"')
-        text = text.replace('\n', ' ')
-        text = text.replace('\r', ' ')
-        return text
-    
-    def run_applescript(self, script: str) -> str:
-        """Execute AppleScript safely"""
-        try:
-            proc = subprocess.Popen(
-                ['osascript', '-e', script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate(timeout=60)
-            return stdout.strip()
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return ""
-        except Exception as e:
-            return ""
-    
-    def get_track_count(self) -> int:
-        """Get total number of tracks"""
-        script = 'tell application "Music" to return count of tracks of library playlist 1'
-        result = self.run_applescript(script)
-        try:
-            return int(result) if result else 0
-        except:
-            return 0
-    
-    def get_all_tracks(self) -> List[Dict]:
-        """Get all tracks with full information"""
-        track_count = self.get_track_count()
-        all_tracks = []
-        batch_size = 100
         
-        for i in range(1, track_count + 1, batch_size):
-            end_idx = min(i + batch_size - 1, track_count)
-            print(f"  Loading tracks {i}-{end_idx}...", end='\r')
-            
-            script = f'''
-            tell application "Music"
-                set trackList to {{}}
-                set allTracks to tracks {i} thru {end_idx} of library playlist 1
-                repeat with aTrack in allTracks
-                    try
-                        set trackName to name of aTrack
-                        set trackArtist to artist of aTrack
-                        set trackGenre to genre of aTrack
-                        set trackInfo to trackName & "|||" & trackArtist & "|||" & trackGenre
-                        set end of trackList to trackInfo
-                    end try
-                end repeat
-                return trackList
-            end tell
-            '''
-            
-            result = self.run_applescript(script)
-            if result:
-                lines = [line.strip() for line in result.split(',')]
-                for line in lines:
-                    if '|||' in line:
-                        parts = line.split('|||')
-                        if len(parts) >= 3:
-                            all_tracks.append({
-                                'name': parts[0].strip(),
-                                'artist': parts[1].strip(),
-                                'genre': parts[2].strip()
-                            })
-        
-        return all_tracks
+        # Bounded memo tables for the per-genre and per-artist score components
+        self.genre_component = lru_cache(maxsize=GENRE_CACHE_SIZE)(self.score_genre)
+        self.artist_component = lru_cache(maxsize=ARTIST_CACHE_SIZE)(self.score_artist)
     
     def research_song_web(self, track_name: str, artist: str) -> Dict:
         """Research a song using web search to understand its mood"""
@@ -152,8 +88,8 @@ class WebResearchedOrganizer:
         
         # Enhanced analysis based on track metadata
         genre = ''  # Will be set from track data
-        name_lower = track_name.lower()
-        artist_lower = artist.lower()
+        name_lower = self.match_text(track_name)
+        artist_lower = self.match_text(artist)
         
         # Score each mood category
         for mood, criteria in self.mood_categories.items():
@@ -184,56 +120,75 @@ class WebResearchedOrganizer:
         self.song_research_cache[cache_key] = result
         return result
     
-    def classify_track(self, track: Dict, all_tracks: List[Dict]) -> List[str]:
-        """Classify track based on research and enhanced analysis"""
-        genre = track.get('genre', '').lower()
-        name = track.get('name', '').lower()
-        artist = track.get('artist', '').lower()
-        
-        # Research the song
-        research = self.research_song_web(track['name'], track['artist'])
-        
-        # Update research with actual genre
-        genre_lower = genre.lower()
-        mood_scores = {}
-        
+    def score_genre(self, genre: str) -> Dict[str, int]:
+        """Genre component of every mood score"""
+        scores = {}
         for mood, criteria in self.mood_categories.items():
             score = 0
             
             # Genre match (strongest indicator)
-            for mood_genre in criteria['genres']:
-                if mood_genre in genre_lower:
-                    score += 10
-                    break
+            if self.has_any(genre, criteria['genres']):
+                score += 10
+            
+            scores[mood] = score
+        return scores
+    
+    def score_artist(self, artist: str) -> Dict[str, int]:
+        """Artist component of every mood score"""
+        scores = {}
+        for mood, criteria in self.mood_categories.items():
+            score = 0
             
-            # Track name analysis
             for keyword in criteria['keywords']:
-                if keyword in name:
-                    score += 4
                 if keyword in artist:
                     score += 1
-            
-            # Theme analysis
             for theme in criteria['themes']:
-                if theme in name:
-                    score += 3
                 if theme in artist:
                     score += 1
             
             # Artist name patterns (some artists are known for specific moods)
-            if mood == 'Angry/Mad' and any(kw in artist for kw in ['metal', 'hardcore', 'punk', 'rage']):
+            if mood == 'Angry/Mad' and self.has_any(artist, ['metal', 'hardcore', 'punk', 'rage']):
                 score += 2
-            elif mood == 'Heartbreak' and any(kw in artist for kw in ['soul', 'ballad', 'country']):
+            elif mood == 'Heartbreak' and self.has_any(artist, ['soul', 'ballad', 'country']):
                 score += 2
-            elif mood == 'Workout/Go Time' and any(kw in artist for kw in ['rap', 'hip hop', 'edm', 'dj']):
+            elif mood == 'Workout/Go Time' and self.has_any(artist, ['rap', 'hip hop', 'edm', 'dj']):
                 score += 2
-            elif mood == 'Calming' and any(kw in artist for kw in ['ambient', 'meditation', 'zen']):
+            elif mood == 'Calming' and self.has_any(artist, ['ambient', 'meditation', 'zen']):
                 score += 2
-            elif mood == 'In Love' and any(kw in artist for kw in ['pop', 'r&b', 'soul', 'jazz']):
+            elif mood == 'In Love' and self.has_any(artist, ['pop', 'r&b', 'soul', 'jazz']):
                 score += 2
-            elif mood == 'While Doing Homework' and any(kw in artist for kw in ['classical', 'piano', 'orchestra', 'instrumental']):
+            elif mood == 'While Doing Homework' and self.has_any(artist, ['classical', 'piano', 'orchestra', 'instrumental']):
                 score += 2
             
+            scores[mood] = score
+        return scores
+    
+    def classify_track(self, track: Dict, all_tracks: List[Dict]) -> List[str]:
+        """Classify track based on research and enhanced analysis"""
+        name_text, artist_text, _ = lowered_fields(track)
+        name, artist, genre = self.match_fields(track)
+        
+        # Research the song
+        research = self.research_song_web(name_text, artist_text)
+        
+        # Genre and artist components repeat across tracks, so they come from the caches
+        genre_scores = self.genre_component(genre)
+        artist_scores = self.artist_component(artist)
+        mood_scores = {}
+        
+        for mood, criteria in self.mood_categories.items():
+            score = genre_scores[mood] + artist_scores[mood]
+            
+            # Track name analysis
+            for keyword in criteria['keywords']:
+                if keyword in name:
+                    score += 4
+            
+            # Theme analysis
+            for theme in criteria['themes']:
+                if theme in name:
+                    score += 3
+            
             if score > 0:
                 mood_scores[mood] = score
         
@@ -250,180 +205,10 @@ class WebResearchedOrganizer:
             return moods
         
         return []
-    
-    def create_playlist(self, playlist_name: str, track_names: List[str]) -> bool:
-        """Create playlist by adding tracks"""
-        if not track_names:
-            return False
-        
-        safe_name = self.escape_applescript_string(playlist_name)
-        
-        # Create playlist first
-        create_script = f'''
-        tell application "Music"
-            try
-                -- Delete existing playlist if it exists
-                try
-                    set existingPlaylist to playlist "{safe_name}"
-                    delete existingPlaylist
-                end try
-                
-                -- Create new playlist
-                set newPlaylist to make new playlist with properties {{name:"{safe_name}"}}
-                return "created"
-            on error errMsg
-                return "error: " & errMsg
-            end try
-        end tell
-        '''
-        
-        result = self.run_applescript(create_script)
-        if "error" in result.lower():
-            return False
-        
-        # Add tracks in batches
-        added = 0
-        batch_size = 20
-        
-        for i in range(0, len(track_names), batch_size):
-            batch = track_names[i:i+batch_size]
-            
-            add_commands = []
-            for track_name in batch:
-                safe_track = self.escape_applescript_string(track_name)
-                add_commands.append(f'''
-                try
-                    set foundTracks to (every track of library playlist 1 whose name is "{safe_track}")
-                    if (count of foundTracks) > 0 then
-                        set trackToAdd to item 1 of foundTracks
-                        try
-                            duplicate trackToAdd to playlist "{safe_name}"
-                            set added to added + 1
-                        end try
-                    end if
-                end try
-                ''')
-            
-            add_script = f'''
-            tell application "Music"
-                set added to 0
-                {''.join(add_commands)}
-                return added
-            end tell
-            '''
-            
-            result = self.run_applescript(add_script)
-            try:
-                batch_added = int(result) if result.isdigit() else 0
-                added += batch_added
-            except:
-                pass
-        
-        return added > 0
-    
-    def organize(self):
-        """Main organization function"""
-        print("=" * 70)
-        print("Web-Researched Apple Music Playlist Organizer")
-        print("Researching each song to properly match moods...")
-        print("=" * 70)
-        
-        # Ensure Music.app is running
-        check_script = 'tell application "System Events" to return (name of processes) contains "Music"'
-        if self.run_applescript(check_script).lower() != 'true':
-            print("\nOpening Music.app...")
-            subprocess.run(['open', '-a', 'Music'])
-            time.sleep(5)
-        
-        # Get all tracks
-        print("\nLoading your entire library...")
-        all_tracks = self.get_all_tracks()
-        
-        if not all_tracks:
-            print("❌ No tracks found in your library.")
-            return
-        
-        print(f"\nLoaded {len(all_tracks)} tracks")
-        
-        # Research and classify each track
-        print("\nResearching and classifying each song...")
-        print("(Analyzing song metadata, genres, and characteristics)")
-        
-        mood_tracks = defaultdict(list)
-        unclassified = []
-        
-        for i, track in enumerate(all_tracks, 1):
-            if i % 50 == 0:
-                print(f"  Processed {i}/{len(all_tracks)} tracks...", end='\r')
-            
-            # Classify track
-            moods = self.classify_track(track, all_tracks)
-            
-            if moods:
-                for mood in moods:
-                    mood_tracks[mood].append(track)
-            else:
-                unclassified.append(track)
-        
-        print(f"\n  Processed {len(all_tracks)} tracks")
-        
-        # Display classification
-        print("\n" + "=" * 70)
-        print("Classification Results:")
-        print("=" * 70)
-        total_classified = 0
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(mood_tracks.get(mood, []))
-            total_classified += count
-            print(f"  {mood:25} {count:5} tracks")
-        print(f"  {'Unclassified':25} {len(unclassified):5} tracks")
-        print(f"  {'Total':25} {total_classified:5} tracks")
-        print("=" * 70)
-        
-        # Ensure each playlist has at least 40 tracks
-        print("\nEnsuring each playlist has 40+ tracks...")
-        final_playlists = {}
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            tracks = mood_tracks.get(mood, [])
-            track_names = [t['name'] for t in tracks]
-            
-            # If we have tracks, use them (up to 40, or all if less)
-            if len(track_names) > 40:
-                track_names = track_names[:40]
-            
-            final_playlists[mood] = track_names
-        
-        # Display final summary
-        print("\n" + "=" * 70)
-        print("Final Playlist Summary:")
-        print("=" * 70)
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            count = len(final_playlists.get(mood, []))
-            print(f"  {mood:25} {count:5} tracks")
-        print("=" * 70)
-        
-        # Create playlists
-        print("\nCreating playlists in Music.app...")
-        created = 0
-        
-        for mood in ['Angry/Mad', 'Heartbreak', 'Workout/Go Time', 'Calming', 'In Love', 'While Doing Homework']:
-            track_list = final_playlists.get(mood, [])
-            if track_list:
-                print(f"  Creating '{mood}' playlist ({len(track_list)} tracks)...", end=' ')
-                success = self.create_playlist(mood, track_list)
-                if success:
-                    print("✓")
-                    created += 1
-                else:
-                    print("✗")
-            else:
-                print(f"  '{mood}' playlist (0 tracks)... (skipped)")
-        
-        print("\n" + "=" * 70)
-        print(f"✅ Complete! Created {created} properly researched playlists.")
-        print("   Each song has been analyzed and matched to its mood category.")
-        print("=" * 70)
+
+    def classify(self, track: Dict) -> List[str]:
+        """Classify track based on metadata (the library itself is not consulted)"""
+        return self.classify_track(track, [])
 
 def main():
     organizer = WebResearchedOrganizer()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Coalesced playlist writes
+Plans the creation and filling of every playlist of a run as a few scripts,
+each carrying as many playlists and tracks as fit its payload budget
+"""
+
+from typing import List, Tuple
+
+from apple_music_automation import ADD_BATCH_SIZE
+
+# Data file bytes per write script, and tracks per script so one stays well
+# inside its timeout
+MAX_WRITE_PAYLOAD = 256 * 1024
+MAX_WRITE_TRACKS = 2000
+# Marks the line that starts a playlist ("N": create it anew, "A": add to it)
+OP_MARK = '\x1e'
+
+
+def payload_size(text: str) -> int:
+    return len(text.encode('utf-8')) + 1
+
+
+class WritePlan:
+    """Every playlist write of a run split into script-sized chunks
+
+    A chunk is a list of (playlist name, replace, track names) steps. A playlist
+    too large for the rest of a chunk continues in the next one with replace
+    False, so it is created once and filled across scripts in order.
+    """
+
+    def __init__(self, playlists: List[Tuple[str, List[str]]], max_payload: int = MAX_WRITE_PAYLOAD,
+                 max_tracks: int = MAX_WRITE_TRACKS):
+        self.playlists = playlists
+        self.chunks: List[List[Tuple[str, bool, List[str]]]] = []
+        chunk, size, tracks = [], 0, 0
+        for name, track_names in playlists:
+            header = payload_size(OP_MARK + 'N' + name)
+            replace = True
+            i = 0
+            while replace or i < len(track_names):
+                first = payload_size(track_names[i]) if i < len(track_names) else 0
+                if chunk and (size + header + first > max_payload or tracks >= max_tracks):
+                    self.chunks.append(chunk)
+                    chunk, size, tracks = [], 0, 0
+                size += header
+                # At least one track per step, so a single huge name still moves on
+                end = i
+                while end < len(track_names) and (end == i or (
+                        size + payload_size(track_names[end]) <= max_payload and tracks < max_tracks)):
+                    size += payload_size(track_names[end])
+                    tracks += 1
+                    end += 1
+                chunk.append((name, replace, track_names[i:end]))
+                replace = False
+                i = end
+        if chunk:
+            self.chunks.append(chunk)
+
+    @staticmethod
+    def lines(chunk: List[Tuple[str, bool, List[str]]]) -> List[str]:
+        """Data file lines of one chunk: a marked line per step, then its track names"""
+        lines = []
+        for name, replace, track_names in chunk:
+            lines.append(OP_MARK + ('N' if replace else 'A') + name)
+            lines.extend(track_names)
+        return lines
+
+    def round_trips(self, journaled: bool = False) -> int:
+        """osascript calls the plan takes: one per chunk, plus one reading every
+        playlist's previous tracks when journaling"""
+        return len(self.chunks) + (1 if journaled and self.chunks else 0)
+
+    def baseline_round_trips(self, journaled: bool = False, batch_size: int = ADD_BATCH_SIZE) -> int:
+        """osascript calls the same writes take one playlist at a time: a create and
+        an add per batch, plus reading the old tracks and a count when journaling"""
+        return sum(1 + -(-len(track_names) // batch_size) + (2 if journaled else 0)
+                   for _, track_names in self.playlists)
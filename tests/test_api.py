@@ -0,0 +1,30 @@
+"""
+Mood query API
+Queries answer from the index the daemon builds after each sync
+"""
+
+from apple_music_api import MoodIndex
+
+TRACKS = [{'persistent_id': 'P1', 'name': 'Calm Waters', 'artist': 'Nils', 'genre': 'Ambient'},
+          {'persistent_id': 'P2', 'name': 'Run', 'artist': 'Ola', 'genre': 'Rock'}]
+MOODS = ['Calm', 'Energetic', 'Focus']
+
+
+def make_index() -> MoodIndex:
+    return MoodIndex(TRACKS, [['Calm'], ['Energetic']], moods=MOODS)
+
+
+def test_known_mood_without_tracks_returns_an_empty_page():
+    assert make_index().tracks('Focus') == {'mood': 'Focus', 'total': 0, 'tracks': []}
+
+
+def test_unknown_mood_is_an_error():
+    assert 'error' in make_index().answer({'op': 'tracks', 'mood': 'Nope'})
+
+
+def test_pages_and_summary():
+    index = make_index()
+    page = index.answer({'op': 'tracks', 'mood': 'Calm', 'limit': 1})
+    assert [track['persistent_id'] for track in page['tracks']] == ['P1']
+    assert index.summary() == {'tracks': 2, 'moods': {'Calm': 1, 'Energetic': 1, 'Focus': 0}}
+    assert index.moods(['P2', 'P9']) == {'moods': {'P2': ['Energetic'], 'P9': None}}
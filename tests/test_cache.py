@@ -0,0 +1,59 @@
+"""
+Classification cache
+Entries are keyed by the rules and the code that classifies, and a damaged
+cache file is treated as empty rather than failing the run
+"""
+
+import contextlib
+import io
+import sys
+
+import apple_music_cache
+from apple_music_cache import ClassificationCache, rule_set_hash
+from apple_music_engine import load_strategies
+
+TRACK = {'persistent_id': 'P1', 'name': 'Calm Waters', 'artist': 'Nils', 'genre': 'Ambient',
+         'duration': 200.0}
+
+
+def make_organizer():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return load_strategies()['mood_organizer']()
+
+
+def test_rule_hash_covers_shared_modules(tmp_path, monkeypatch):
+    shared = tmp_path / 'shared_scoring.py'
+    shared.write_text('WEIGHT = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(apple_music_cache, 'CLASSIFIER_MODULES',
+                        apple_music_cache.CLASSIFIER_MODULES + ['shared_scoring'])
+    organizer = make_organizer()
+    before = rule_set_hash(organizer)
+
+    shared.write_text('WEIGHT = 2\n')
+    assert rule_set_hash(organizer) != before
+    sys.modules.pop('shared_scoring', None)
+
+
+def test_entries_survive_a_save_and_load(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = ClassificationCache(path, 'mood_organizer', 'rules')
+    cache.lookup(TRACK)
+    cache.store(TRACK, ['Calm'])
+    cache.save()
+
+    reloaded = ClassificationCache(path, 'mood_organizer', 'rules')
+    assert reloaded.lookup(TRACK) == ['Calm']
+    assert ClassificationCache(path, 'mood_organizer', 'other rules').lookup(TRACK) is None
+
+
+def test_unreadable_cache_counts_as_empty(tmp_path, capsys):
+    path = tmp_path / 'cache.json'
+    path.write_text('{"version": 1, "strategies": {"mood_organizer": ')
+
+    cache = ClassificationCache(str(path), 'mood_organizer', 'rules')
+    assert cache.lookup(TRACK) is None
+    assert 'Warning: ignoring unreadable classification cache' in capsys.readouterr().out
+    cache.store(TRACK, ['Calm'])
+    cache.save()
+    assert ClassificationCache(str(path), 'mood_organizer', 'rules').lookup(TRACK) == ['Calm']
@@ -0,0 +1,41 @@
+"""
+Track table updates
+The daemon applies library changes to its table in place: an edited track
+replaces its row and a removed one leaves the table
+"""
+
+from apple_music_library import TrackTable
+
+
+def make_table() -> TrackTable:
+    table = TrackTable()
+    table.extend([('A', 'Calm Waters', 'Nils', 'Ambient', 200.0),
+                  ('B', 'Run', 'Ola', 'Rock', 180.0),
+                  ('C', 'Late Night', 'Mia', 'Jazz', 240.0)])
+    return table
+
+
+def test_update_replaces_edited_rows_and_adds_new_ones():
+    table = make_table()
+    changed = table.update([('B', 'Run (Live)', 'Ola', 'Live Rock', 185.0),
+                            ('D', 'Morning', 'Eli', 'Folk', 150.0)])
+
+    assert [row['persistent_id'] for row in changed] == ['B', 'D']
+    assert table.persistent_ids == ['A', 'B', 'C', 'D']
+    edited = table.row(1)
+    assert (edited['name'], edited['genre'], edited['duration']) == ('Run (Live)', 'Live Rock', 185.0)
+
+
+def test_repeated_updates_do_not_grow_the_table():
+    table = make_table()
+    for _ in range(3):
+        table.update([('C', 'Late Night', 'Mia', 'Jazz', 241.0)])
+    assert len(table) == 3
+
+
+def test_remove_drops_rows_by_persistent_id():
+    table = make_table()
+    table.remove(['A', 'missing'])
+
+    assert [row['persistent_id'] for row in table.rows()] == ['B', 'C']
+    assert [row['name'] for row in table.rows()] == ['Run', 'Late Night']
@@ -0,0 +1,27 @@
+"""
+Waiting for Music.app
+Every wait probes Music.app afresh, so a long-running daemon notices when it
+has quit since the last sync
+"""
+
+import contextlib
+import io
+
+from apple_music_automation import MusicApp
+from apple_music_engine import load_strategies
+
+
+def test_each_wait_probes_again(capsys, monkeypatch):
+    with contextlib.redirect_stdout(io.StringIO()):
+        organizer = load_strategies()['mood_organizer']()
+    answers = [(True, False), (False, False), (True, False)]
+    probes = []
+
+    def wait_until_ready(music, timeout):
+        probes.append(timeout)
+        return answers[len(probes) - 1]
+
+    monkeypatch.setattr(MusicApp, 'wait_until_ready', wait_until_ready)
+    assert [organizer.wait_for_music() for _ in answers] == [True, False, True]
+    assert len(probes) == 3
+    assert 'did not respond' in capsys.readouterr().out
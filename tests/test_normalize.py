@@ -0,0 +1,65 @@
+"""
+Title normalization
+Featured artists and release tags are stripped only in their tag forms;
+brackets and dash suffixes that are part of the song's name survive
+"""
+
+import pytest
+
+from apple_music_normalize import canonical_title, tokenize
+
+
+@pytest.mark.parametrize('title', [
+    'Song (feat. X) [Remastered 2011] - Live',
+    'Song (ft. X)',
+    'Song (with Justin Bieber)',
+    'Song feat. X',
+    'Song (Remastered)',
+    'Song [2011 Remaster]',
+    'Song (Live at Wembley)',
+    'Song (Live 1975)',
+    'Song (Single Version)',
+    'Song (Radio Edit)',
+    'Song (Calvin Harris Remix)',
+    'Song (25th Anniversary Deluxe Edition)',
+    'Song (Bonus Track)',
+    'Song - Remastered 2011',
+    'Song - 2011 Remaster',
+    'Song — Live',
+    'Song - Live at the BBC',
+    'Song - 2004 Mono Mix',
+    'Song - Single Version',
+])
+def test_tags_are_stripped(title):
+    assert canonical_title(title) == 'song'
+
+
+@pytest.mark.parametrize('title', [
+    '(Dance With Me)',
+    'Save the Last Dance (Dance With Me)',
+    "(I Can't Get No) Satisfaction",
+    'Song (Live Forever)',
+    'Live Forever',
+    'Stereo Love',
+    'Title - Love Will Live On',
+    'Part 1 - The Edit Room',
+    'Dreams — Remastered 2011 Fire',
+    'A Great Feat of Strength',
+    'Song (With or Without You)',
+    '(Live) Forever',
+    '[Live] Wire',
+])
+def test_titles_survive_unchanged(title):
+    assert canonical_title(title) == title.casefold()
+
+
+def test_only_the_trailing_tag_is_stripped():
+    assert canonical_title('Part 2 - Remastered') == 'part 2'
+
+
+def test_a_title_that_is_only_a_tag_keeps_its_text():
+    assert canonical_title('Live') == 'live'
+
+
+def test_tokens_keep_inner_punctuation():
+    assert tokenize(canonical_title("Don't Stop (Lo-Fi R&B Version)")) == ("don't", 'stop')
@@ -0,0 +1,101 @@
+"""
+Journaled playlist writes
+A write that cannot put every track in leaves the playlist's old tracks in
+place and no journal entry open
+"""
+
+import pytest
+
+from apple_music_automation import (
+    ADD_TRACKS_SCRIPT, CREATE_PLAYLIST_SCRIPT, DELETE_PLAYLIST_SCRIPT, FIELD_SEPARATOR,
+    IMPORT_PLAYLIST_SCRIPT, PLAYLIST_COUNT_SCRIPT, PLAYLIST_IDS_SCRIPT, VALUE_SEPARATOR,
+    AppleScriptRunner, MusicApp
+)
+from apple_music_export import PlaylistExporter
+from apple_music_journal import PlaylistJournal
+
+LIBRARY = {'Calm Waters': 'P1', 'Run': 'P2', 'Late Night': 'P3', 'Morning': 'P4'}
+
+
+class FakeMusic(AppleScriptRunner):
+    """Answers the parameterized scripts from in-memory playlists"""
+
+    def __init__(self, playlists, failing=(), imported=()):
+        super().__init__()
+        self.playlists = playlists
+        # Kinds of script that fail the next time they run
+        self.failing = set(failing)
+        self.imported = list(imported)
+        self.kinds = []
+
+    def run_cached(self, script, args=(), lines=None, kind='script', timeout=None):
+        self.kinds.append(kind)
+        name = args[0] if args else None
+        if kind in self.failing:
+            self.failing.discard(kind)
+            return "error: failed"
+        if script == PLAYLIST_IDS_SCRIPT:
+            if name not in self.playlists:
+                return "missing"
+            return "ok" + FIELD_SEPARATOR + VALUE_SEPARATOR.join(self.playlists[name])
+        if script == CREATE_PLAYLIST_SCRIPT:
+            self.playlists[name] = []
+            return "created"
+        if script == ADD_TRACKS_SCRIPT:
+            known = LIBRARY if args[1] == 'name' else {pid: pid for pid in LIBRARY.values()}
+            ids = [known[value] for value in lines if value in known]
+            self.playlists[name].extend(ids)
+            return "ok" + FIELD_SEPARATOR + VALUE_SEPARATOR.join(ids)
+        if script == IMPORT_PLAYLIST_SCRIPT:
+            self.playlists[name].extend(self.imported)
+            return "ok"
+        if script == PLAYLIST_COUNT_SCRIPT:
+            return str(len(self.playlists.get(name, [])))
+        if script == DELETE_PLAYLIST_SCRIPT:
+            self.playlists.pop(name, None)
+            return "deleted"
+        return ""
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return PlaylistJournal(str(tmp_path / 'journal.jsonl'))
+
+
+def test_add_of_no_tracks_restores_the_old_playlist(journal):
+    runner = FakeMusic({'Calm': ['P1', 'P3']})
+    music = MusicApp(runner, journal)
+
+    assert not music.create_playlist('Calm', ['Not In The Library'])
+    assert runner.playlists['Calm'] == ['P1', 'P3']
+    assert journal.pending() == []
+
+
+def test_write_replaces_the_old_playlist(journal):
+    runner = FakeMusic({'Calm': ['P1']})
+    music = MusicApp(runner, journal)
+
+    assert music.create_playlist('Calm', ['Run', 'Morning'])
+    assert runner.playlists['Calm'] == ['P2', 'P4']
+    assert journal.pending() == []
+
+
+def test_failed_fallback_after_an_import_restores_the_old_playlist(journal):
+    runner = FakeMusic({'Calm': ['P1', 'P3']}, failing={'add'}, imported=['P2'])
+    music = MusicApp(runner, journal)
+
+    assert not music.import_playlist('Calm', '/tmp/Calm.m3u8', 1, ['Morning'])
+    assert runner.playlists['Calm'] == ['P1', 'P3']
+    assert journal.pending() == []
+
+
+def test_import_and_fallback_commit_together(journal, tmp_path):
+    runner = FakeMusic({'Calm': ['P1']}, imported=['P2'])
+    music = MusicApp(runner, journal)
+    exporter = PlaylistExporter(str(tmp_path / 'export'))
+    exporter.by_name = {'Run': {'location': '/music/run.m4a', 'name': 'Run', 'artist': '', 'duration': 1.0}}
+
+    assert exporter.write(music, 'Calm', ['Run', 'Morning'])
+    assert runner.playlists['Calm'] == ['P2', 'P4']
+    assert journal.pending() == []
+    assert runner.kinds.count('ids') == 1
@@ -0,0 +1,27 @@
+"""
+Rule profiling
+Each keyword group is counted only against the field its strategy matches it
+against, so a genre rule is not credited with title or artist hits
+"""
+
+import contextlib
+import io
+
+from apple_music_engine import load_strategies
+from apple_music_library import TrackTable
+from apple_music_profile import profile_rules
+
+
+def test_groups_count_hits_in_their_own_field():
+    with contextlib.redirect_stdout(io.StringIO()):
+        organizer = load_strategies()['smart_research']()
+    table = TrackTable()
+    table.append('Pop Goes the Weasel', 'Nobody', 'Classical', 120.0, 'P1')
+    table.append('Untitled', 'Nobody', 'Pop', 180.0, 'P2')
+
+    rules = profile_rules(organizer, table.rows())
+    by_group = {(rule['group'], rule['keyword']): rule for rule in rules}
+    genre_pop = by_group[('genre_keywords', 'pop')]
+    assert genre_pop['field'] == 'genre'
+    assert genre_pop['hits'] == 1
+    assert all(rule['seconds'] > 0 for rule in rules)
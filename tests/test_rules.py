@@ -0,0 +1,49 @@
+"""
+Rules file keywords
+Loaded keywords are tokenized like titles so word matching finds them, and
+phrases too long to ever match are rejected at load
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from apple_music_engine import load_strategies
+from apple_music_library import TrackTable
+from apple_music_rules import compile_rules
+
+with contextlib.redirect_stdout(io.StringIO()):
+    ORGANIZER = load_strategies()['mood_organizer']()
+TEMPLATE = ORGANIZER.mood_rules()
+
+
+def test_builtin_rules_compile_unchanged():
+    assert compile_rules(TEMPLATE, TEMPLATE) == TEMPLATE
+
+
+@pytest.mark.parametrize('keyword, title', [
+    ('Rock & Roll', "Rock & Roll Ain't Noise Pollution"),
+    ("Guns N' Roses", "Guns N' Roses Medley"),
+    ('lo-fi beats', 'Lo-Fi Beats to Study To'),
+])
+def test_punctuated_keywords_match_under_word_matching(keyword, title):
+    rules = {mood: ['zzzz'] for mood in TEMPLATE}
+    mood = next(iter(rules))
+    rules[mood] = [keyword]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        organizer = load_strategies()['mood_organizer']()
+    organizer.set_rules(compile_rules(rules, TEMPLATE))
+    table = TrackTable()
+    table.append(title, 'Someone', 'Other', 200.0, 'P1')
+
+    assert organizer.word_matching
+    assert mood in organizer.classify(table.row(0))
+
+
+def test_keywords_longer_than_a_phrase_are_rejected():
+    rules = {mood: list(keywords) for mood, keywords in TEMPLATE.items()}
+    rules[next(iter(rules))].append('the dark side of the moon')
+    with pytest.raises(ValueError, match='longer than 3 words'):
+        compile_rules(rules, TEMPLATE)
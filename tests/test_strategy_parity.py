@@ -0,0 +1,49 @@
+"""
+Strategy parity with the pre-refactor organizers
+fixtures/strategy_parity.json holds a seeded synthetic library and the moods
+each original script (as of 3c97040, before the shared engine) assigned to
+every track; each registered strategy must still assign the same ones
+"""
+
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from apple_music_engine import load_strategies
+from apple_music_library import TrackTable
+from apple_music_normalize import canonical_title, normalize_text
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'strategy_parity.json')
+
+with open(FIXTURE, encoding='utf-8') as f:
+    PARITY = json.load(f)
+
+STRATEGIES = load_strategies()
+
+
+def test_every_strategy_has_a_baseline():
+    assert sorted(STRATEGIES) == sorted(PARITY['moods'])
+
+
+@pytest.mark.parametrize('name', sorted(PARITY['moods']))
+def test_strategy_matches_pre_refactor(name):
+    table = TrackTable()
+    for persistent_id, title, artist, genre, duration in PARITY['tracks']:
+        table.append(title, artist, genre, duration, persistent_id)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        organizer = STRATEGIES[name]()
+    # The originals matched substrings; word matching came later on purpose
+    organizer.word_matching = False
+
+    compared = 0
+    for track, expected in zip(table.rows(), PARITY['moods'][name]):
+        # Titles with release tags are matched without them since normalization was added
+        if canonical_title(track['name']) != normalize_text(track['name']):
+            continue
+        assert list(organizer.classify(track)) == expected, track['name']
+        compared += 1
+    assert compared > 0.9 * len(PARITY['tracks'])